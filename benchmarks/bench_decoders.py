@@ -0,0 +1,30 @@
+"""
+    Benchmarks the available JSON decoders (`piped_api.decoders.DECODERS`) over the response fixtures in `tests/fixtures`.
+
+    Reports the mean decode time and the peak memory allocated while decoding, per fixture and decoder.
+    Run with `python -m benchmarks.bench_decoders` from the repository root.
+"""
+
+from timeit import Timer
+
+from piped_api.decoders import DECODERS
+
+from benchmarks.conftest import FIXTURES_PATH, peak_bytes
+
+
+
+def main(number: int=200) -> None:
+    print(f"{'fixture':<16} {'size':>9} {'decoder':<9} {'time':>11} {'peak memory':>12}")
+
+    for fixture in sorted(FIXTURES_PATH.glob('*.json')):
+        content = fixture.read_bytes()
+
+        for name, decode in DECODERS.items():
+            seconds = min(Timer(lambda: decode(content)).repeat(repeat=5, number=number)) / number
+
+            print(f"{fixture.name:<16} {len(content) / 1024:>6.0f} KB {name:<9} {seconds * 1e6:>8.0f} us {peak_bytes(lambda: decode(content)) / 1024:>9.0f} KB")
+
+
+
+if __name__ == '__main__':
+    main()
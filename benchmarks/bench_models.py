@@ -0,0 +1,44 @@
+"""
+    Micro-benchmark for repeated access to derived model properties.
+
+    Compares the memoized properties with their undecorated getters (which are what every access did before memoization).
+    Run with `python -m benchmarks.bench_models` from the repository root.
+"""
+
+import typing as t
+
+from timeit import timeit
+
+from piped_api.models.videos import Video
+from piped_api.models.comments import Comments
+
+from tests.payloads import video, comments_page
+
+
+def _bench(name: str, memoized: t.Callable[[], t.Any], original: t.Callable[[], t.Any], number: int=100_000) -> None:
+    before = timeit(original, number=number) / number * 1e9
+    after = timeit(memoized, number=number) / number * 1e9
+
+    print(f"{name:<28} {before:>10.0f} ns {after:>10.0f} ns {before / after:>8.1f}x")
+
+
+
+def main() -> None:
+    model = Video(video('dQw4w9WgXcQ'))
+    model.data['relatedStreams'] *= 10
+    related = model.related_videos[0]
+    comments = Comments(comments_page([f'c{index}' for index in range(20)]))
+
+    print(f"{'property':<28} {'before':>13} {'after':>13} {'speedup':>9}")
+
+    _bench('Video.upload_date', lambda: model.upload_date, lambda: Video.upload_date.fget.__wrapped__(model))
+    _bench('Video.duration', lambda: model.duration, lambda: Video.duration.fget.__wrapped__(model))
+    _bench('Video.related_videos (30)', lambda: model.related_videos, lambda: Video.related_videos.fget.__wrapped__(model))
+    _bench('Video.get_streams', lambda: model.get_streams('video'), lambda: [Video.Stream(data) for data in model.data['videoStreams']])
+    _bench('RelatedStream.uploaded', lambda: related.uploaded, lambda: Video.RelatedStream.uploaded.fget.__wrapped__(related))
+    _bench('Comments.get_comments (20)', comments.get_comments, lambda: [Comments.Comment(data) for data in comments.data['comments']])
+
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+    Compares decoding a `/streams` response and reading its fields with the dict-backed `piped_api.models.videos.Video`
+    versus the typed `piped_api.schema.Video` struct.
+
+    Run with `python -m benchmarks.bench_schema` from the repository root.
+"""
+
+from timeit import Timer
+
+from piped_api import schema
+from piped_api.decoders import get_decoder
+from piped_api.models.videos import Video
+
+from benchmarks.conftest import load_fixture
+
+
+def _read_model(content: bytes, decode) -> None:
+    video = Video(decode(content))
+    video.title, video.upload_date, video.duration, video.views
+
+    for related in video.related_videos:
+        related.title, related.duration, related.uploaded
+
+    for stream in video.get_streams('video'):
+        stream.url, stream.quality
+
+
+
+def _read_struct(content: bytes, struct) -> None:
+    video = schema.decode(content, struct)
+    video.title, video.upload_date, video.duration, video.views
+
+    for related in video.related_videos:
+        related.title, related.duration, related.uploaded
+
+    for stream in video.video_streams:
+        stream.url, stream.quality
+
+
+
+def main(number: int=500) -> None:
+    content = load_fixture('streams')
+
+    cases = {
+        'model (json)': lambda: _read_model(content, get_decoder('json')),
+        'model (auto)': lambda: _read_model(content, get_decoder('auto')),
+        'schema.Video': lambda: _read_struct(content, schema.Video),
+    }
+
+    for name, case in cases.items():
+        seconds = min(Timer(case).repeat(repeat=5, number=number)) / number
+        print(f"{name:<14} {seconds * 1e6:>8.0f} us")
+
+
+
+if __name__ == '__main__':
+    main()
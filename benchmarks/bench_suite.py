@@ -0,0 +1,98 @@
+"""
+    Offline benchmark suite for the hot paths of the client and the models, using [pytest-benchmark](https://pytest-benchmark.readthedocs.io).
+
+    Everything runs against the fixtures in `tests/fixtures` and a local `piped_api.testing.MockPipedServer`. Besides timings,
+    each benchmark records the peak memory and the number of allocated blocks of a single run in its extra info.
+
+    Run from the repository root (this file is not collected by a plain `pytest` run):
+
+    ```bash
+    python -m pytest benchmarks/bench_suite.py --benchmark-autosave
+    python -m pytest benchmarks/bench_suite.py --benchmark-compare --benchmark-compare-fail=mean:10%
+    ```
+"""
+
+import pytest
+
+from piped_api import PipedClient
+from piped_api.cache import ResponseCache
+from piped_api.decoders import DECODERS
+from piped_api.models.videos import Video
+from piped_api.models.comments import Comments
+from piped_api.models.channels import Channel
+
+from benchmarks.conftest import PAGES, load_fixture, track_allocations
+
+
+MODELS = {'streams': Video, 'comments': Comments, 'channel': Channel}
+
+
+def _fresh(model, data):
+    """
+        Setup for `benchmark.pedantic` - a new model for each round, so memoized properties are computed again.
+    """
+
+    return (model(data),), {}
+
+
+
+@pytest.mark.parametrize('decoder', list(DECODERS))
+@pytest.mark.parametrize('fixture', ['streams', 'comments', 'channel', 'trending'])
+def test_decode(benchmark, fixture: str, decoder: str) -> None:
+    content, decode = load_fixture(fixture), DECODERS[decoder]
+    benchmark.group = f'decode {fixture}'
+
+    track_allocations(benchmark, lambda: decode(content))
+    benchmark(decode, content)
+
+
+
+@pytest.mark.parametrize('fixture', list(MODELS))
+def test_model_construction(benchmark, fixture: str) -> None:
+    data, model = DECODERS['json'](load_fixture(fixture)), MODELS[fixture]
+    benchmark.group = 'model construction'
+
+    track_allocations(benchmark, lambda: model(data))
+    benchmark(model, data)
+
+
+
+@pytest.mark.parametrize('name, model, fixture, access', [
+    ('Video.related_videos', Video, 'streams', lambda video: video.related_videos),
+    ('Video.get_streams', Video, 'streams', lambda video: video.get_streams('video')),
+    ('Comments.get_comments', Comments, 'comments', lambda comments: comments.get_comments()),
+    ('Channel.uploaded_videos', Channel, 'channel', lambda channel: channel.uploaded_videos),
+])
+def test_list_property(benchmark, name: str, model, fixture: str, access) -> None:
+    data = DECODERS['json'](load_fixture(fixture))
+    benchmark.group = 'list properties (first access)'
+    benchmark.name = name
+
+    track_allocations(benchmark, lambda: access(model(data)))
+    benchmark.pedantic(access, setup=lambda: _fresh(model, data), rounds=2000)
+
+
+
+@pytest.mark.parametrize('cached', [False, True], ids=['uncached', 'cached'])
+def test_get_json(benchmark, server, cached: bool) -> None:
+    client = PipedClient(server.url, cache=ResponseCache() if cached else None)
+    benchmark.group = '_get_json end-to-end'
+
+    track_allocations(benchmark, lambda: client.get_video('dQw4w9WgXcQ'))
+    benchmark(client.get_video, 'dQw4w9WgXcQ')
+
+
+
+@pytest.mark.parametrize('crawl', ['comments', 'channel videos'])
+def test_paginated_crawl(benchmark, server, crawl: str) -> None:
+    client = PipedClient(server.url)
+    benchmark.group = f'paginated crawl ({PAGES} pages)'
+
+    if crawl == 'comments':
+        run = lambda: sum(1 for _ in client.iter_comments('dQw4w9WgXcQ'))
+
+    else:
+        run = lambda: sum(1 for _ in client.iter_channel_videos('UCuAXFkgsw1L7xaCfnd5JJOw'))
+
+    track_allocations(benchmark, run)
+    assert benchmark(run) >= PAGES
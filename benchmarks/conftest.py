@@ -0,0 +1,100 @@
+import re
+import json
+import time
+import typing as t
+import tracemalloc
+
+import pytest
+
+from pathlib import Path
+
+from piped_api.testing import MockPipedServer
+
+
+FIXTURES_PATH = Path(__file__).parent.parent / Path('tests/fixtures')
+PAGES = 10
+
+
+def load_fixture(name: str) -> bytes:
+    return (FIXTURES_PATH / f'{name}.json').read_bytes()
+
+
+
+def peak_bytes(function: t.Callable[[], t.Any]) -> int:
+    """
+        Runs `function` once under `tracemalloc` and returns the peak memory it allocated (in bytes).
+    """
+
+    tracemalloc.start()
+
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+
+    finally:
+        tracemalloc.stop()
+
+
+
+def track_allocations(benchmark, function: t.Callable[[], t.Any]) -> None:
+    """
+        Runs `function` once under `tracemalloc` and stores its peak memory and the number of allocated blocks
+        in the extra info of the benchmark (saved with `--benchmark-autosave`, so they can be compared between releases).
+    """
+
+    tracemalloc.start()
+
+    try:
+        before = tracemalloc.take_snapshot()
+        result = function()
+        after = tracemalloc.take_snapshot()
+        peak = tracemalloc.get_traced_memory()[1]
+
+    finally:
+        tracemalloc.stop()
+
+    benchmark.extra_info['peak_kb'] = round(peak / 1024, 1)
+    benchmark.extra_info['allocated_blocks'] = sum(stat.count_diff for stat in after.compare_to(before, 'filename') if stat.count_diff > 0)
+
+    del result
+
+
+
+def _paged(items_key: str, name: str) -> t.Callable[[str, t.Dict[str, str]], t.Any]:
+    """
+        Serves a fixture as `PAGES` pages, linked by `nextpage`.
+    """
+
+    payload = json.loads(load_fixture(name))
+
+    def handler(path: str, query: t.Dict[str, str]) -> t.Any:
+        page = int(query.get('nextpage', 0))
+        return {**payload, 'nextpage': str(page + 1) if page + 1 < PAGES else None, items_key: payload[items_key]}
+
+
+    return handler
+
+
+
+@pytest.fixture(scope='session')
+def server() -> t.Iterator[MockPipedServer]:
+    """
+        A local instance serving the fixtures: any video ID gets `streams.json`, and comments and channels have `PAGES` pages each.
+    """
+
+    # The recorded stream URLs have expired long ago, which would keep `/streams/` responses out of the cache:
+    expire = f"expire={int(time.time()) + 6 * 60 * 60}".encode()
+    streams = json.loads(re.sub(rb'expire=\d+', expire, load_fixture('streams')))
+    trending = json.loads(load_fixture('trending'))
+
+    routes = {
+        '/streams/': lambda path, query: streams,
+        '/comments/': _paged('comments', 'comments'),
+        '/nextpage/comments/': _paged('comments', 'comments'),
+        '/channel/': _paged('relatedStreams', 'channel'),
+        '/nextpage/channel/': _paged('relatedStreams', 'channel'),
+        '/trending': lambda path, query: trending,
+    }
+
+    with MockPipedServer(routes) as server:
+        yield server
@@ -3,6 +3,7 @@ import typing as t
 from pathlib import Path
 
 from .client import PipedClient
+from .async_client import AsyncPipedClient
 from .models.comments import Comments
 
 
@@ -22,4 +23,4 @@ __doc__ = __readme__
 
 # Supress unused-import warnings:
 if t.TYPE_CHECKING:
-    _ = [PipedClient, Comments]
+    _ = [PipedClient, AsyncPipedClient, Comments]
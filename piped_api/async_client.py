@@ -0,0 +1,592 @@
+import time
+import typing as t
+import asyncio
+
+from datetime import datetime
+from contextlib import nullcontext
+
+try:
+    import httpx
+
+except ImportError:
+    httpx = None
+
+from .cache import ResponseCache
+from .instances import InstancePool
+from .retry import RetryPolicy, DEFAULT_RETRY_POLICY
+from .ratelimit import RateLimiter
+from .instrumentation import Hooks, HttpxTrace, Instrumentation, current as current_request
+from .refresh import AsyncRefresher
+from .decoders import Decoder, get_decoder
+from .projection import Projection
+from .streaming import AsyncStreamedPage
+from .client import _MDL, _S, _raise_for_error, _error_for_response, _with_params
+from .singleflight import AsyncSingleFlight
+from .pagination import aiter_pages, ChannelVideosCrawl, CommentTreeCrawl
+from .models.comments import Comments
+from .models.videos import Video
+from .models.channels import NextPageChannel, Channel
+
+
+
+class AsyncPipedClient:
+    """
+        An `asyncio` API client for [Piped](https://piped.kavin.rocks).
+
+        Mirrors every endpoint of `piped_api.client.PipedClient` and returns the same models, but all requests go through
+        a pooled [`httpx.AsyncClient`](https://www.python-httpx.org/async/), so a single process can keep hundreds of requests
+        in flight without blocking a thread for each of them.
+
+        Requires the `async` extra (`pip install piped-api[async]`).
+
+        ```python
+        async with AsyncPipedClient() as client:
+            video = await client.get_video(video_id)
+        ```
+
+        See also [Piped API docs](https://piped-docs.kavin.rocks/docs)
+    """
+
+    def __init__(self, base_api_url: str='https://pipedapi.kavin.rocks', client: t.Optional['httpx.AsyncClient']=None, max_connections: int=100, cache: t.Optional[ResponseCache]=None, coalesce_requests: bool=True, decoder: t.Union[str, Decoder]='auto', instances: t.Optional[InstancePool]=None, retry: t.Optional[RetryPolicy]=DEFAULT_RETRY_POLICY, rate_limiter: t.Optional[RateLimiter]=None, max_keepalive_connections: t.Optional[int]=None, keepalive_expiry: t.Optional[float]=30.0, timeout: t.Optional[t.Union[float, t.Tuple[float, float]]]=(5.0, 30.0), http2: bool=False, hooks: t.Sequence[Hooks]=(), refresher: t.Optional[AsyncRefresher]=None, cache_namespace: t.Optional[str]=None) -> None:
+        """
+            ### Parameters:
+            - `base_api_url` - The base URL to the instance's API. Trailing slashes will be stripped.
+            - `client` - An `httpx.AsyncClient` to use for all requests. If this is `None`, a new client is created (and owned) by this instance.
+            - `max_connections` - The size of the connection pool of the client created by this instance. Ignored if `client` is passed.
+            - `cache` - A `piped_api.cache.ResponseCache` to cache decoded responses in. Expired responses within its `stale_ttls`
+                are returned right away and refreshed in the background. If this is `None`, nothing is cached.
+            - `coalesce_requests` - Whether concurrent identical requests should share a single round trip and decoded payload.
+                The number of collapsed calls is available as `AsyncPipedClient.single_flight.collapsed`.
+            - `decoder` - The JSON decoder for response bodies, see `piped_api.decoders.get_decoder`. By default, the fastest installed one is used.
+            - `instances` - A `piped_api.instances.InstancePool` of mirrors to spread requests over, see `piped_api.client.PipedClient`.
+            - `retry` - The `piped_api.retry.RetryPolicy` for failed requests. If this is `None`, requests are not retried.
+            - `rate_limiter` - A `piped_api.ratelimit.RateLimiter` to delay requests with. If this is `None`, requests are not limited.
+            - `max_keepalive_connections` - How many idle connections are kept open for reuse. If this is `None`, all `max_connections` are. Ignored if `client` is passed.
+            - `keepalive_expiry` - Seconds after which idle connections are closed. If this is `None`, they are kept open. Ignored if `client` is passed.
+            - `timeout` - The timeout of requests in seconds, or a `(connect, read)` tuple. If this is `None`, requests never time out. Ignored if `client` is passed.
+            - `http2` - Whether to use HTTP/2 when the instance supports it, multiplexing requests over fewer connections.
+                Requires the `http2` extra (`pip install piped-api[http2]`). Ignored if `client` is passed.
+            - `hooks` - `piped_api.instrumentation.Hooks` to notify about each API call, see `piped_api.client.PipedClient`.
+            - `refresher` - The `piped_api.refresh.AsyncRefresher` that refreshes stale responses, see `piped_api.client.PipedClient`.
+            - `cache_namespace` - What cached responses are keyed by instead of `base_api_url`, see `piped_api.client.PipedClient`.
+        """
+
+        if httpx is None:
+            raise ImportError("AsyncPipedClient requires `httpx` - install it with `pip install piped-api[async]`")
+
+        self.base_api_url = base_api_url.strip("/")
+        self.cache_namespace = cache_namespace
+        self.cache = cache
+        self.single_flight = AsyncSingleFlight() if coalesce_requests else None
+        self.decode = get_decoder(decoder)
+        self.instances = instances
+        self.retry = retry
+        self.rate_limiter = rate_limiter
+        self.hooks = list(hooks)
+
+        self._owns_refresher = refresher is None
+        self.refresher = refresher if refresher is not None else AsyncRefresher()
+
+        self._owns_client = client is None
+        self.client = client if client is not None else httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections if max_keepalive_connections is not None else max_connections,
+                keepalive_expiry=keepalive_expiry
+            ),
+            timeout=httpx.Timeout(timeout[1], connect=timeout[0]) if isinstance(timeout, tuple) else httpx.Timeout(timeout),
+            http2=http2
+        )
+
+
+
+    async def aclose(self) -> None:
+        """
+            Stops the `refresher` (waiting for pending refreshes) and closes the underlying `httpx.AsyncClient`, if they were created by this instance.
+        """
+
+        if self._owns_refresher:
+            await self.refresher.aclose()
+
+        if self._owns_client:
+            await self.client.aclose()
+
+
+    async def __aenter__(self) -> 'AsyncPipedClient':
+        return self
+
+
+    async def __aexit__(self, *_: t.Any) -> None:
+        await self.aclose()
+
+
+
+    async def _send_once(self, uri: str, stream: bool=False, failover: t.Optional[t.Callable[[], bool]]=None, **kwargs) -> 'httpx.Response':
+        """
+            Sends a GET request for specific URI to the instance, or to the best instance of the pool (failing over to the others).
+            Before failing over, `failover` is asked whether another attempt may be made (see `piped_api.instances.InstancePool.call`).
+            If `stream` is `True`, the response body is not read yet.
+        """
+
+        send_kwargs = {key: kwargs.pop(key) for key in ('auth', 'follow_redirects') if key in kwargs}
+
+        async def queue(base_api_url: str) -> None:
+            delay = await self.rate_limiter.aacquire(base_api_url, uri)
+            info = current_request()
+
+            if info is not None:
+                info.add_timing('queue', delay)
+
+
+        async def send(base_api_url: str) -> 'httpx.Response':
+            info = current_request()
+
+            if info is None:
+                return await self.client.send(self.client.build_request('GET', f"{base_api_url}{uri}", **kwargs), stream=stream, **send_kwargs)
+
+            trace = HttpxTrace()
+            extensions = {**(kwargs.get('extensions', None) or {}), 'trace': trace}
+            request = self.client.build_request('GET', f"{base_api_url}{uri}", **{**kwargs, 'extensions': extensions})
+            start = time.perf_counter()
+            response = await self.client.send(request, stream=stream, **send_kwargs)
+
+            info.add_timing('connect', trace.connect)
+            info.add_timing('ttfb', trace.ttfb)
+            info.add_timing('download', max(time.perf_counter() - start - trace.connect - trace.ttfb, 0.0))
+            info.status_code = response.status_code
+            info.attempts += 1
+
+            return response
+
+
+        before_send = queue if self.rate_limiter is not None else None
+
+        if self.instances is None:
+            if before_send is not None:
+                await before_send(self.base_api_url)
+
+            return await send(self.base_api_url)
+
+        # See `PipedClient._send_once`:
+        return await self.instances.acall(send, (httpx.TransportError,), before_send, failover)
+
+
+    async def _send(self, uri: str, stream: bool=False, **kwargs) -> 'httpx.Response':
+        """
+            Sends a GET request for specific URI, retrying it according to `AsyncPipedClient.retry`.
+            Raises `piped_api.client.APIError` if the final response is not successful.
+        """
+
+        if self.retry is not None:
+            self.retry.record_request()
+
+        attempt = 0
+
+        # Fail-overs to other instances of the pool are attempts too, so they are limited by the policy (and its budget) as well:
+        def failover() -> bool:
+            nonlocal attempt
+
+            if self.retry is not None and not self.retry.allow_failover(attempt):
+                return False
+
+            attempt += 1
+            return True
+
+
+        while True:
+            attempt += 1
+
+            try:
+                response = await self._send_once(uri, stream, failover, **kwargs)
+
+            except httpx.TransportError:
+                delay = self.retry.delay(attempt) if self.retry is not None else None
+
+                if delay is None:
+                    raise
+
+                await self._backoff(delay)
+                continue
+
+            if response.status_code < 400:
+                return response
+
+            delay = self.retry.delay(attempt, response.status_code, response.headers.get('Retry-After', None)) if self.retry is not None else None
+
+            if delay is None:
+                try:
+                    raise _error_for_response(uri, response.status_code, await response.aread(), attempt, self.decode)
+
+                finally:
+                    await response.aclose()
+
+            await response.aclose()
+            await self._backoff(delay)
+
+
+    async def _backoff(self, delay: float) -> None:
+        """
+            Waits `delay` seconds before retrying a request.
+        """
+
+        info = current_request()
+
+        if info is not None:
+            info.add_timing('backoff', delay)
+
+        await asyncio.sleep(delay)
+
+
+    async def _request(self, uri: str, **kwargs) -> bytes:
+        """
+            Requests the raw response body of specific URI from the instance.
+        """
+
+        response = await self._send(uri, **kwargs)
+        info = current_request()
+
+        if info is not None:
+            info.response_bytes += len(response.content)
+
+        return response.content
+
+
+    async def _stream(self, uri: str, chunk_size: int, **kwargs) -> t.AsyncIterator[bytes]:
+        """
+            Requests specific URI from the instance and yields the response body in chunks, as it is being received.
+        """
+
+        response = await self._send(uri, stream=True, **kwargs)
+
+        try:
+            async for chunk in response.aiter_bytes(chunk_size):
+                yield chunk
+
+        finally:
+            await response.aclose()
+
+
+    async def _fetch_json(self, uri: str, cache_key: str, ttl: t.Optional[float], **kwargs) -> t.Union[t.Dict[str, t.Any], t.List[t.Any]]:
+        """
+            Requests JSON data from the instance (bypassing the cache) and caches it for `ttl` seconds, if `ttl` is not `None`.
+        """
+
+        content = await self._request(uri, **kwargs)
+        start = time.perf_counter()
+        json: t.Union[dict, list] = self.decode(content)
+        info = current_request()
+
+        if info is not None:
+            info.add_timing('decode', time.perf_counter() - start)
+
+        _raise_for_error(json, uri)
+        if ttl is not None:
+            ttl = self.cache.ttl_for_response(uri, json, ttl)
+
+            # Don't keep serving a stale response in place of one that can't be cached (e. g.: a video whose stream URLs expire too soon):
+            if ttl is None:
+                await self._call_cache(self.cache.delete, cache_key)
+
+            else:
+                await self._call_cache(self.cache.set, cache_key, json, ttl)
+
+        return json
+
+
+    async def _call_cache(self, method: t.Callable[..., _S], *args: t.Any) -> _S:
+        """
+            Calls `method` of the cache, in a thread if its backend may block (see `piped_api.cache.CacheBackend.blocking`).
+        """
+
+        if self.cache.backend.blocking:
+            return await asyncio.to_thread(method, *args)
+
+        return method(*args)
+
+
+    async def _get_json(self, uri: str, as_model: t.Optional[_MDL]=None, projection: t.Optional[Projection]=None, **kwargs) -> t.Union[_MDL, t.Dict[str, t.Any], t.List[t.Any]]:
+        """
+            Obtains JSON data from specific URI of the Piped API.
+
+            ### Parameters:
+            - `uri` - The URI to get JSON data from
+            - `as_model` - The `BasePipedModel` to load the JSON data into. If this is `None`, the JSON data is returned as a `dict`.
+            - `projection` - Which keys of the JSON data to keep. If this is `None`, everything is kept.
+            - `**kwargs` - Additional keyword arguments to pass to `httpx.AsyncClient.get`
+        """
+
+        with Instrumentation(self.hooks, uri, kwargs.get('params', None)) if self.hooks else nullcontext() as info:
+            cache_key = ResponseCache.make_key(self.cache_namespace or self.base_api_url, uri, kwargs.get('params', None))
+            ttl = self.cache.ttl_for(uri) if self.cache is not None else None
+
+            if projection is not None and ttl is None and projection.decoding_type() is not None:
+                json = await self._get_struct(uri, projection.decoding_type(), **kwargs)
+                _raise_for_error(json, uri)
+
+            else:
+                fetch_json = lambda: self._fetch_json(uri, cache_key, ttl, **kwargs)
+                fetch = (lambda: self.single_flight.do(cache_key, fetch_json)) if self.single_flight is not None else fetch_json
+
+                stale_ttl = self.cache.stale_ttl_for(uri) if ttl is not None else 0.0
+                cached = await self._call_cache(self.cache.lookup, cache_key, stale_ttl) if ttl is not None else None
+                json: t.Union[dict, list, None] = cached[0] if cached is not None else None
+
+                if info is not None:
+                    info.cache_hit = cached is not None
+
+                if stale_ttl:
+                    self.refresher.track(cache_key, fetch, lambda: self.cache.expires_at(cache_key), ttl)
+
+                    if cached is not None and not cached[1]:
+                        self.refresher.submit(cache_key, fetch)
+
+                if json is None:
+                    json = await fetch()
+
+                if projection is not None:
+                    json = projection.apply(json)
+
+            if as_model is None:
+                return json
+
+            start = time.perf_counter()
+            model = as_model(json)
+
+            if info is not None:
+                info.add_timing('model', time.perf_counter() - start)
+
+            return model
+
+
+    async def _fetch_struct(self, uri: str, struct: t.Type[_S], **kwargs) -> _S:
+        """
+            Requests data from the instance and decodes it into a `msgspec` type (e. g.: a `piped_api.schema` struct).
+        """
+
+        from . import schema
+
+        content = await self._request(uri, **kwargs)
+        start = time.perf_counter()
+
+        try:
+            return schema.decode(content, struct)
+
+        except schema.ValidationError:
+            _raise_for_error(self.decode(content), uri)
+            raise
+
+        finally:
+            info = current_request()
+
+            if info is not None:
+                info.add_timing('decode', time.perf_counter() - start)
+
+
+    async def _get_struct(self, uri: str, struct: t.Type[_S], **kwargs) -> _S:
+        """
+            Obtains data from specific URI of the Piped API, decoded into a `msgspec` type in a single pass.
+            See `piped_api.client.PipedClient._get_struct`.
+        """
+
+        key = f"{ResponseCache.make_key(self.cache_namespace or self.base_api_url, uri, kwargs.get('params', None))}#{struct!r}"
+        fetch = lambda: self._fetch_struct(uri, struct, **kwargs)
+
+        return await (self.single_flight.do(key, fetch) if self.single_flight is not None else fetch())
+
+
+    async def get_video(self, video_id: str, fields: t.Optional[t.Iterable[str]]=None, **kwargs) -> Video:
+        """
+            Gets information about a specific video. See `piped_api.client.PipedClient.get_video`.
+        """
+
+        return await self._get_json(f"/streams/{video_id}", Video, Projection.of(fields), **kwargs)
+
+
+    async def get_video_struct(self, video_id: str, struct: t.Optional[t.Type[_S]]=None, **kwargs) -> _S:
+        """
+            Gets information about a specific video as a typed struct, decoded and validated in a single pass.
+            See `piped_api.client.PipedClient.get_video_struct`.
+        """
+
+        if struct is None:
+            from .schema import Video as struct
+
+        return await self._get_struct(f"/streams/{video_id}", struct, **kwargs)
+
+
+    async def get_videos(self, video_ids: t.Iterable[str], max_concurrency: int=50, **kwargs) -> t.AsyncIterator[t.Tuple[str, t.Union[Video, Exception]]]:
+        """
+            Gets information about many videos at once, with at most `max_concurrency` requests in flight.
+            See `piped_api.client.PipedClient.get_videos`.
+
+            ```python
+            async for video_id, result in client.get_videos(video_ids):
+                ...
+            ```
+        """
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def fetch(video_id: str) -> t.Tuple[str, t.Union[Video, Exception]]:
+            async with semaphore:
+                try:
+                    return video_id, await self.get_video(video_id, **kwargs)
+
+                except Exception as error:
+                    return video_id, error
+
+
+        tasks = [asyncio.ensure_future(fetch(video_id)) for video_id in dict.fromkeys(video_ids)]
+
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+    async def get_comments(self, video_id: str, nextpage: t.Optional[t.Dict[str, t.Optional[str]]]=None, fields: t.Optional[t.Iterable[str]]=None, **kwargs) -> Comments:
+        """
+            Gets a list of comments for a specific video. See `piped_api.client.PipedClient.get_comments`.
+        """
+
+        projection = Projection.of(fields, keep={'nextpage', 'disabled'}, items_key='comments')
+
+        if nextpage is not None:
+            kwargs = _with_params(kwargs, nextpage=nextpage)
+            return await self._get_json(f"/nextpage/comments/{video_id}", Comments, projection, **kwargs)
+
+        return await self._get_json(f"/comments/{video_id}", Comments, projection, **kwargs)
+
+
+    def stream_comments(self, video_id: str, nextpage: t.Optional[str]=None, chunk_size: int=16 * 1024, **kwargs) -> AsyncStreamedPage[Comments.Comment]:
+        """
+            Like `AsyncPipedClient.get_comments`, but the comments are parsed and yielded one by one (with `async for`) while the page
+            is still being downloaded. See `piped_api.client.PipedClient.stream_comments`.
+        """
+
+        uri = f"/comments/{video_id}"
+
+        if nextpage is not None:
+            kwargs = _with_params(kwargs, nextpage=nextpage)
+            uri = f"/nextpage/comments/{video_id}"
+
+        return AsyncStreamedPage(self._stream(uri, chunk_size, **kwargs), 'comments', Comments.Comment, Comments, self.decode, _raise_for_error)
+
+
+    async def iter_comments(self, video_id: str, max_pages: t.Optional[int]=None, prefetch: int=1, **kwargs) -> t.AsyncIterator[Comments.Comment]:
+        """
+            Lazily iterates over the comments of a specific video, across all pages. See `piped_api.client.PipedClient.iter_comments`.
+        """
+
+        pages = aiter_pages(lambda nextpage: self.get_comments(video_id, nextpage=nextpage, **kwargs), lambda comments: comments.nextpage, max_pages, prefetch)
+
+        async for comments in pages:
+            for comment in comments:
+                yield comment
+
+
+    async def iter_comment_tree(self, video_id: str, max_depth: t.Optional[int]=None, max_comments: t.Optional[int]=None, max_concurrency: int=4, **kwargs) -> t.AsyncIterator[t.Tuple[t.Optional[str], Comments.Comment]]:
+        """
+            Lazily crawls the full comment tree of a specific video, with at most `max_concurrency` pages being downloaded at once.
+            See `piped_api.client.PipedClient.iter_comment_tree`.
+        """
+
+        crawl = CommentTreeCrawl(max_depth, max_comments)
+        running: t.Dict['asyncio.Task[Comments]', t.Tuple[t.Optional[str], int]] = {}
+
+        try:
+            while crawl.pending or running:
+                while crawl.pending and len(running) < max_concurrency:
+                    parent_id, depth, nextpage = crawl.pending.popleft()
+                    running[asyncio.ensure_future(self.get_comments(video_id, nextpage=nextpage, **kwargs))] = (parent_id, depth)
+
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    parent_id, depth = running.pop(task)
+
+                    for item in crawl.expand(parent_id, depth, task.result()):
+                        yield item
+
+                    if crawl.finished:
+                        return
+
+        finally:
+            for task in running:
+                task.cancel()
+
+
+    async def get_trending(self, country_code: str='US', fields: t.Optional[t.Iterable[str]]=None, **kwargs) -> t.List[Video.RelatedStream]:
+        """
+            Obtains trending videos for a specific country. See `piped_api.client.PipedClient.get_trending`.
+        """
+
+        kwargs = _with_params(kwargs, region=country_code.upper())
+
+        return [Video.RelatedStream(trending_video) for trending_video in await self._get_json(f"/trending", projection=Projection.of(fields, many=True), **kwargs)]
+
+
+    async def get_channel_by_id(self, channel_id: str, nextpage: t.Optional[t.Dict[str, t.Optional[str]]]=None, fields: t.Optional[t.Iterable[str]]=None, **kwargs) -> t.Union[NextPageChannel, Channel]:
+        """
+            Gets information about a specific channel by its ID. See `piped_api.client.PipedClient.get_channel_by_id`.
+        """
+
+        projection = Projection.of(fields, keep={'nextpage'}, items_key='relatedStreams')
+
+        if nextpage is not None:
+            kwargs = _with_params(kwargs, nextpage=nextpage)
+            return await self._get_json(f"/nextpage/channel/{channel_id}", NextPageChannel, projection, **kwargs)
+
+        return await self._get_json(f"/channel/{channel_id}", Channel, projection, **kwargs)
+
+
+    def stream_channel_videos(self, channel_id: str, nextpage: t.Optional[str]=None, chunk_size: int=16 * 1024, **kwargs) -> AsyncStreamedPage[Video.RelatedStream]:
+        """
+            Like `AsyncPipedClient.get_channel_by_id`, but the uploaded videos are parsed and yielded one by one (with `async for`) while the page
+            is still being downloaded. See `piped_api.client.PipedClient.stream_channel_videos`.
+        """
+
+        uri, rest_model = f"/channel/{channel_id}", Channel
+
+        if nextpage is not None:
+            kwargs = _with_params(kwargs, nextpage=nextpage)
+            uri, rest_model = f"/nextpage/channel/{channel_id}", NextPageChannel
+
+        return AsyncStreamedPage(self._stream(uri, chunk_size, **kwargs), 'relatedStreams', Video.RelatedStream, rest_model, self.decode, _raise_for_error)
+
+
+    async def iter_channel_videos(self, channel_id: str, since: t.Optional[datetime]=None, limit: t.Optional[int]=None, prefetch: int=1, **kwargs) -> t.AsyncIterator[Video.RelatedStream]:
+        """
+            Lazily iterates over the uploaded videos of a specific channel (newest first), across all pages.
+            See `piped_api.client.PipedClient.iter_channel_videos`.
+        """
+
+        crawl = ChannelVideosCrawl(since, limit)
+
+        async for channel in aiter_pages(lambda nextpage: self.get_channel_by_id(channel_id, nextpage=nextpage, **kwargs), crawl.next_page, prefetch=prefetch):
+            for video in crawl.videos(channel):
+                yield video
+
+            if crawl.finished:
+                return
+
+
+    async def get_channel_by_name(self, channel_name: str, fields: t.Optional[t.Iterable[str]]=None, **kwargs) -> Channel:
+        """
+            Gets information about a specific channel by its name. See `piped_api.client.PipedClient.get_channel_by_name`.
+        """
+
+        return await self._get_json(f"/c/{channel_name}", Channel, Projection.of(fields, keep={'nextpage'}, items_key='relatedStreams'), **kwargs)
+
+
+    async def get_search_suggestions(self, search_query: str, **kwargs) -> t.List[str]:
+        """
+            Obtains search suggestions for a query. See `piped_api.client.PipedClient.get_search_suggestions`.
+        """
+
+        kwargs = _with_params(kwargs, query=search_query)
+
+        return await self._get_json(f"/suggestions", **kwargs)
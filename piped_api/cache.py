@@ -0,0 +1,534 @@
+import typing as t
+
+import os
+import json
+import math
+import time
+import zlib
+import sqlite3
+import hashlib
+import threading
+
+from pathlib import Path
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from .models.videos import streams_expiry
+
+
+Entry = t.Tuple[float, t.Any]
+"""A cached `(expires_at, payload)` pair. `expires_at` is a UNIX timestamp."""
+
+
+DEFAULT_TTLS: t.Dict[str, float] = {
+    '/trending': 5 * 60,
+    '/streams/': 3 * 60 * 60,
+    '/channel/': 20 * 60,
+    '/nextpage/channel/': 20 * 60,
+    '/c/': 20 * 60,
+    '/comments/': 10 * 60,
+    '/nextpage/comments/': 10 * 60,
+    '/suggestions': 60 * 60,
+}
+"""Default time-to-live (in seconds) per endpoint, keyed by URI prefix."""
+
+
+DEFAULT_STALE_TTLS: t.Dict[str, float] = {
+    '/trending': 60 * 60,
+    '/streams/': 5 * 60,
+    '/channel/': 24 * 60 * 60,
+}
+"""
+    Suggested `ResponseCache.stale_ttls` - trending videos, videos and channels (by ID) may be served stale while they are refreshed.
+    Videos only briefly, as their stream URLs have to keep working (see `ResponseCache.stream_expiry_margin`).
+"""
+
+
+
+class CacheBackend:
+    """
+        Base class for storages used by `ResponseCache`.
+
+        Backends only store and return entries - expiration is decided by `ResponseCache`.
+    """
+
+    blocking: bool = False
+    """Whether calls may block (e. g.: on disk I/O, or on locks held by other processes). `AsyncPipedClient` runs them in a thread."""
+
+
+    def get(self, key: str) -> t.Optional[Entry]:
+        """
+            Returns the `(expires_at, payload)` entry stored under `key`, or `None` if there is no such entry.
+        """
+
+        raise NotImplementedError
+
+
+    def set(self, key: str, payload: t.Any, expires_at: float) -> None:
+        """
+            Stores `payload` under `key`.
+        """
+
+        raise NotImplementedError
+
+
+    def expires_at(self, key: str) -> t.Optional[float]:
+        """
+            Returns when the entry stored under `key` expires, or `None` if there is no such entry.
+            Backends should override this if they can do it without loading the payload.
+        """
+
+        entry = self.get(key)
+
+        return entry[0] if entry is not None else None
+
+
+    def delete(self, key: str) -> None:
+        """
+            Removes the entry stored under `key` (if any).
+        """
+
+        raise NotImplementedError
+
+
+    def clear(self) -> None:
+        """
+            Removes all entries.
+        """
+
+        raise NotImplementedError
+
+
+
+class MemoryCache(CacheBackend):
+    """
+        A bounded, thread-safe in-memory backend. Once `max_entries` is reached, the least recently used entry is evicted.
+
+        Payloads are stored as-is (not copied), so don't mutate the `data` of models obtained from a cached client.
+    """
+
+    def __init__(self, max_entries: int=1024) -> None:
+        """
+            ### Parameters:
+            - `max_entries` - The maximum number of entries to keep
+        """
+
+        self.max_entries = max_entries
+
+        self._entries: t.OrderedDict[str, Entry] = OrderedDict()
+        self._lock = threading.Lock()
+
+
+    def get(self, key: str) -> t.Optional[Entry]:
+        with self._lock:
+            entry = self._entries.get(key, None)
+
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+            return entry
+
+
+    def set(self, key: str, payload: t.Any, expires_at: float) -> None:
+        with self._lock:
+            self._entries[key] = (expires_at, payload)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+
+class DiskCache(CacheBackend):
+    """
+        An on-disk backend, storing each entry as a JSON file in `directory`.
+
+        Entries survive restarts and can be shared by multiple processes (files are replaced atomically).
+    """
+
+    blocking = True
+
+
+    def __init__(self, directory: t.Union[str, os.PathLike]) -> None:
+        """
+            ### Parameters:
+            - `directory` - The directory to store entries in. It is created if it doesn't exist.
+        """
+
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{hashlib.sha1(key.encode()).hexdigest()}.json"
+
+
+    def get(self, key: str) -> t.Optional[Entry]:
+        try:
+            with open(self._path(key), 'r', encoding="UTF-8") as file:
+                stored = json.load(file)
+
+        except (OSError, ValueError):
+            return None
+
+        return stored['expires_at'], stored['payload']
+
+
+    def set(self, key: str, payload: t.Any, expires_at: float) -> None:
+        path = self._path(key)
+        temporary_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+
+        with open(temporary_path, 'w', encoding="UTF-8") as file:
+            json.dump({'expires_at': expires_at, 'payload': payload}, file)
+
+        os.replace(temporary_path, path)
+
+
+    def delete(self, key: str) -> None:
+        try:
+            self._path(key).unlink()
+
+        except FileNotFoundError:
+            pass
+
+
+    def clear(self) -> None:
+        for path in self.directory.glob('*.json'):
+            path.unlink(missing_ok=True)
+
+
+
+class SQLiteCache(CacheBackend):
+    """
+        An on-disk backend, storing all entries in a single SQLite database file, with payloads compressed by zlib.
+
+        Entries survive restarts and the file can be shared by multiple threads and processes: SQLite serializes writes,
+        and readers don't block writers in its write-ahead logging mode. Combined with `ResponseCache.stale_ttls`,
+        a restarted worker can answer from the cache instantly and refresh the entries in the background.
+    """
+
+    blocking = True
+
+
+    def __init__(self, path: t.Union[str, os.PathLike], compression_level: int=6, max_entries: t.Optional[int]=None, timeout: float=30.0) -> None:
+        """
+            ### Parameters:
+            - `path` - The database file. It is created (with its directory) if it doesn't exist.
+            - `compression_level` - The zlib compression level of payloads, from `0` (none) to `9` (smallest)
+            - `max_entries` - The maximum number of entries to keep - once it is exceeded, the entries expiring first are evicted (a tenth
+                of `max_entries` at once, so that the entries only have to be counted every so many writes). If this is `None`, entries are only
+                removed by `SQLiteCache.purge`. Entries written by other processes are only noticed at the next count.
+            - `timeout` - Seconds to wait for the database to be unlocked by another process
+        """
+
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.compression_level = compression_level
+        self.max_entries = max_entries
+        self.timeout = timeout
+
+        # SQLite connections can't be shared between threads (or forked processes), so each gets its own:
+        self._local = threading.local()
+        self._connection()
+
+
+    def _connection(self) -> sqlite3.Connection:
+        connection: t.Optional[sqlite3.Connection] = getattr(self._local, 'connection', None)
+
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute('CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, expires_at REAL NOT NULL, payload BLOB NOT NULL)')
+            connection.execute('CREATE INDEX IF NOT EXISTS entries_expires_at ON entries (expires_at)')
+
+            self._local.connection, self._local.pid = connection, os.getpid()
+            self._local.size = None
+
+        return connection
+
+
+    def get(self, key: str) -> t.Optional[Entry]:
+        row = self._connection().execute('SELECT expires_at, payload FROM entries WHERE key = ?', (key,)).fetchone()
+
+        if row is None:
+            return None
+
+        try:
+            return row[0], json.loads(zlib.decompress(row[1]))
+
+        except (zlib.error, ValueError):
+            return None
+
+
+    def expires_at(self, key: str) -> t.Optional[float]:
+        row = self._connection().execute('SELECT expires_at FROM entries WHERE key = ?', (key,)).fetchone()
+
+        return row[0] if row is not None else None
+
+
+    def set(self, key: str, payload: t.Any, expires_at: float) -> None:
+        compressed = zlib.compress(json.dumps(payload, separators=(',', ':')).encode('UTF-8'), self.compression_level)
+        connection = self._connection()
+        connection.execute('INSERT OR REPLACE INTO entries (key, expires_at, payload) VALUES (?, ?, ?)', (key, expires_at, compressed))
+
+        if self.max_entries is not None:
+            self._evict(connection)
+
+
+    def _evict(self, connection: sqlite3.Connection) -> None:
+        # Counting the entries scans the whole table, so it is only done once an estimate of the size (which counts replaced entries too)
+        # exceeds `max_entries`:
+        size = self._local.size
+
+        if size is None or size >= self.max_entries:
+            size = connection.execute('SELECT count(*) FROM entries').fetchone()[0]
+
+        else:
+            size += 1
+
+        if size > self.max_entries:
+            keep = self.max_entries - self.max_entries // 10
+            connection.execute('DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY expires_at LIMIT ?)', (size - keep,))
+            size = keep
+
+        self._local.size = size
+
+
+    def delete(self, key: str) -> None:
+        self._connection().execute('DELETE FROM entries WHERE key = ?', (key,))
+
+
+    def clear(self) -> None:
+        self._connection().execute('DELETE FROM entries')
+
+
+    def purge(self, expired_for: float=0.0) -> int:
+        """
+            Removes entries that expired more than `expired_for` seconds ago (e. g.: the longest of `ResponseCache.stale_ttls`)
+            and returns how many were removed.
+        """
+
+        return self._connection().execute('DELETE FROM entries WHERE expires_at <= ?', (time.time() - expired_for,)).rowcount
+
+
+    def close(self) -> None:
+        """
+            Closes the database connection of the current thread.
+        """
+
+        connection = getattr(self._local, 'connection', None)
+
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+    def __len__(self) -> int:
+        return self._connection().execute('SELECT count(*) FROM entries').fetchone()[0]
+
+
+
+@dataclass
+class CacheStats:
+    """
+        Hit/miss counters of a `ResponseCache`.
+    """
+
+    hits: int = 0
+    misses: int = 0
+
+    stale: int = 0
+    """How many of the `hits` were stale (expired, but still within the `ResponseCache.stale_ttls`)"""
+
+
+    @property
+    def hit_ratio(self) -> float:
+        """
+            The fraction of lookups that were served from the cache (`0.0` if there were no lookups yet)
+        """
+
+        total = self.hits + self.misses
+
+        return self.hits / total if total else 0.0
+
+
+
+class ResponseCache:
+    """
+        Caches decoded JSON responses of the Piped API, with a separate time-to-live for each endpoint.
+
+        Pass an instance to `piped_api.client.PipedClient` (or `piped_api.async_client.AsyncPipedClient`) to enable caching:
+
+        ```python
+        client = PipedClient(cache=ResponseCache(MemoryCache(max_entries=10_000), ttls={'/trending': 60}))
+        ```
+
+        Responses are keyed by the instance URL, the URI and the query parameters.
+    """
+
+    def __init__(self, backend: t.Optional[CacheBackend]=None, ttls: t.Optional[t.Dict[str, t.Optional[float]]]=None, stale_ttls: t.Optional[t.Dict[str, float]]=None, stream_expiry_margin: t.Optional[float]=10 * 60) -> None:
+        """
+            ### Parameters:
+            - `backend` - The storage to use. Defaults to a `MemoryCache` with default settings.
+            - `ttls` - Time-to-live (in seconds) per URI prefix, overriding `DEFAULT_TTLS`. Set a prefix to `None` (or `0`) to never cache it.
+                Responses from endpoints that don't match any prefix are not cached.
+            - `stale_ttls` - How long (in seconds) after expiring responses may still be served per URI prefix, while the client refreshes them
+                in the background (stale-while-revalidate). Responses from endpoints that don't match any prefix are never served stale.
+            - `stream_expiry_margin` - `/streams/` responses are cached (and served stale) at most until this many seconds before their first
+                stream URL expires, so that cached videos never hand out dead links. Their TTL from `ttls` still applies if it is shorter.
+                If this is `None`, the TTLs from `ttls` and `stale_ttls` are always used.
+        """
+
+        self.backend = backend if backend is not None else MemoryCache()
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.stale_ttls = dict(stale_ttls or {})
+        self.stream_expiry_margin = stream_expiry_margin
+        self.stats = CacheStats()
+
+        self._lock = threading.Lock()
+
+
+    @staticmethod
+    def make_key(base_api_url: str, uri: str, params: t.Optional[t.Dict[str, t.Any]]=None) -> str:
+        """
+            Creates a cache key from the instance URL, URI and query parameters.
+        """
+
+        if not params:
+            return f"{base_api_url}{uri}"
+
+        return f"{base_api_url}{uri}?{json.dumps(params, sort_keys=True, default=str)}"
+
+
+    def ttl_for(self, uri: str) -> t.Optional[float]:
+        """
+            Returns the time-to-live for `uri` (the longest matching prefix wins), or `None` if it shouldn't be cached.
+        """
+
+        matching = [prefix for prefix in self.ttls if uri.startswith(prefix)]
+
+        if not matching:
+            return None
+
+        return self.ttls[max(matching, key=len)] or None
+
+
+    def ttl_for_response(self, uri: str, payload: t.Any, ttl: float) -> t.Optional[float]:
+        """
+            Returns the time-to-live of a response of `uri`, whose endpoint has a TTL of `ttl`, or `None` if it shouldn't be cached.
+            For `/streams/` responses, this is shortened to end before their stream URLs expire (see `stream_expiry_margin`).
+        """
+
+        if self.stream_expiry_margin is None or not uri.startswith('/streams/') or not isinstance(payload, dict):
+            return ttl
+
+        expiry = streams_expiry(payload)
+
+        if expiry is None:
+            return ttl
+
+        remaining = expiry - self.stream_expiry_margin - time.time()
+
+        return min(ttl, remaining) if remaining > 0 else None
+
+
+    def stale_ttl_for(self, uri: str) -> float:
+        """
+            Returns how long after expiring a response of `uri` may be served stale (the longest matching prefix of `stale_ttls` wins).
+        """
+
+        matching = [prefix for prefix in self.stale_ttls if uri.startswith(prefix)]
+
+        if not matching:
+            return 0.0
+
+        return self.stale_ttls[max(matching, key=len)] or 0.0
+
+
+    def lookup(self, key: str, stale_ttl: float=0.0) -> t.Optional[t.Tuple[t.Any, bool]]:
+        """
+            Returns `(payload, fresh)` for the entry cached under `key`, or `None` if it is missing or expired more than `stale_ttl` seconds ago.
+            `fresh` is `False` for expired entries, which should be refreshed.
+        """
+
+        entry = self.backend.get(key)
+        now = time.time()
+        usable = entry is not None and entry[0] + stale_ttl > now
+
+        # Fresh entries expire before their stream URLs do (see `ttl_for_response`), but stale ones may outlive them:
+        if usable and entry[0] <= now:
+            usable = self._streams_usable_until(entry[1]) > now
+
+        with self._lock:
+            if not usable:
+                self.stats.misses += 1
+                return None
+
+            fresh = entry[0] > now
+            self.stats.hits += 1
+            self.stats.stale += not fresh
+
+        return entry[1], fresh
+
+
+    def _streams_usable_until(self, payload: t.Any) -> float:
+        """
+            Returns until when the stream URLs of a `/streams/` payload can be handed out (infinity for other payloads).
+        """
+
+        if self.stream_expiry_margin is None or not isinstance(payload, dict):
+            return math.inf
+
+        expiry = streams_expiry(payload)
+
+        return expiry - self.stream_expiry_margin if expiry is not None else math.inf
+
+
+    def get(self, key: str) -> t.Optional[t.Any]:
+        """
+            Returns the payload cached under `key`, or `None` if it is missing or expired.
+        """
+
+        entry = self.lookup(key)
+
+        return entry[0] if entry is not None else None
+
+
+    def expires_at(self, key: str) -> t.Optional[float]:
+        """
+            Returns when the entry cached under `key` expires (UNIX timestamp), or `None` if there is no such entry.
+        """
+
+        return self.backend.expires_at(key)
+
+
+    def set(self, key: str, payload: t.Any, ttl: float) -> None:
+        """
+            Caches `payload` under `key` for `ttl` seconds.
+        """
+
+        self.backend.set(key, payload, time.time() + ttl)
+
+
+    def delete(self, key: str) -> None:
+        """
+            Removes the entry cached under `key` (if any).
+        """
+
+        self.backend.delete(key)
@@ -1,7 +1,25 @@
+import time
 import typing as t
 
-from requests import Session
-
+from datetime import datetime
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+
+from requests import Session, Response, ConnectionError, Timeout
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ChunkedEncodingError
+
+from .cache import ResponseCache
+from .instances import InstancePool
+from .retry import RetryPolicy, DEFAULT_RETRY_POLICY
+from .ratelimit import RateLimiter
+from .instrumentation import Hooks, Instrumentation, current as current_request
+from .refresh import Refresher
+from .decoders import Decoder, get_decoder
+from .projection import Projection
+from .streaming import StreamedPage
+from .singleflight import SingleFlight
+from .pagination import iter_pages, ChannelVideosCrawl, CommentTreeCrawl
 from .models import BasePipedModel
 from .models.comments import Comments
 from .models.videos import Video
@@ -9,9 +27,70 @@ from .models.channels import NextPageChannel, Channel
 
 
 _MDL = t.TypeVar('_MDL', bound=t.Type[BasePipedModel])
+_S = t.TypeVar('_S')
+
+_TRANSIENT_ERRORS = (ConnectionError, Timeout, ChunkedEncodingError)
+
+
+class APIError(Exception):
+    """
+        Raised when an API call fails
+    """
+
+    def __init__(self, message: str, status_code: t.Optional[int]=None, uri: t.Optional[str]=None, attempts: int=1) -> None:
+        """
+            ### Parameters:
+            - `message` - The error message
+            - `status_code` - The HTTP status code of the response, if the error was caused by one
+            - `uri` - The URI that was requested
+            - `attempts` - How many times the request was attempted (see `piped_api.retry.RetryPolicy`)
+        """
+
+        super().__init__(message)
+
+        self.status_code = status_code
+        self.uri = uri
+        self.attempts = attempts
+
+
+
+def _raise_for_error(json: t.Any, uri: t.Optional[str]=None) -> None:
+    """
+        Raises `APIError` if `json` is an error response of the API.
+    """
+
+    if isinstance(json, dict) and json.get('error', None) is not None:
+        raise APIError(f"Error: {json['error']}", uri=uri)
+
+
+
+def _error_for_response(uri: str, status_code: int, content: bytes, attempts: int, decode: Decoder) -> APIError:
+    """
+        Creates an `APIError` for an unsuccessful response. The body doesn't have to be JSON (e. g.: an error page of a proxy).
+    """
+
+    try:
+        json = decode(content)
+
+    except ValueError:
+        json = None
+
+    if isinstance(json, dict) and json.get('error', None) is not None:
+        message = f"Error: {json['error']}"
+
+    else:
+        message = f"HTTP {status_code}: {content[:200].decode('utf-8', 'replace').strip() or 'empty response'}"
+
+    return APIError(message, status_code, uri, attempts)
+
+
 
+def _with_params(kwargs: t.Dict[str, t.Any], **params: t.Any) -> t.Dict[str, t.Any]:
+    """
+        Returns a copy of `kwargs` with `params` added to its query parameters. The caller's `params` are neither replaced nor modified.
+    """
 
-class APIError(Exception): """Raised when an API call fails"""
+    return {**kwargs, 'params': {**(kwargs.get('params', None) or {}), **params}}
 
 
 
@@ -19,58 +98,424 @@ class PipedClient:
     """
         An API client for [Piped](https://piped.kavin.rocks).
 
+        A client is thread-safe: share one between all threads, so they share its connection pool, cache and coalesced requests.
+        Models returned by the client may share their JSON data with other threads (through the cache or coalescing),
+        so don't modify `BasePipedModel.data` in-place.
+
         See also [Piped API docs](https://piped-docs.kavin.rocks/docs)
     """
 
-    def __init__(self, base_api_url: str='https://pipedapi.kavin.rocks', session: t.Type[Session]=Session()) -> None:
+    def __init__(self, base_api_url: str='https://pipedapi.kavin.rocks', session: t.Optional[Session]=None, cache: t.Optional[ResponseCache]=None, coalesce_requests: bool=True, decoder: t.Union[str, Decoder]='auto', instances: t.Optional[InstancePool]=None, retry: t.Optional[RetryPolicy]=DEFAULT_RETRY_POLICY, rate_limiter: t.Optional[RateLimiter]=None, max_connections_per_host: int=32, timeout: t.Optional[t.Union[float, t.Tuple[float, float]]]=(5.0, 30.0), keep_alive: bool=True, hooks: t.Sequence[Hooks]=(), refresher: t.Optional[Refresher]=None, cache_namespace: t.Optional[str]=None) -> None:
         """
             ### Parameters:
             - `base_api_url` - The base URL to the instance's API. Trailing slashes will be stripped.
-            - `session` - A class/subclass of `requests.Session` to use for all requests.
-                For example, you could use [requests-cache](https://pypi.org/project/requests-cache/) to make all requests cacheable.
+            - `session` - A `requests.Session` (or a subclass) to use for all requests. If this is `None`, a new session is created (and owned) by this client,
+                with a connection pool of `max_connections_per_host`. For example, you could use [requests-cache](https://pypi.org/project/requests-cache/) to make all requests cacheable.
+            - `cache` - A `piped_api.cache.ResponseCache` to cache decoded responses in, with a separate time-to-live for each endpoint.
+                Expired responses within its `stale_ttls` are returned right away and refreshed in the background. If this is `None`, nothing is cached.
+            - `coalesce_requests` - Whether concurrent identical requests (same URI and query parameters) from multiple threads should share a single
+                round trip and decoded payload. The number of collapsed calls is available as `PipedClient.single_flight.collapsed`.
+            - `decoder` - The JSON decoder for response bodies - `'json'`, `'orjson'`, `'msgspec'` or a custom function, see `piped_api.decoders.get_decoder`.
+                By default, the fastest installed one is used.
+            - `instances` - A `piped_api.instances.InstancePool` of mirrors to spread requests over, failing over between them.
+                If this is set, `base_api_url` is only used to key cached responses, which are shared by all instances of the pool.
+            - `retry` - The `piped_api.retry.RetryPolicy` for failed requests (connection errors, timeouts, 429 and 5xx gateway errors).
+                By default, clients share the retry budget of `piped_api.retry.DEFAULT_RETRY_POLICY`. If this is `None`, requests are not retried.
+            - `rate_limiter` - A `piped_api.ratelimit.RateLimiter` to delay requests with, so that instances are not flooded (e. g.: by `PipedClient.get_videos`).
+                Each instance of `instances` is limited separately. If this is `None`, requests are not limited.
+            - `max_connections_per_host` - How many connections to each instance are kept open. Set this to at least the number of threads using the client,
+                otherwise connections are thrown away and opened again. Ignored if `session` is passed.
+            - `timeout` - The default timeout of requests in seconds, or a `(connect, read)` tuple. If this is `None`, requests never time out.
+            - `keep_alive` - Whether to reuse connections between requests. Ignored if `session` is passed.
+            - `hooks` - `piped_api.instrumentation.Hooks` to notify about each API call, with the time spent in each of its phases
+                (e. g.: a `piped_api.instrumentation.MetricsCollector`).
+            - `refresher` - The `piped_api.refresh.Refresher` that refreshes stale responses (and, optionally, the most requested ones before they expire)
+                of endpoints with a stale TTL in `cache`. If this is `None`, one with default settings is created (and owned) by this client.
+            - `cache_namespace` - What cached responses are keyed by instead of `base_api_url`, so that they survive switching the client
+                to another instance (e. g.: by `piped_api.prober.InstanceProber`). If this is `None`, the current `base_api_url` is used.
+
+            HTTP/2 is not supported by `requests` - use `piped_api.async_client.AsyncPipedClient` with `http2=True` for that.
         """
 
         self.base_api_url = base_api_url.strip("/")
-        self.session =  session
+        self.cache_namespace = cache_namespace
+        self.timeout = timeout
+
+        self._owns_session = session is None
+        self.session = session if session is not None else self._create_session(max_connections_per_host, keep_alive)
+        self.cache = cache
+        self.single_flight = SingleFlight() if coalesce_requests else None
+        self.decode = get_decoder(decoder)
+        self.instances = instances
+        self.retry = retry
+        self.rate_limiter = rate_limiter
+        self.hooks = list(hooks)
+
+        self._owns_refresher = refresher is None
+        self.refresher = refresher if refresher is not None else Refresher()
+
+
+
+    @staticmethod
+    def _create_session(max_connections_per_host: int, keep_alive: bool) -> Session:
+        session = Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=max_connections_per_host)
+
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+
+        if not keep_alive:
+            session.headers['Connection'] = 'close'
+
+        return session
+
+
+    def close(self) -> None:
+        """
+            Stops the `refresher` (waiting for pending refreshes) and closes the connections of the underlying `requests.Session`,
+            if they were created by this client.
+        """
 
+        if self._owns_refresher:
+            self.refresher.close()
 
+        if self._owns_session:
+            self.session.close()
 
-    def _get_json(self, uri: str, as_model: t.Optional[_MDL]=None, **kwargs) -> t.Union[_MDL, t.Dict[str, t.Any], t.List[t.Any]]:
+
+    def __enter__(self) -> 'PipedClient':
+        return self
+
+
+    def __exit__(self, *_: t.Any) -> None:
+        self.close()
+
+
+
+    def _send_once(self, uri: str, failover: t.Optional[t.Callable[[], bool]]=None, **kwargs) -> Response:
+        """
+            Sends a GET request for specific URI to the instance, or to the best instance of the pool (failing over to the others).
+            Before failing over, `failover` is asked whether another attempt may be made (see `InstancePool.call`).
+        """
+
+        kwargs.setdefault('timeout', self.timeout)
+
+        def queue(base_api_url: str) -> None:
+            delay = self.rate_limiter.acquire(base_api_url, uri)
+            info = current_request()
+
+            if info is not None:
+                info.add_timing('queue', delay)
+
+
+        def send(base_api_url: str) -> Response:
+            info = current_request()
+            start = time.perf_counter()
+            response = self.session.get(f"{base_api_url}{uri}", **kwargs)
+
+            # `Response.elapsed` is the time until the headers arrived (including connecting):
+            if info is not None:
+                ttfb = response.elapsed.total_seconds()
+                info.add_timing('ttfb', ttfb)
+                info.add_timing('download', max(time.perf_counter() - start - ttfb, 0.0))
+                info.status_code = response.status_code
+                info.attempts += 1
+
+            return response
+
+
+        before_send = queue if self.rate_limiter is not None else None
+
+        if self.instances is None:
+            if before_send is not None:
+                before_send(self.base_api_url)
+
+            return send(self.base_api_url)
+
+        # The pool waits for the rate limiter before it starts timing the request, so queueing doesn't count as latency of the instance:
+        return self.instances.call(send, _TRANSIENT_ERRORS, before_send, failover)
+
+
+    def _send(self, uri: str, **kwargs) -> Response:
+        """
+            Sends a GET request for specific URI, retrying it according to `PipedClient.retry`.
+            Raises `APIError` if the final response is not successful.
+        """
+
+        if self.retry is not None:
+            self.retry.record_request()
+
+        attempt = 0
+
+        # Fail-overs to other instances of the pool are attempts too, so they are limited by the policy (and its budget) as well:
+        def failover() -> bool:
+            nonlocal attempt
+
+            if self.retry is not None and not self.retry.allow_failover(attempt):
+                return False
+
+            attempt += 1
+            return True
+
+
+        while True:
+            attempt += 1
+
+            try:
+                response = self._send_once(uri, failover, **kwargs)
+
+            except _TRANSIENT_ERRORS:
+                delay = self.retry.delay(attempt) if self.retry is not None else None
+
+                if delay is None:
+                    raise
+
+                self._backoff(delay)
+                continue
+
+            if response.status_code < 400:
+                return response
+
+            delay = self.retry.delay(attempt, response.status_code, response.headers.get('Retry-After', None)) if self.retry is not None else None
+
+            if delay is None:
+                with response:
+                    raise _error_for_response(uri, response.status_code, response.content, attempt, self.decode)
+
+            response.close()
+            self._backoff(delay)
+
+
+    def _backoff(self, delay: float) -> None:
+        """
+            Waits `delay` seconds before retrying a request.
+        """
+
+        info = current_request()
+
+        if info is not None:
+            info.add_timing('backoff', delay)
+
+        time.sleep(delay)
+
+
+    def _request(self, uri: str, **kwargs) -> bytes:
+        """
+            Requests the raw response body of specific URI from the instance.
+        """
+
+        content = self._send(uri, **kwargs).content
+        info = current_request()
+
+        if info is not None:
+            info.response_bytes += len(content)
+
+        return content
+
+
+    def _stream(self, uri: str, chunk_size: int, **kwargs) -> t.Iterator[bytes]:
+        """
+            Requests specific URI from the instance and yields the response body in chunks, as it is being received.
+        """
+
+        with self._send(uri, stream=True, **kwargs) as response:
+            yield from response.iter_content(chunk_size)
+
+
+    def _fetch_json(self, uri: str, cache_key: str, ttl: t.Optional[float], **kwargs) -> t.Union[t.Dict[str, t.Any], t.List[t.Any]]:
+        """
+            Requests JSON data from the instance (bypassing the cache) and caches it for `ttl` seconds, if `ttl` is not `None`.
+        """
+
+        content = self._request(uri, **kwargs)
+        start = time.perf_counter()
+        json: t.Union[dict, list] = self.decode(content)
+        info = current_request()
+
+        if info is not None:
+            info.add_timing('decode', time.perf_counter() - start)
+
+        _raise_for_error(json, uri)
+        if ttl is not None:
+            ttl = self.cache.ttl_for_response(uri, json, ttl)
+
+            # Don't keep serving a stale response in place of one that can't be cached (e. g.: a video whose stream URLs expire too soon):
+            if ttl is None:
+                self.cache.delete(cache_key)
+
+            else:
+                self.cache.set(cache_key, json, ttl)
+
+        return json
+
+
+    def _get_json(self, uri: str, as_model: t.Optional[_MDL]=None, projection: t.Optional[Projection]=None, **kwargs) -> t.Union[_MDL, t.Dict[str, t.Any], t.List[t.Any]]:
         """
             Obtains JSON data from specific URI of the Piped API.
 
             ### Parameters:
             - `uri` - The URI to get JSON data from
             - `as_model` - The `BasePipedModel` to load the JSON data into. If this is `None`, the JSON data is returned as a `dict`.
+            - `projection` - Which keys of the JSON data to keep. If this is `None`, everything is kept.
             - `**kwargs` - Additional keyword arguments to pass to `requests.Session.get`
         """
 
-        json: t.Union[dict, list] = self.session.get(f"{self.base_api_url}{uri}", **kwargs).json()
+        with Instrumentation(self.hooks, uri, kwargs.get('params', None)) if self.hooks else nullcontext() as info:
+            cache_key = ResponseCache.make_key(self.cache_namespace or self.base_api_url, uri, kwargs.get('params', None))
+            ttl = self.cache.ttl_for(uri) if self.cache is not None else None
 
-        if isinstance(json, dict) and json.get('error', None) is not None:
-            raise APIError(f"Error: {json['error']}")
+            # Without a cache, only the projected keys are decoded. Cached responses are kept whole and projected afterwards:
+            if projection is not None and ttl is None and projection.decoding_type() is not None:
+                json = self._get_struct(uri, projection.decoding_type(), **kwargs)
+                _raise_for_error(json, uri)
 
-        if as_model is not None:
-            return as_model(json)
+            else:
+                fetch_json = lambda: self._fetch_json(uri, cache_key, ttl, **kwargs)
+                fetch = (lambda: self.single_flight.do(cache_key, fetch_json)) if self.single_flight is not None else fetch_json
 
-        return json
+                stale_ttl = self.cache.stale_ttl_for(uri) if ttl is not None else 0.0
+                cached = self.cache.lookup(cache_key, stale_ttl) if ttl is not None else None
+                json: t.Union[dict, list, None] = cached[0] if cached is not None else None
+
+                if info is not None:
+                    info.cache_hit = cached is not None
+
+                if stale_ttl:
+                    self.refresher.track(cache_key, fetch, lambda: self.cache.expires_at(cache_key), ttl)
 
+                    if cached is not None and not cached[1]:
+                        self.refresher.submit(cache_key, fetch)
 
-    def get_video(self, video_id: str, **kwargs) -> Video:
+                if json is None:
+                    json = fetch()
+
+                if projection is not None:
+                    json = projection.apply(json)
+
+            if as_model is None:
+                return json
+
+            start = time.perf_counter()
+            model = as_model(json)
+
+            if info is not None:
+                info.add_timing('model', time.perf_counter() - start)
+
+            return model
+
+
+    def _fetch_struct(self, uri: str, struct: t.Type[_S], **kwargs) -> _S:
+        """
+            Requests data from the instance and decodes it into a `msgspec` type (e. g.: a `piped_api.schema` struct).
+        """
+
+        from . import schema
+
+        content = self._request(uri, **kwargs)
+        start = time.perf_counter()
+
+        try:
+            return schema.decode(content, struct)
+
+        except schema.ValidationError:
+            _raise_for_error(self.decode(content), uri)
+            raise
+
+        finally:
+            info = current_request()
+
+            if info is not None:
+                info.add_timing('decode', time.perf_counter() - start)
+
+
+    def _get_struct(self, uri: str, struct: t.Type[_S], **kwargs) -> _S:
+        """
+            Obtains data from specific URI of the Piped API, decoded into a `msgspec` type (e. g.: a `piped_api.schema` struct) in a single pass.
+
+            Structs are not cached, but concurrent identical requests are still coalesced.
+
+            ### Parameters:
+            - `uri` - The URI to get data from
+            - `struct` - The type to decode the data into
+            - `**kwargs` - Additional keyword arguments to pass to `requests.Session.get`
+        """
+
+        key = f"{ResponseCache.make_key(self.cache_namespace or self.base_api_url, uri, kwargs.get('params', None))}#{struct!r}"
+        fetch = lambda: self._fetch_struct(uri, struct, **kwargs)
+
+        return self.single_flight.do(key, fetch) if self.single_flight is not None else fetch()
+
+
+    def get_video(self, video_id: str, fields: t.Optional[t.Iterable[str]]=None, **kwargs) -> Video:
         """
             Gets information about a specific video.
 
             ### Parameters:
             - `video_id` - The ID of the video to get information for
+            - `fields` - Only keep these keys of the video (as returned by the API, e. g.: `'uploadDate'`). If this is `None`, everything is kept.
+                See `piped_api.projection.Projection`.
             - `**kwargs` - Additional keyword arguments to pass to `requests.Session.get`
 
             [Piped Documentation](https://piped-docs.kavin.rocks/docs/api-documentation/#streamsvideoid)
         """
 
-        return self._get_json(f"/streams/{video_id}", Video, **kwargs)
+        return self._get_json(f"/streams/{video_id}", Video, Projection.of(fields), **kwargs)
 
 
-    def get_comments(self, video_id: str, nextpage: t.Optional[t.Dict[str, t.Optional[str]]]=None, **kwargs) -> Comments:
+    def get_video_struct(self, video_id: str, struct: t.Optional[t.Type[_S]]=None, **kwargs) -> _S:
+        """
+            Gets information about a specific video as a typed struct, decoded and validated in a single pass (requires `msgspec`).
+
+            This is faster than `PipedClient.get_video` when you access most fields, and raises `piped_api.schema.ValidationError` if the
+            response doesn't match the schema. See `piped_api.schema`.
+
+            ### Parameters:
+            - `video_id` - The ID of the video to get information for
+            - `struct` - The struct to decode the response into. If this is `None`, `piped_api.schema.Video` is used.
+                Pass your own struct with fewer fields to skip decoding the rest.
+            - `**kwargs` - Additional keyword arguments to pass to `requests.Session.get`
+        """
+
+        if struct is None:
+            from .schema import Video as struct
+
+        return self._get_struct(f"/streams/{video_id}", struct, **kwargs)
+
+
+    def get_videos(self, video_ids: t.Iterable[str], max_concurrency: int=8, **kwargs) -> t.Iterator[t.Tuple[str, t.Union[Video, Exception]]]:
+        """
+            Gets information about many videos at once, using a pool of `max_concurrency` threads.
+
+            Yields `(video_id, result)` tuples in the order the requests finish. `result` is either the `Video`, or the exception
+            raised while fetching it - a failing ID doesn't abort the rest of the batch. Repeated IDs are only fetched (and yielded) once.
+
+            ### Parameters:
+            - `video_ids` - The IDs of the videos to get information for
+            - `max_concurrency` - The maximum number of requests in flight at once
+            - `**kwargs` - Additional keyword arguments to pass to `requests.Session.get`
+        """
+
+        def fetch(video_id: str) -> t.Union[Video, Exception]:
+            try:
+                return self.get_video(video_id, **kwargs)
+
+            except Exception as error:
+                return error
+
+
+        executor = ThreadPoolExecutor(max_workers=max_concurrency)
+
+        try:
+            futures = {executor.submit(fetch, video_id): video_id for video_id in dict.fromkeys(video_ids)}
+
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+    def get_comments(self, video_id: str, nextpage: t.Optional[t.Dict[str, t.Optional[str]]]=None, fields: t.Optional[t.Iterable[str]]=None, **kwargs) -> Comments:
         """
             Gets a list of comments for a specific video.
 
@@ -78,19 +523,112 @@ class PipedClient:
             - `video_id` - The ID of the video to get comments for
             - `nextpage` - Nextpage data, obtained from `.models.comments.Comments.nextpage` property. If this is `None`, the first page of comments is returned.
                 There are often 20 comments per page.
+            - `fields` - Only keep these keys of each comment (as returned by the API, e. g.: `'commentText'`). If this is `None`, everything is kept.
             - `**kwargs` - Additional keyword arguments to pass to `requests.Session.get`
 
             [Piped Documentation](https://piped-docs.kavin.rocks/docs/api-documentation/#commentsvideoid)
         """
 
+        projection = Projection.of(fields, keep={'nextpage', 'disabled'}, items_key='comments')
+
+        if nextpage is not None:
+            kwargs = _with_params(kwargs, nextpage=nextpage)
+            return self._get_json(f"/nextpage/comments/{video_id}", Comments, projection, **kwargs)
+
+        return self._get_json(f"/comments/{video_id}", Comments, projection, **kwargs)
+
+
+    def stream_comments(self, video_id: str, nextpage: t.Optional[str]=None, chunk_size: int=16 * 1024, **kwargs) -> StreamedPage[Comments.Comment]:
+        """
+            Like `PipedClient.get_comments`, but the comments are parsed and yielded one by one while the page is still being downloaded,
+            so the first comment arrives sooner and only one comment at a time is held in memory. Responses are not cached.
+
+            ```python
+            page = client.stream_comments(video_id)
+
+            for comment in page:
+                ...
+
+            nextpage = page.nextpage
+            ```
+
+            ### Parameters:
+            - `video_id` - The ID of the video to get comments for
+            - `nextpage` - Nextpage data, obtained from `StreamedPage.nextpage`. If this is `None`, the first page of comments is returned.
+            - `chunk_size` - The size of the chunks (in bytes) to read the response in
+            - `**kwargs` - Additional keyword arguments to pass to `requests.Session.get`
+        """
+
+        uri = f"/comments/{video_id}"
+
         if nextpage is not None:
-            kwargs.update({'params': {'nextpage': nextpage}})
-            return self._get_json(f"/nextpage/comments/{video_id}", Comments, **kwargs)
+            kwargs = _with_params(kwargs, nextpage=nextpage)
+            uri = f"/nextpage/comments/{video_id}"
+
+        return StreamedPage(self._stream(uri, chunk_size, **kwargs), 'comments', Comments.Comment, Comments, self.decode, _raise_for_error)
+
+
+    def iter_comments(self, video_id: str, max_pages: t.Optional[int]=None, prefetch: int=1, **kwargs) -> t.Iterator[Comments.Comment]:
+        """
+            Lazily iterates over the comments of a specific video, across all pages.
+
+            While you process a page of comments, the next one is already being downloaded in the background.
+            Only the pages being processed or prefetched are kept in memory.
 
-        return self._get_json(f"/comments/{video_id}", Comments, **kwargs)
+            ### Parameters:
+            - `video_id` - The ID of the video to get comments for
+            - `max_pages` - The maximum number of pages to fetch. If this is `None`, all comments are fetched.
+            - `prefetch` - The number of pages to download ahead. If this is `0`, pages are downloaded only when they are needed.
+            - `**kwargs` - Additional keyword arguments to pass to `requests.Session.get`
+        """
 
+        pages = iter_pages(lambda nextpage: self.get_comments(video_id, nextpage=nextpage, **kwargs), lambda comments: comments.nextpage, max_pages, prefetch)
 
-    def get_trending(self, country_code: str='US', **kwargs) -> t.List[Video.RelatedStream]:
+        for comments in pages:
+            yield from comments
+
+
+    def iter_comment_tree(self, video_id: str, max_depth: t.Optional[int]=None, max_comments: t.Optional[int]=None, max_concurrency: int=4, **kwargs) -> t.Iterator[t.Tuple[t.Optional[str], Comments.Comment]]:
+        """
+            Lazily crawls the full comment tree of a specific video - top-level comments, their replies (`Comments.Comment.replies_page`),
+            and all of their pages.
+
+            Yields `(parent_id, comment)` tuples, where `parent_id` is the ID of the comment being replied to (`None` for top-level comments).
+            Pages are downloaded by a pool of `max_concurrency` threads; only the nextpage tokens of threads that weren't expanded yet are kept in memory.
+
+            ### Parameters:
+            - `video_id` - The ID of the video to crawl comments of
+            - `max_depth` - How deep to follow replies (`0` means top-level comments only). If this is `None`, all replies are followed.
+            - `max_comments` - The maximum number of comments to yield. If this is `None`, the whole tree is crawled.
+            - `max_concurrency` - The maximum number of pages being downloaded at once
+            - `**kwargs` - Additional keyword arguments to pass to `requests.Session.get`
+        """
+
+        crawl = CommentTreeCrawl(max_depth, max_comments)
+        running: t.Dict[t.Any, t.Tuple[t.Optional[str], int]] = {}
+
+        executor = ThreadPoolExecutor(max_workers=max_concurrency)
+
+        try:
+            while crawl.pending or running:
+                while crawl.pending and len(running) < max_concurrency:
+                    parent_id, depth, nextpage = crawl.pending.popleft()
+                    running[executor.submit(self.get_comments, video_id, nextpage=nextpage, **kwargs)] = (parent_id, depth)
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    parent_id, depth = running.pop(future)
+                    yield from crawl.expand(parent_id, depth, future.result())
+
+                    if crawl.finished:
+                        return
+
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+    def get_trending(self, country_code: str='US', fields: t.Optional[t.Iterable[str]]=None, **kwargs) -> t.List[Video.RelatedStream]:
         """
             Obtains trending videos for a specific country. If there are no trending videos (or `country_code` is invalid),
             an empty list is returned.
@@ -98,47 +636,99 @@ class PipedClient:
             ### Parameters:
             - `country_code` - The country code ([ISO 3166-1 alpha-2](https://en.wikipedia.org/wiki/ISO_3166-1_alpha-2#Officially_assigned_code_elements)) to get trending videos for. This is automatically capitalized by this package,
                 since Piped for some reason doesn't accept lowercase country codes. Note: countries such as China or North Korea don't have trending videos, so they will always return an empty list.
+            - `fields` - Only keep these keys of each video (as returned by the API, e. g.: `'uploaderName'`), to save memory and CPU.
+                If this is `None`, everything is kept. See `piped_api.projection.Projection`.
             - `**kwargs` - Additional keyword arguments to pass to `requests.Session.get`
 
             [Piped Documentation](https://piped-docs.kavin.rocks/docs/api-documentation/#trending)
         """
 
-        kwargs.update({'params': {'region': country_code.upper()}})
+        kwargs = _with_params(kwargs, region=country_code.upper())
 
-        return [Video.RelatedStream(trending_video) for trending_video in self._get_json(f"/trending", **kwargs)]
+        return [Video.RelatedStream(trending_video) for trending_video in self._get_json(f"/trending", projection=Projection.of(fields, many=True), **kwargs)]
 
 
-    def get_channel_by_id(self, channel_id: str, nextpage: t.Optional[t.Dict[str, t.Optional[str]]]=None, **kwargs) -> t.Union[NextPageChannel, Channel]:
+    def get_channel_by_id(self, channel_id: str, nextpage: t.Optional[t.Dict[str, t.Optional[str]]]=None, fields: t.Optional[t.Iterable[str]]=None, **kwargs) -> t.Union[NextPageChannel, Channel]:
         """
             Gets information about a specific channel by its ID.
 
             ### Parameters:
             - `channel_id` - The ID of the channel to get information for
+            - `nextpage` - Nextpage data, obtained from `.models.channels.NextPageChannel.nextpage` property. If this is `None`, the first page is returned.
+            - `fields` - Only keep these keys of the channel and of each uploaded video (as returned by the API, e. g.: `'uploaded'`). If this is `None`, everything is kept.
             - `**kwargs` - Additional keyword arguments to pass to `requests.Session.get`
 
             [Piped Documentation](https://piped-docs.kavin.rocks/docs/api-documentation/#channelchannelid)
         """
 
+        projection = Projection.of(fields, keep={'nextpage'}, items_key='relatedStreams')
+
         if nextpage is not None:
-            kwargs.update({'params': {'nextpage': nextpage}})
-            return self._get_json(f"/nextpage/channel/{channel_id}", NextPageChannel, **kwargs)
+            kwargs = _with_params(kwargs, nextpage=nextpage)
+            return self._get_json(f"/nextpage/channel/{channel_id}", NextPageChannel, projection, **kwargs)
+
+        return self._get_json(f"/channel/{channel_id}", Channel, projection, **kwargs)
+
+
+    def stream_channel_videos(self, channel_id: str, nextpage: t.Optional[str]=None, chunk_size: int=16 * 1024, **kwargs) -> StreamedPage[Video.RelatedStream]:
+        """
+            Like `PipedClient.get_channel_by_id`, but the uploaded videos are parsed and yielded one by one while the page is still being downloaded.
+            The rest of the page (`StreamedPage.rest`) is a `Channel` (or `NextPageChannel`) with an empty list of videos. See `PipedClient.stream_comments`.
+
+            ### Parameters:
+            - `channel_id` - The ID of the channel to get videos of
+            - `nextpage` - Nextpage data, obtained from `StreamedPage.nextpage`. If this is `None`, the first page is returned.
+            - `chunk_size` - The size of the chunks (in bytes) to read the response in
+            - `**kwargs` - Additional keyword arguments to pass to `requests.Session.get`
+        """
+
+        uri, rest_model = f"/channel/{channel_id}", Channel
+
+        if nextpage is not None:
+            kwargs = _with_params(kwargs, nextpage=nextpage)
+            uri, rest_model = f"/nextpage/channel/{channel_id}", NextPageChannel
+
+        return StreamedPage(self._stream(uri, chunk_size, **kwargs), 'relatedStreams', Video.RelatedStream, rest_model, self.decode, _raise_for_error)
+
+
+    def iter_channel_videos(self, channel_id: str, since: t.Optional[datetime]=None, limit: t.Optional[int]=None, prefetch: int=1, **kwargs) -> t.Iterator[Video.RelatedStream]:
+        """
+            Lazily iterates over the uploaded videos of a specific channel (newest first), across all pages.
+
+            Pages stop being downloaded as soon as a video uploaded before `since` is encountered, so incremental syncs only fetch
+            the pages they need. While you process a page, the next one is already being downloaded in the background.
+
+            ### Parameters:
+            - `channel_id` - The ID of the channel to get videos of
+            - `since` - Only yield videos uploaded at or after this time (naive times are local). If this is `None`, all videos are yielded.
+            - `limit` - The maximum number of videos to yield. If this is `None`, there is no limit.
+            - `prefetch` - The number of pages to download ahead. If this is `0`, pages are downloaded only when they are needed.
+            - `**kwargs` - Additional keyword arguments to pass to `requests.Session.get`
+        """
+
+        crawl = ChannelVideosCrawl(since, limit)
+
+        for channel in iter_pages(lambda nextpage: self.get_channel_by_id(channel_id, nextpage=nextpage, **kwargs), crawl.next_page, prefetch=prefetch):
+            yield from crawl.videos(channel)
 
-        return self._get_json(f"/channel/{channel_id}", Channel, **kwargs)
+            if crawl.finished:
+                return
 
 
 
-    def get_channel_by_name(self, channel_name: str, **kwargs) -> Channel:
+    def get_channel_by_name(self, channel_name: str, fields: t.Optional[t.Iterable[str]]=None, **kwargs) -> Channel:
         """
             Gets information about a specific channel by its name.
 
             ### Parameters:
             - `channel_name` - The name of the channel to get information for
+            - `fields` - Only keep these keys of the channel and of each uploaded video (as returned by the API). If this is `None`, everything is kept.
             - `**kwargs` - Additional keyword arguments to pass to `requests.Session.get`
 
             [Piped Documentation](https://piped-docs.kavin.rocks/docs/api-documentation/#cname)
         """
 
-        return self._get_json(f"/c/{channel_name}", Channel, **kwargs)
+        return self._get_json(f"/c/{channel_name}", Channel, Projection.of(fields, keep={'nextpage'}, items_key='relatedStreams'), **kwargs)
 
 
     def get_search_suggestions(self, search_query: str, **kwargs) -> t.List[str]:
@@ -152,6 +742,6 @@ class PipedClient:
             [Piped Documentation](https://piped-docs.kavin.rocks/docs/api-documentation/#suggestions)
         """
 
-        kwargs.update({'params': {'query': search_query}})
+        kwargs = _with_params(kwargs, query=search_query)
 
         return self._get_json(f"/suggestions", **kwargs)
@@ -0,0 +1,62 @@
+import typing as t
+
+import json
+
+try:
+    import orjson
+
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+
+except ImportError:
+    msgspec = None
+
+
+Decoder = t.Callable[[bytes], t.Any]
+"""A function decoding a raw (`bytes`) JSON response body. Invalid JSON must raise a `ValueError`."""
+
+
+
+def stdlib_decoder(content: bytes) -> t.Any:
+    """
+        Decodes JSON with the standard library `json` module.
+    """
+
+    return json.loads(content)
+
+
+
+DECODERS: t.Dict[str, Decoder] = {'json': stdlib_decoder}
+"""Available decoders by name. `'orjson'` and `'msgspec'` are only present if the package is installed."""
+
+if orjson is not None:
+    DECODERS['orjson'] = orjson.loads
+
+if msgspec is not None:
+    DECODERS['msgspec'] = msgspec.json.Decoder().decode
+
+
+
+def get_decoder(decoder: t.Union[str, Decoder]='auto') -> Decoder:
+    """
+        Resolves a decoder.
+
+        ### Parameters:
+        - `decoder` - Either a name from `DECODERS`, `'auto'` (the fastest installed one: `orjson`, then `msgspec`, then `json`),
+            or a custom `Decoder` function, which is returned as-is.
+    """
+
+    if callable(decoder):
+        return decoder
+
+    if decoder == 'auto':
+        return DECODERS.get('orjson', None) or DECODERS.get('msgspec', None) or stdlib_decoder
+
+    try:
+        return DECODERS[decoder]
+
+    except KeyError:
+        raise ValueError(f"Unknown JSON decoder: {decoder!r} (available: {', '.join(DECODERS)})") from None
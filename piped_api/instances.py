@@ -0,0 +1,290 @@
+import typing as t
+
+import time
+import random
+import threading
+
+from dataclasses import dataclass, replace
+
+
+TRANSIENT_STATUS_CODES = frozenset({429, 502, 503, 504})
+"""HTTP status codes which mean that the instance (not the request) is at fault, so the request can be retried elsewhere"""
+
+_R = t.TypeVar('_R')
+
+
+
+@dataclass
+class InstanceStats:
+    """
+        Health and performance statistics of a single instance in an `InstancePool`.
+    """
+
+    url: str
+    """The base API URL of the instance"""
+
+    latency: t.Optional[float] = None
+    """Exponentially weighted moving average of response times (in seconds). `None` until the first response."""
+
+    error_rate: float = 0.0
+    """Exponentially weighted moving average of failures (`0.0` - `1.0`)"""
+
+    in_flight: int = 0
+    """The number of requests currently waiting for a response"""
+
+    successes: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+
+    ejections: int = 0
+    """How many times the instance was ejected from the pool, because it kept failing"""
+
+    ejected_until: float = 0.0
+    """`time.monotonic()` until which the instance is ejected"""
+
+
+    @property
+    def healthy(self) -> bool:
+        """
+            Whether the instance is currently not ejected
+        """
+
+        return self.ejected_until <= time.monotonic()
+
+
+    def score(self) -> float:
+        """
+            Lower is better. Instances without a measured latency score `0` so they get tried.
+        """
+
+        return (self.latency or 0.0) * (self.in_flight + 1) * (1.0 + 10.0 * self.error_rate)
+
+
+
+class InstancePool:
+    """
+        A pool of Piped instances (mirrors) to spread requests over.
+
+        Each request goes to the better of two randomly picked healthy instances ("power of two choices"), judged by their
+        latency, error rate and number of requests in flight. Instances failing repeatedly are ejected for an exponentially
+        growing period of time, and failed requests are retried on another instance.
+
+        ```python
+        client = PipedClient(instances=InstancePool(['https://pipedapi.kavin.rocks', 'https://pipedapi.tokhmi.xyz']))
+        ```
+
+        Only connection errors, timeouts and responses with `TRANSIENT_STATUS_CODES` count as failures.
+    """
+
+    def __init__(self, urls: t.Iterable[str], max_attempts: int=3, eject_after: int=3, ejection_time: float=5.0, max_ejection_time: float=300.0, smoothing: float=0.3) -> None:
+        """
+            ### Parameters:
+            - `urls` - The base API URLs of the instances. Trailing slashes will be stripped.
+            - `max_attempts` - The maximum number of instances to try for a single request
+            - `eject_after` - The number of consecutive failures after which an instance is ejected
+            - `ejection_time` - For how long (in seconds) an instance is ejected the first time. This doubles with each following ejection.
+            - `max_ejection_time` - The maximum time (in seconds) an instance can be ejected for
+            - `smoothing` - The weight of the newest sample in the latency and error rate averages
+        """
+
+        self.instances = {url.strip("/"): InstanceStats(url.strip("/")) for url in urls}
+
+        if not self.instances:
+            raise ValueError("An InstancePool needs at least one instance")
+
+        self.max_attempts = max_attempts
+        self.eject_after = eject_after
+        self.ejection_time = ejection_time
+        self.max_ejection_time = max_ejection_time
+        self.smoothing = smoothing
+
+        self._lock = threading.Lock()
+
+
+    @property
+    def urls(self) -> t.List[str]:
+        """
+            The base API URLs of all instances in the pool
+        """
+
+        return list(self.instances)
+
+
+    def stats(self) -> t.Dict[str, InstanceStats]:
+        """
+            Returns a snapshot of the statistics of each instance, by URL
+        """
+
+        with self._lock:
+            return {url: replace(instance) for url, instance in self.instances.items()}
+
+
+    def choose(self, exclude: t.Collection[str]=()) -> str:
+        """
+            Picks an instance for the next request and marks the request as in flight.
+
+            ### Parameters:
+            - `exclude` - URLs of instances not to pick (e. g.: those that already failed this request), unless there is no other choice
+        """
+
+        with self._lock:
+            chosen = self._pick(exclude)
+            chosen.in_flight += 1
+            return chosen.url
+
+
+    def _pick(self, exclude: t.Collection[str]) -> InstanceStats:
+        candidates = [instance for url, instance in self.instances.items() if url not in exclude] or list(self.instances.values())
+        healthy = [instance for instance in candidates if instance.healthy]
+
+        if not healthy:
+            return min(candidates, key=lambda instance: instance.ejected_until)
+
+        if len(healthy) == 1:
+            return healthy[0]
+
+        return min(random.sample(healthy, 2), key=InstanceStats.score)
+
+
+    def _choose(self, exclude: t.Collection[str], before_send: t.Optional[t.Callable[[str], t.Any]]) -> t.Tuple[str, float]:
+        if before_send is None:
+            return self.choose(exclude), time.perf_counter()
+
+        with self._lock:
+            url = self._pick(exclude).url
+
+        before_send(url)
+
+        with self._lock:
+            self.instances[url].in_flight += 1
+
+        return url, time.perf_counter()
+
+
+    async def _achoose(self, exclude: t.Collection[str], before_send: t.Optional[t.Callable[[str], t.Awaitable[t.Any]]]) -> t.Tuple[str, float]:
+        if before_send is None:
+            return self.choose(exclude), time.perf_counter()
+
+        with self._lock:
+            url = self._pick(exclude).url
+
+        await before_send(url)
+
+        with self._lock:
+            self.instances[url].in_flight += 1
+
+        return url, time.perf_counter()
+
+
+    def _may_fail_over(self, tried: t.List[str], failover: t.Optional[t.Callable[[], bool]]) -> bool:
+        return len(tried) < self.max_attempts and (failover is None or failover())
+
+
+    def _release(self, url: str) -> None:
+        with self._lock:
+            self.instances[url].in_flight -= 1
+
+
+    def report(self, url: str, latency: float, failed: bool) -> None:
+        """
+            Records the outcome of a request chosen by `InstancePool.choose`.
+        """
+
+        with self._lock:
+            instance = self.instances[url]
+            instance.in_flight -= 1
+            instance.error_rate += self.smoothing * (float(failed) - instance.error_rate)
+
+            if failed:
+                instance.failures += 1
+                instance.consecutive_failures += 1
+
+                if instance.consecutive_failures >= self.eject_after:
+                    instance.ejected_until = time.monotonic() + min(self.ejection_time * 2 ** instance.ejections, self.max_ejection_time)
+                    instance.ejections += 1
+                    instance.consecutive_failures = 0
+
+                return
+
+            instance.successes += 1
+            instance.consecutive_failures = 0
+            instance.latency = latency if instance.latency is None else instance.latency + self.smoothing * (latency - instance.latency)
+
+
+    def call(self, send: t.Callable[[str], _R], transient_errors: t.Tuple[t.Type[BaseException], ...], before_send: t.Optional[t.Callable[[str], t.Any]]=None, failover: t.Optional[t.Callable[[], bool]]=None) -> _R:
+        """
+            Sends a request to the best instance, retrying it on other instances if it fails.
+
+            ### Parameters:
+            - `send` - Sends the request to the given base URL and returns the response (anything with a `status_code` and a `close()` method).
+                Responses of failed requests are closed before retrying.
+            - `transient_errors` - Exceptions raised by `send` that count as a failure of the instance
+            - `before_send` - Called with the chosen base URL before each attempt (e. g.: to wait for a rate limiter).
+                The time it takes is neither counted as latency of the instance, nor is the request in flight meanwhile.
+            - `failover` - Called before retrying a failed request on another instance. If it returns `False`, the failure is returned
+                (or raised) instead. The clients use this to count fail-overs as attempts of their `piped_api.retry.RetryPolicy`.
+        """
+
+        tried: t.List[str] = []
+
+        while True:
+            url, start = self._choose(tried, before_send)
+            tried.append(url)
+
+            try:
+                response = send(url)
+
+            except transient_errors:
+                self.report(url, time.perf_counter() - start, failed=True)
+
+                if not self._may_fail_over(tried, failover):
+                    raise
+
+                continue
+
+            except BaseException:
+                self._release(url)
+                raise
+
+            failed = response.status_code in TRANSIENT_STATUS_CODES
+            self.report(url, time.perf_counter() - start, failed)
+
+            if not failed or not self._may_fail_over(tried, failover):
+                return response
+
+            response.close()
+
+
+    async def acall(self, send: t.Callable[[str], t.Awaitable[_R]], transient_errors: t.Tuple[t.Type[BaseException], ...], before_send: t.Optional[t.Callable[[str], t.Awaitable[t.Any]]]=None, failover: t.Optional[t.Callable[[], bool]]=None) -> _R:
+        """
+            Async version of `InstancePool.call`. Responses of failed requests are closed with `aclose()`, and `before_send` is awaited.
+        """
+
+        tried: t.List[str] = []
+
+        while True:
+            url, start = await self._achoose(tried, before_send)
+            tried.append(url)
+
+            try:
+                response = await send(url)
+
+            except transient_errors:
+                self.report(url, time.perf_counter() - start, failed=True)
+
+                if not self._may_fail_over(tried, failover):
+                    raise
+
+                continue
+
+            except BaseException:
+                self._release(url)
+                raise
+
+            failed = response.status_code in TRANSIENT_STATUS_CODES
+            self.report(url, time.perf_counter() - start, failed)
+
+            if not failed or not self._may_fail_over(tried, failover):
+                return response
+
+            await response.aclose()
@@ -0,0 +1,445 @@
+"""
+    Hooks into each API call of the clients (`piped_api.client.PipedClient._get_json`), to see where time goes.
+
+    Every call is described by a `RequestInfo`, which collects the time spent in each phase:
+
+    - `queue` - Waiting for the rate limiter (`piped_api.ratelimit.RateLimiter`)
+    - `connect` - Opening a new connection, including DNS resolution and the TLS handshake (`AsyncPipedClient` only, as `requests` doesn't expose it)
+    - `ttfb` - From sending the request until the response headers arrived (time to first byte). Includes `connect` for `PipedClient`.
+    - `download` - Receiving the response body
+    - `backoff` - Waiting before retrying a failed request (`piped_api.retry.RetryPolicy`)
+    - `decode` - Decoding the JSON data
+    - `model` - Loading the data into models
+
+    Pass `Hooks` to a client to be notified about calls, e. g. a `MetricsCollector` or `OpenTelemetryHooks`:
+
+    ```python
+    metrics = MetricsCollector()
+    client = PipedClient(hooks=[metrics])
+    ...
+    print(metrics.to_prometheus())
+    ```
+"""
+
+import typing as t
+
+import time
+import threading
+
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+try:
+    from opentelemetry import trace as otel_trace
+
+except ImportError:
+    otel_trace = None
+
+
+ENDPOINTS = ('/streams/', '/nextpage/comments/', '/comments/', '/nextpage/channel/', '/channel/', '/c/', '/trending', '/suggestions')
+"""URI prefixes of the API endpoints, which calls are grouped by"""
+
+PHASES = ('queue', 'connect', 'ttfb', 'download', 'backoff', 'decode', 'model')
+
+
+
+def endpoint_of(uri: str) -> str:
+    """
+        Returns the endpoint (one of `ENDPOINTS`) `uri` belongs to, or `uri` itself if it doesn't belong to any.
+    """
+
+    for endpoint in ENDPOINTS:
+        if uri.startswith(endpoint):
+            return endpoint
+
+    return uri
+
+
+
+@dataclass
+class RequestInfo:
+    """
+        Describes a single API call.
+    """
+
+    uri: str
+    """The requested URI"""
+
+    params: t.Optional[t.Dict[str, t.Any]] = None
+    """The query parameters of the request"""
+
+    started: float = field(default_factory=time.perf_counter)
+    """`time.perf_counter()` when the call started"""
+
+    finished: t.Optional[float] = None
+    """`time.perf_counter()` when the call finished"""
+
+    timings: t.Dict[str, float] = field(default_factory=dict)
+    """Seconds spent in each phase (see `PHASES`). Phases that didn't happen (e. g.: everything but `model` for cache hits) are missing."""
+
+    status_code: t.Optional[int] = None
+    """The HTTP status code of the (last) response, if a request was sent"""
+
+    response_bytes: int = 0
+    """The size of the response body"""
+
+    attempts: int = 0
+    """How many requests were sent (see `piped_api.retry.RetryPolicy`). `0` for cache hits and coalesced calls."""
+
+    cache_hit: bool = False
+    """Whether the data came from the cache"""
+
+    context: t.Dict[str, t.Any] = field(default_factory=dict)
+    """Free for hooks to keep their own state about the call in"""
+
+
+    @property
+    def endpoint(self) -> str:
+        """
+            The endpoint of the call, see `endpoint_of`
+        """
+
+        return endpoint_of(self.uri)
+
+
+    @property
+    def duration(self) -> t.Optional[float]:
+        """
+            Seconds the whole call took, or `None` if it didn't finish yet
+        """
+
+        return self.finished - self.started if self.finished is not None else None
+
+
+    def add_timing(self, phase: str, seconds: float) -> None:
+        """
+            Adds time spent in `phase` (time of retried requests adds up).
+        """
+
+        self.timings[phase] = self.timings.get(phase, 0.0) + seconds
+
+
+
+_current: ContextVar[t.Optional[RequestInfo]] = ContextVar('piped_api_request', default=None)
+
+
+def current() -> t.Optional[RequestInfo]:
+    """
+        The `RequestInfo` of the call being made in the current thread or task, or `None` if the client has no hooks.
+    """
+
+    return _current.get()
+
+
+
+def detach() -> None:
+    """
+        Stops reporting to the call of the current thread or task, for work that outlives the call (e. g.: a background refresh).
+    """
+
+    _current.set(None)
+
+
+
+class Hooks:
+    """
+        Base class for hooks. Override the methods you need - they are called from the thread (or task) making the call,
+        so they should be fast and must be thread-safe.
+    """
+
+    def on_request_start(self, info: RequestInfo) -> None:
+        """
+            Called when an API call starts, before the cache is checked.
+        """
+
+
+    def on_response(self, info: RequestInfo) -> None:
+        """
+            Called when an API call succeeded.
+        """
+
+
+    def on_error(self, info: RequestInfo, error: BaseException) -> None:
+        """
+            Called when an API call failed with `error` (which is then raised to the caller).
+        """
+
+
+
+class Instrumentation:
+    """
+        Notifies `hooks` about an API call and makes its `RequestInfo` available through `current` meanwhile. Used by the clients.
+    """
+
+    __slots__ = ('hooks', 'info', '_token')
+
+    def __init__(self, hooks: t.Sequence[Hooks], uri: str, params: t.Optional[t.Dict[str, t.Any]]) -> None:
+        self.hooks = hooks
+        self.info = RequestInfo(uri, params)
+
+
+    def __enter__(self) -> RequestInfo:
+        self._token = _current.set(self.info)
+
+        for hook in self.hooks:
+            hook.on_request_start(self.info)
+
+        return self.info
+
+
+    def __exit__(self, error_type: t.Any, error: t.Optional[BaseException], *_: t.Any) -> None:
+        _current.reset(self._token)
+        self.info.finished = time.perf_counter()
+
+        for hook in self.hooks:
+            if error is None:
+                hook.on_response(self.info)
+
+            else:
+                hook.on_error(self.info, error)
+
+
+
+class HttpxTrace:
+    """
+        Measures the `connect` and `ttfb` phases of an `httpx` request, through its `trace` extension. Used by `AsyncPipedClient`.
+    """
+
+    __slots__ = ('connect', 'ttfb', '_started')
+
+    _CONNECT = ('connection.connect_tcp', 'connection.connect_unix_socket', 'connection.start_tls')
+    _REQUEST = ('http11.send_request_headers', 'http2.send_request_headers')
+    _RESPONSE = ('http11.receive_response_headers', 'http2.receive_response_headers')
+
+    def __init__(self) -> None:
+        self.connect = 0.0
+        self.ttfb = 0.0
+        self._started: t.Dict[str, float] = {}
+
+
+    async def __call__(self, event: str, _: t.Dict[str, t.Any]) -> None:
+        name, _, state = event.rpartition('.')
+
+        if state == 'started':
+            self._started[name] = time.perf_counter()
+
+        elif state == 'complete':
+            if name in self._CONNECT:
+                self.connect += time.perf_counter() - self._started[name]
+
+            elif name in self._RESPONSE:
+                started = next((self._started[request] for request in self._REQUEST if request in self._started), self._started[name])
+                self.ttfb += time.perf_counter() - started
+
+
+
+class Histogram:
+    """
+        A cumulative histogram of durations, with the same semantics as a Prometheus histogram.
+    """
+
+    BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, buckets: t.Sequence[float]=BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+
+    def observe(self, value: float) -> None:
+        """
+            Records a value (in seconds).
+        """
+
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                break
+
+        else:
+            index = len(self.buckets)
+
+        self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+
+    def cumulative(self) -> t.List[t.Tuple[float, int]]:
+        """
+            Returns `(upper bound, number of values <= bound)` pairs, ending with infinity.
+        """
+
+        total, pairs = 0, []
+
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            pairs.append((bound, total))
+
+        return pairs
+
+
+
+@dataclass
+class EndpointMetrics:
+    """
+        Metrics of a single endpoint, collected by `MetricsCollector`.
+    """
+
+    requests: int = 0
+    errors: int = 0
+    cache_hits: int = 0
+    response_bytes: int = 0
+
+    latency: Histogram = field(default_factory=Histogram)
+    """Durations of whole calls"""
+
+    phases: t.Dict[str, Histogram] = field(default_factory=dict)
+    """Durations of each phase, see `PHASES`"""
+
+
+
+def _labels(**labels: str) -> str:
+    return ','.join(f'{name}="{value}"' for name, value in labels.items())
+
+
+
+class MetricsCollector(Hooks):
+    """
+        Collects per-endpoint counts, latency histograms (of whole calls and of each phase), payload sizes and cache hits.
+    """
+
+    def __init__(self, buckets: t.Sequence[float]=Histogram.BUCKETS) -> None:
+        """
+            ### Parameters:
+            - `buckets` - Upper bounds (in seconds) of the histogram buckets
+        """
+
+        self.buckets = buckets
+        self.endpoints: t.Dict[str, EndpointMetrics] = {}
+        self._lock = threading.Lock()
+
+
+    def _metrics(self, endpoint: str) -> EndpointMetrics:
+        metrics = self.endpoints.get(endpoint, None)
+
+        if metrics is None:
+            metrics = self.endpoints[endpoint] = EndpointMetrics(latency=Histogram(self.buckets))
+
+        return metrics
+
+
+    def _record(self, info: RequestInfo, failed: bool) -> None:
+        with self._lock:
+            metrics = self._metrics(info.endpoint)
+            metrics.requests += 1
+            metrics.errors += failed
+            metrics.cache_hits += info.cache_hit
+            metrics.response_bytes += info.response_bytes
+            metrics.latency.observe(info.duration)
+
+            for phase, seconds in info.timings.items():
+                if phase not in metrics.phases:
+                    metrics.phases[phase] = Histogram(self.buckets)
+
+                metrics.phases[phase].observe(seconds)
+
+
+    def on_response(self, info: RequestInfo) -> None:
+        self._record(info, failed=False)
+
+
+    def on_error(self, info: RequestInfo, error: BaseException) -> None:
+        self._record(info, failed=True)
+
+
+    def to_prometheus(self, prefix: str='piped_api') -> str:
+        """
+            Exports the metrics in the [Prometheus text format](https://prometheus.io/docs/instrumenting/exposition_formats/).
+        """
+
+        lines: t.List[str] = []
+
+        with self._lock:
+            endpoints = sorted(self.endpoints.items())
+
+            for name, help, attribute in (
+                ('requests_total', 'API calls', 'requests'),
+                ('errors_total', 'Failed API calls', 'errors'),
+                ('cache_hits_total', 'API calls answered from the cache', 'cache_hits'),
+                ('response_bytes_total', 'Bytes of response bodies received', 'response_bytes'),
+            ):
+                lines += [f'# HELP {prefix}_{name} {help}', f'# TYPE {prefix}_{name} counter']
+                lines += [f'{prefix}_{name}{{{_labels(endpoint=endpoint)}}} {getattr(metrics, attribute)}' for endpoint, metrics in endpoints]
+
+
+            def histogram(name: str, histogram: Histogram, **labels: str) -> None:
+                for bound, count in histogram.cumulative():
+                    lines.append(f'{prefix}_{name}_bucket{{{_labels(**labels, le="+Inf" if bound == float("inf") else repr(bound))}}} {count}')
+
+                lines.append(f'{prefix}_{name}_sum{{{_labels(**labels)}}} {histogram.sum!r}')
+                lines.append(f'{prefix}_{name}_count{{{_labels(**labels)}}} {histogram.count}')
+
+
+            lines += [f'# HELP {prefix}_request_duration_seconds Duration of API calls', f'# TYPE {prefix}_request_duration_seconds histogram']
+
+            for endpoint, metrics in endpoints:
+                histogram('request_duration_seconds', metrics.latency, endpoint=endpoint)
+
+            lines += [f'# HELP {prefix}_phase_duration_seconds Duration of each phase of API calls', f'# TYPE {prefix}_phase_duration_seconds histogram']
+
+            for endpoint, metrics in endpoints:
+                for phase in PHASES:
+                    if phase in metrics.phases:
+                        histogram('phase_duration_seconds', metrics.phases[phase], endpoint=endpoint, phase=phase)
+
+        return '\n'.join(lines) + '\n'
+
+
+
+class OpenTelemetryHooks(Hooks):
+    """
+        Records each API call as an [OpenTelemetry](https://opentelemetry.io/) span, with the phase timings as attributes
+        (`piped.phase.<phase>_ms`). Requires the `otel` extra (`pip install piped-api[otel]`).
+    """
+
+    def __init__(self, tracer: t.Optional[t.Any]=None) -> None:
+        """
+            ### Parameters:
+            - `tracer` - The `opentelemetry.trace.Tracer` to create spans with. If this is `None`, the tracer of the global tracer provider is used.
+        """
+
+        if otel_trace is None:
+            raise ImportError("OpenTelemetryHooks requires `opentelemetry-api` - install it with `pip install piped-api[otel]`")
+
+        self.tracer = tracer if tracer is not None else otel_trace.get_tracer('piped_api')
+
+
+    def on_request_start(self, info: RequestInfo) -> None:
+        info.context['span'] = self.tracer.start_span(f'GET {info.endpoint}', kind=otel_trace.SpanKind.CLIENT, attributes={'url.path': info.uri})
+
+
+    def _end(self, info: RequestInfo) -> t.Any:
+        span = info.context.pop('span')
+        span.set_attributes({
+            'piped.endpoint': info.endpoint,
+            'piped.cache_hit': info.cache_hit,
+            'piped.attempts': info.attempts,
+            'piped.response_bytes': info.response_bytes,
+            **{f'piped.phase.{phase}_ms': seconds * 1000 for phase, seconds in info.timings.items()},
+        })
+
+        if info.status_code is not None:
+            span.set_attribute('http.response.status_code', info.status_code)
+
+        return span
+
+
+    def on_response(self, info: RequestInfo) -> None:
+        self._end(info).end()
+
+
+    def on_error(self, info: RequestInfo, error: BaseException) -> None:
+        span = self._end(info)
+        span.record_exception(error)
+        span.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR, str(error)))
+        span.end()
@@ -1,4 +1,77 @@
 import typing as t
+import threading
+
+from functools import wraps
+
+_T = t.TypeVar('_T')
+
+_layout_lock = threading.Lock()
+_memo_lock = threading.Lock()
+
+
+class CompactRecord:
+    """
+        Base class for the slotted records returned by `BasePipedModel.compact`.
+
+        A record has one attribute per property of the model it was created from, holding the already decoded value.
+        It doesn't keep the raw JSON data, so it takes a fraction of the memory of the model.
+    """
+
+    __slots__ = ()
+
+
+    def as_dict(self) -> t.Dict[str, t.Any]:
+        """
+            Returns the decoded fields of the record as a `dict`
+        """
+
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+    def __eq__(self, other: t.Any) -> bool:
+        return type(self) is type(other) and all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+
+        return f"{type(self).__name__}({fields})"
+
+
+
+def _compact_value(value: t.Any) -> t.Any:
+    if isinstance(value, BasePipedModel):
+        return value.compact()
+
+    if isinstance(value, list):
+        return tuple(_compact_value(item) for item in value)
+
+    return value
+
+
+
+def memoized_property(getter: t.Callable[[t.Any], _T]) -> property:
+    """
+        Like `property`, but the value is computed only once per model instance and then reused.
+
+        The memoized values are dropped when `BasePipedModel.data` is replaced (but not when it is mutated in-place).
+        The undecorated getter is available as `.fget.__wrapped__`.
+    """
+
+    name = getter.__name__
+
+    @wraps(getter)
+    def memoized(self: 'BasePipedModel') -> _T:
+        memo = self.__dict__.get('_memo', None)
+
+        if memo is not None and memo[0] is self.data and name in memo[1]:
+            return memo[1][name]
+
+        return self._memoize(name, getter)
+
+
+    return property(memoized)
+
 
 
 class BasePipedModel:
@@ -6,6 +79,10 @@ class BasePipedModel:
         Base class for all Piped models.
     """
 
+    _compact_extras: t.Dict[str, t.Callable[[t.Any], t.Any]] = {}
+    """Additional fields for `compact` records, which are not properties of the model (e. g.: results of methods)"""
+
+
     def __init__(self, data: t.Dict[str, t.Any]) -> None:
         """
             ### Parameters:
@@ -13,3 +90,84 @@ class BasePipedModel:
         """
 
         self.data = data
+
+
+    def _memoize(self, key: t.Hashable, compute: t.Callable[[t.Any], _T]) -> _T:
+        """
+            Returns the value memoized under `key`, computing it with `compute(self)` first if needed.
+        """
+
+        memo = self.__dict__.get('_memo', None)
+
+        if memo is None or memo[0] is not self.data:
+            # Threads computing the first values of a model at once must share one memo, or their values get lost:
+            with _memo_lock:
+                memo = self.__dict__.get('_memo', None)
+
+                if memo is None or memo[0] is not self.data:
+                    memo = self._memo = (self.data, {})
+
+        try:
+            return memo[1][key]
+
+        except KeyError:
+            # If another thread computed the value meanwhile, its value wins, so all threads see the same object:
+            return memo[1].setdefault(key, compute(self))
+
+
+    @classmethod
+    def _compact_layout(cls) -> t.Tuple[t.Type[CompactRecord], t.Tuple[t.Tuple[str, t.Callable[[t.Any], t.Any]], ...]]:
+        layout = cls.__dict__.get('_compact_layout_cache', None)
+
+        if layout is not None:
+            return layout
+
+        # Only one record type may ever be created per model, even if multiple threads compact their first records at once:
+        with _layout_lock:
+            layout = cls.__dict__.get('_compact_layout_cache', None)
+
+            if layout is None:
+                getters: t.Dict[str, t.Callable[[t.Any], t.Any]] = {}
+
+                for klass in reversed(cls.__mro__):
+                    getters.update({name: value.fget for name, value in vars(klass).items() if isinstance(value, property) and not name.startswith('_')})
+
+                getters.update(cls._compact_extras)
+
+                record_type = type(f"Compact{cls.__name__}", (CompactRecord,), {'__slots__': tuple(getters), '__module__': cls.__module__})
+                layout = cls._compact_layout_cache = (record_type, tuple(getters.items()))
+
+        return layout
+
+
+    @classmethod
+    def compact_type(cls) -> t.Type[CompactRecord]:
+        """
+            The `CompactRecord` subclass used for compact records of this model. It is created on first use.
+        """
+
+        return cls._compact_layout()[0]
+
+
+    def compact(self) -> CompactRecord:
+        """
+            Returns a compact, read-only snapshot of this model - a slotted `CompactRecord` with the same attribute names as
+            the model's properties, holding the decoded values (nested models are compacted too, lists become tuples).
+
+            Useful when keeping many models in memory (e. g.: millions of `Comments.Comment`s) - the raw JSON data is not kept.
+            Fields missing from the JSON data are set to `None`.
+        """
+
+        record_type, getters = self._compact_layout()
+        record = record_type.__new__(record_type)
+
+        for name, getter in getters:
+            try:
+                value = _compact_value(getter(self))
+
+            except KeyError:
+                value = None
+
+            setattr(record, name, value)
+
+        return record
@@ -1,6 +1,6 @@
 import typing as t
 
-from . import BasePipedModel
+from . import BasePipedModel, memoized_property
 from .videos import Video
 
 
@@ -22,7 +22,7 @@ class NextPageChannel(BasePipedModel):
         return self.data['nextpage']
 
 
-    @property
+    @memoized_property
     def uploaded_videos(self) -> t.List[Video.RelatedStream]:
         """
             List of uploaded videos from the current fetched data
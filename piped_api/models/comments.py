@@ -134,11 +134,11 @@ class Comments(BasePipedModel):
             Obtain a list of comments
         """
 
-        return [self.Comment(comment_json) for comment_json in self.data['comments']]
+        return self._memoize('comments', lambda comments: [comments.Comment(comment_json) for comment_json in comments.data['comments']])
 
 
     def __iter__(self) -> t.Iterator[Comment]:
-        iter(self.get_comments())
+        return iter(self.get_comments())
 
 
 
@@ -161,3 +161,9 @@ class Comments(BasePipedModel):
         """
 
         return self.data['nextpage']
+
+
+
+    _compact_extras = {
+        'comments': lambda comments: comments.get_comments(),
+    }
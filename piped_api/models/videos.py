@@ -1,8 +1,39 @@
 import typing as t
 
+import re
+
 from datetime import datetime, date, timedelta
 
-from . import BasePipedModel
+from . import BasePipedModel, memoized_property
+
+
+_EXPIRE_PATTERN = re.compile(r'[?&/]expire[=/](\d+)')
+
+
+
+def url_expiry(url: t.Optional[str]) -> t.Optional[int]:
+    """
+        Returns when a signed stream URL expires (UNIX timestamp of its `expire` parameter, e. g.: `https://...googlevideo.com/videoplayback?...&expire=1641081600`),
+        or `None` if the URL doesn't have one.
+    """
+
+    match = _EXPIRE_PATTERN.search(url) if url else None
+
+    return int(match.group(1)) if match is not None else None
+
+
+
+def streams_expiry(data: t.Dict[str, t.Any]) -> t.Optional[int]:
+    """
+        Returns when the first stream URL (including the HLS and DASH manifests) of a `/streams/` response expires (UNIX timestamp),
+        or `None` if none of them have an expiry.
+    """
+
+    urls = [stream.get('url', None) for key in ('videoStreams', 'audioStreams') for stream in data.get(key, None) or ()]
+    expiries = [expiry for expiry in map(url_expiry, urls + [data.get('hls', None), data.get('dash', None)]) if expiry is not None]
+
+    return min(expiries, default=None)
+
 
 
 class Video(BasePipedModel):
@@ -24,7 +55,7 @@ class Video(BasePipedModel):
         return self.data['description']
 
 
-    @property
+    @memoized_property
     def upload_date(self) -> date:
         """
             The date the video was uploaded at.
@@ -111,7 +142,7 @@ class Video(BasePipedModel):
         return self.data['uploaderVerified']
 
 
-    @property
+    @memoized_property
     def duration(self) -> timedelta:
         """
             The duration of the video.
@@ -155,6 +186,18 @@ class Video(BasePipedModel):
         return self.data['dislikes']
 
 
+    @memoized_property
+    def streams_expire_at(self) -> t.Optional[datetime]:
+        """
+            When the first of the stream URLs (`Video.get_streams`, `Video.hls` and `Video.dash`) expires, or `None` if they don't expire.
+            Fetch the video again after this to get working URLs.
+        """
+
+        expiry = streams_expiry(self.data)
+
+        return datetime.fromtimestamp(expiry) if expiry is not None else None
+
+
 
     class Stream(BasePipedModel):
         """
@@ -170,6 +213,29 @@ class Video(BasePipedModel):
             return self.data['url']
 
 
+        @memoized_property
+        def expires_at(self) -> t.Optional[datetime]:
+            """
+                When the stream URL expires, or `None` if it doesn't say.
+
+                ### Note:
+                This is parsed from the `expire` parameter of the URL (seconds since epoch) and converted to a `datetime.datetime` object.
+            """
+
+            expiry = url_expiry(self.url)
+
+            return datetime.fromtimestamp(expiry) if expiry is not None else None
+
+
+        @property
+        def expired(self) -> bool:
+            """
+                Whether the stream URL has expired already (and won't work anymore)
+            """
+
+            return self.expires_at is not None and self.expires_at <= datetime.now()
+
+
         @property
         def format(self) -> str:
             """
@@ -299,7 +365,7 @@ class Video(BasePipedModel):
         """
 
         if type == 'video' or type == 'audio':
-            return [self.Stream(stream_data) for stream_data in self.data[f"{type}Streams"]]
+            return self._memoize(('streams', type), lambda video: [video.Stream(stream_data) for stream_data in video.data[f"{type}Streams"]])
 
         raise ValueError('Invalid stream type. Must be either `video` or `audio`')
 
@@ -382,7 +448,7 @@ class Video(BasePipedModel):
             return self.data['shortDescription']
 
 
-        @property
+        @memoized_property
         def duration(self) -> timedelta:
             """
                 The duration of the related video.
@@ -404,7 +470,7 @@ class Video(BasePipedModel):
             return self.data['views']
 
 
-        @property
+        @memoized_property
         def uploaded(self) -> datetime:
             """
                 The date the related video was uploaded (as a `datetime.datetime` object).
@@ -426,7 +492,7 @@ class Video(BasePipedModel):
 
 
 
-    @property
+    @memoized_property
     def related_videos(self) -> t.List[RelatedStream]:
         """
             List of related streams
@@ -484,7 +550,7 @@ class Video(BasePipedModel):
 
 
 
-    @property
+    @memoized_property
     def subtitles(self) -> t.List[Subtitle]:
         """
             A list of captions for the video
@@ -537,7 +603,7 @@ class Video(BasePipedModel):
             return self.data['image']
 
 
-        @property
+        @memoized_property
         def start(self) -> timedelta:
             """
                 The start time of the chapter
@@ -550,10 +616,17 @@ class Video(BasePipedModel):
 
 
 
-    @property
+    @memoized_property
     def chapters(self) -> t.List[Chapter]:
         """
             A list of chapters for the video
         """
 
         return [self.Chapter(chapter_data) for chapter_data in self.data['chapters']]
+
+
+
+    _compact_extras = {
+        'video_streams': lambda video: video.get_streams('video'),
+        'audio_streams': lambda video: video.get_streams('audio'),
+    }
@@ -0,0 +1,246 @@
+import typing as t
+
+import queue
+import asyncio
+import threading
+
+from datetime import datetime
+from collections import deque
+
+from .models.videos import Video
+from .models.comments import Comments
+from .models.channels import NextPageChannel
+
+
+_P = t.TypeVar('_P')
+
+_DONE = object()
+
+
+
+def iter_pages(fetch_page: t.Callable[[t.Optional[str]], _P], next_page: t.Callable[[_P], t.Optional[str]], max_pages: t.Optional[int]=None, prefetch: int=1) -> t.Iterator[_P]:
+    """
+        Lazily iterates over the pages of a paginated endpoint.
+
+        While the consumer processes a page, up to `prefetch` following pages are downloaded in a background thread.
+        Pages are not kept around after they are yielded, so memory usage stays flat regardless of the number of pages.
+
+        ### Parameters:
+        - `fetch_page` - Obtains a page for a nextpage token (`None` for the first page)
+        - `next_page` - Extracts the nextpage token from a page (`None` if it is the last page)
+        - `max_pages` - The maximum number of pages to fetch. If this is `None`, all pages are fetched.
+        - `prefetch` - The number of pages to download ahead. If this is `0`, pages are downloaded only when they are needed.
+    """
+
+    if prefetch <= 0:
+        nextpage, fetched = None, 0
+
+        while max_pages is None or fetched < max_pages:
+            page = fetch_page(nextpage)
+            fetched += 1
+
+            yield page
+
+            nextpage = next_page(page)
+
+            if nextpage is None:
+                return
+
+        return
+
+
+    pages: queue.Queue = queue.Queue()
+    slots = threading.Semaphore(prefetch)
+    stop = threading.Event()
+
+    def produce() -> None:
+        nextpage, fetched = None, 0
+
+        try:
+            while max_pages is None or fetched < max_pages:
+                while not slots.acquire(timeout=0.1):
+                    if stop.is_set():
+                        return
+
+                if stop.is_set():
+                    return
+
+                page = fetch_page(nextpage)
+                fetched += 1
+                pages.put(page)
+
+                nextpage = next_page(page)
+
+                if nextpage is None:
+                    break
+
+        except Exception as error:
+            pages.put(error)
+            return
+
+        pages.put(_DONE)
+
+
+    threading.Thread(target=produce, daemon=True).start()
+
+    try:
+        while True:
+            page = pages.get()
+
+            if page is _DONE:
+                return
+
+            if isinstance(page, Exception):
+                raise page
+
+            slots.release()
+            yield page
+
+    finally:
+        stop.set()
+
+
+
+async def aiter_pages(fetch_page: t.Callable[[t.Optional[str]], t.Awaitable[_P]], next_page: t.Callable[[_P], t.Optional[str]], max_pages: t.Optional[int]=None, prefetch: int=1) -> t.AsyncIterator[_P]:
+    """
+        Async version of `iter_pages` - following pages are downloaded by a background task.
+    """
+
+    pages: asyncio.Queue = asyncio.Queue()
+    slots = asyncio.Semaphore(max(prefetch, 1))
+
+    async def produce() -> None:
+        nextpage, fetched = None, 0
+
+        try:
+            while max_pages is None or fetched < max_pages:
+                await slots.acquire()
+
+                page = await fetch_page(nextpage)
+                fetched += 1
+                pages.put_nowait(page)
+
+                nextpage = next_page(page)
+
+                if nextpage is None:
+                    break
+
+        except Exception as error:
+            pages.put_nowait(error)
+            return
+
+        pages.put_nowait(_DONE)
+
+
+    producer = asyncio.ensure_future(produce())
+
+    try:
+        while True:
+            page = await pages.get()
+
+            if page is _DONE:
+                return
+
+            if isinstance(page, Exception):
+                raise page
+
+            if prefetch > 0:
+                slots.release()
+
+            yield page
+
+            if prefetch <= 0:
+                slots.release()
+
+    finally:
+        producer.cancel()
+
+
+
+def _uploaded_before(video: Video.RelatedStream, since: t.Optional[datetime]) -> bool:
+    """
+        Whether `video` was uploaded before `since`. Videos without an upload time (e. g.: upcoming streams) never are.
+    """
+
+    return since is not None and (video.data.get('uploaded', None) or 0) > 0 and video.uploaded < since
+
+
+
+class ChannelVideosCrawl:
+    """
+        The paging logic of `piped_api.client.PipedClient.iter_channel_videos` (and its async version): stops at the first video uploaded before `since`,
+        or after `limit` videos.
+    """
+
+    def __init__(self, since: t.Optional[datetime]=None, limit: t.Optional[int]=None) -> None:
+        # Upload times are naive local times, so aware ones are converted to those:
+        self.since = since.astimezone().replace(tzinfo=None) if since is not None and since.tzinfo is not None else since
+        self.limit = limit
+
+        self.yielded = 0
+        self.finished = False
+
+
+    def next_page(self, channel: NextPageChannel) -> t.Optional[str]:
+        """
+            Returns the nextpage token of `channel`, or `None` if no more pages are needed.
+        """
+
+        videos = channel.uploaded_videos
+
+        if not videos or _uploaded_before(videos[-1], self.since):
+            return None
+
+        return channel.nextpage
+
+
+    def videos(self, channel: NextPageChannel) -> t.Iterator[Video.RelatedStream]:
+        """
+            Yields the videos of a page that should be yielded to the caller, and sets `finished` once no more should be.
+        """
+
+        for video in channel.uploaded_videos:
+            if self.limit is not None and self.yielded >= self.limit or _uploaded_before(video, self.since):
+                self.finished = True
+                return
+
+            yield video
+            self.yielded += 1
+
+
+
+class CommentTreeCrawl:
+    """
+        The traversal of `piped_api.client.PipedClient.iter_comment_tree` (and its async version), independent of how pages are downloaded.
+
+        `pending` holds `(parent_id, depth, nextpage)` of the pages still to download. Pass each downloaded page to `expand`.
+    """
+
+    def __init__(self, max_depth: t.Optional[int]=None, max_comments: t.Optional[int]=None) -> None:
+        self.max_depth = max_depth
+        self.max_comments = max_comments
+
+        self.pending: t.Deque[t.Tuple[t.Optional[str], int, t.Optional[str]]] = deque([(None, 0, None)])
+        self.yielded = 0
+        self.finished = False
+
+
+    def expand(self, parent_id: t.Optional[str], depth: int, comments: Comments) -> t.Iterator[t.Tuple[t.Optional[str], Comments.Comment]]:
+        """
+            Yields `(parent_id, comment)` for the comments of a downloaded page and queues their replies and the following page.
+            Sets `finished` once `max_comments` were yielded.
+        """
+
+        for comment in comments:
+            yield parent_id, comment
+            self.yielded += 1
+
+            if self.max_comments is not None and self.yielded >= self.max_comments:
+                self.finished = True
+                return
+
+            if comment.replies_page is not None and (self.max_depth is None or depth < self.max_depth):
+                self.pending.appendleft((comment.comment_id, depth + 1, comment.replies_page))
+
+        if comments.nextpage is not None:
+            self.pending.appendleft((parent_id, depth, comments.nextpage))
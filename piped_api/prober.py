@@ -0,0 +1,262 @@
+import typing as t
+
+import math
+import time
+import weakref
+import threading
+
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+
+from requests import Session
+
+from .client import PipedClient
+
+
+
+@dataclass
+class ProbeResult:
+    """
+        The outcome of probing a single instance with `probe_instances`.
+    """
+
+    url: str
+    """The base API URL of the instance"""
+
+    latencies: t.List[float] = field(default_factory=list)
+    """Response times of the successful probes (in seconds)"""
+
+    failures: int = 0
+    """The number of probes that failed (connection errors, timeouts, bad status codes or invalid JSON)"""
+
+
+    def percentile(self, percent: float) -> float:
+        """
+            The `percent`th percentile of `ProbeResult.latencies` (nearest rank), or infinity if no probe succeeded.
+        """
+
+        if not self.latencies:
+            return math.inf
+
+        ordered = sorted(self.latencies)
+        return ordered[max(math.ceil(percent / 100 * len(ordered)) - 1, 0)]
+
+
+    @property
+    def p50(self) -> float:
+        """
+            The median latency (in seconds)
+        """
+
+        return self.percentile(50)
+
+
+    @property
+    def p95(self) -> float:
+        """
+            The 95th percentile latency (in seconds)
+        """
+
+        return self.percentile(95)
+
+
+    @property
+    def success_rate(self) -> float:
+        """
+            The fraction of probes that succeeded (`0.0` - `1.0`)
+        """
+
+        total = len(self.latencies) + self.failures
+        return len(self.latencies) / total if total else 0.0
+
+
+    def rank(self) -> t.Tuple[float, float, float]:
+        """
+            Sort key of the result - the most reliable instances first, then the ones with the lowest median and tail latency.
+        """
+
+        return (-self.success_rate, self.p50, self.p95)
+
+
+
+def _probe(session: Session, url: str, uri: str, params: t.Dict[str, str], samples: int, timeout: float) -> ProbeResult:
+    result = ProbeResult(url)
+
+    for _ in range(samples):
+        start = time.perf_counter()
+
+        try:
+            response = session.get(f"{url}{uri}", params=params, timeout=timeout)
+            response.json()
+
+        except (OSError, ValueError):
+            result.failures += 1
+            continue
+
+        if response.status_code != 200:
+            result.failures += 1
+            continue
+
+        result.latencies.append(time.perf_counter() - start)
+
+    return result
+
+
+
+def probe_instances(urls: t.Iterable[str], samples: int=3, uri: str='/suggestions', params: t.Optional[t.Dict[str, str]]=None, timeout: float=5.0, session: t.Optional[Session]=None) -> t.List[ProbeResult]:
+    """
+        Concurrently probes each instance and returns the results, ranked best first (see `ProbeResult.rank`).
+
+        ### Parameters:
+        - `urls` - The base API URLs of the candidate instances. Trailing slashes will be stripped.
+        - `samples` - How many (sequential) requests to send to each instance
+        - `uri` - The endpoint to probe - it should be cheap for the instance to answer
+        - `params` - Query parameters of the probes. By default, `uri` is expected to be `/suggestions` and a short query is sent.
+        - `timeout` - Seconds after which a probe counts as failed
+        - `session` - The `requests.Session` to probe with. If this is `None`, a new one is used (and closed afterwards).
+    """
+
+    urls = [url.strip("/") for url in urls]
+    params = params if params is not None else {'query': 'piped'}
+
+    if not urls:
+        return []
+
+    if session is None:
+        with Session() as session:
+            return probe_instances(urls, samples, uri, params, timeout, session)
+
+    with ThreadPoolExecutor(max_workers=len(urls)) as executor:
+        results = list(executor.map(lambda url: _probe(session, url, uri, params, samples, timeout), urls))
+
+    return sorted(results, key=ProbeResult.rank)
+
+
+
+class InstanceProber:
+    """
+        Keeps track of the fastest of the candidate instances, by probing them periodically in the background.
+
+        ```python
+        prober = InstanceProber(['https://pipedapi.kavin.rocks', 'https://pipedapi.tokhmi.xyz'])
+        client = prober.client()  # Switches to the fastest instance after each probe
+        prober.start()
+        ```
+    """
+
+    def __init__(self, urls: t.Iterable[str], interval: float=600.0, on_probe: t.Optional[t.Callable[[t.List[ProbeResult]], None]]=None, **probe_kwargs: t.Any) -> None:
+        """
+            ### Parameters:
+            - `urls` - The base API URLs of the candidate instances
+            - `interval` - Seconds between background probes
+            - `on_probe` - Called with the ranked results after each probe
+            - `**probe_kwargs` - Additional keyword arguments to pass to `probe_instances`
+        """
+
+        self.urls = [url.strip("/") for url in urls]
+
+        if not self.urls:
+            raise ValueError("An InstanceProber needs at least one candidate instance")
+
+        self.interval = interval
+        self.on_probe = on_probe
+        self.probe_kwargs = probe_kwargs
+
+        self.results: t.List[ProbeResult] = []
+        self.failed_probes = 0
+        """How many background probes raised an error"""
+
+        self.last_error: t.Optional[Exception] = None
+        """The error of the last failed background probe"""
+
+        self._clients: 'weakref.WeakSet[PipedClient]' = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: t.Optional[threading.Thread] = None
+
+
+    @property
+    def best(self) -> str:
+        """
+            The base API URL of the best instance according to the last probe. Probes right away if there was no probe yet.
+        """
+
+        if not self.results:
+            self.probe()
+
+        return self.results[0].url
+
+
+    def probe(self) -> t.List[ProbeResult]:
+        """
+            Probes all candidates now, and points the clients created by `InstanceProber.client` to the best one.
+        """
+
+        results = probe_instances(self.urls, **self.probe_kwargs)
+
+        with self._lock:
+            self.results = results
+
+            # Stay on the current instance if no candidate is reachable:
+            if results and results[0].success_rate > 0:
+                for client in self._clients:
+                    client.base_api_url = results[0].url
+
+        if self.on_probe is not None:
+            self.on_probe(results)
+
+        return results
+
+
+    def client(self, **kwargs: t.Any) -> PipedClient:
+        """
+            Creates a `PipedClient` for the best instance, which is switched over to the best instance after each following probe.
+            Its cached responses are keyed by the first candidate (see `PipedClient.cache_namespace`), so they survive switching instances.
+
+            ### Parameters:
+            - `**kwargs` - Additional keyword arguments to pass to `PipedClient`
+        """
+
+        client = PipedClient(self.best, **{'cache_namespace': self.urls[0], **kwargs})
+
+        with self._lock:
+            self._clients.add(client)
+
+        return client
+
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.probe()
+
+            # Keep probing - the candidates may become reachable again:
+            except Exception as error:
+                with self._lock:
+                    self.failed_probes += 1
+                    self.last_error = error
+
+
+    def start(self) -> None:
+        """
+            Starts probing every `InstanceProber.interval` seconds in a background (daemon) thread.
+        """
+
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='piped-api-prober', daemon=True)
+        self._thread.start()
+
+
+    def stop(self) -> None:
+        """
+            Stops the background probing.
+        """
+
+        self._stop.set()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
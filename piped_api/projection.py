@@ -0,0 +1,92 @@
+import typing as t
+
+from functools import lru_cache
+
+try:
+    import msgspec
+
+except ImportError:
+    msgspec = None
+
+
+
+class Projection(t.NamedTuple):
+    """
+        Describes which keys of a JSON response should be kept (see the `fields` parameter of the `piped_api.client.PipedClient` getters).
+
+        `fields` are JSON keys as returned by the API (e. g.: `'uploaderName'`, not `'uploader_name'`).
+        Model properties that read a key which was not kept raise `KeyError`.
+    """
+
+    fields: t.FrozenSet[str]
+    """The keys to keep - of every item for list responses, or of the response itself"""
+
+    keep: t.FrozenSet[str] = frozenset()
+    """Keys of the response that are always kept (e. g.: `'nextpage'`)"""
+
+    items_key: t.Optional[str] = None
+    """The key of the list of items in the response (e. g.: `'relatedStreams'`), to which `fields` also apply"""
+
+    many: bool = False
+    """Whether the response itself is a list of items"""
+
+
+    @classmethod
+    def of(cls, fields: t.Optional[t.Iterable[str]], **kwargs) -> t.Optional['Projection']:
+        """
+            Creates a projection, or returns `None` if `fields` is `None` (nothing to project).
+        """
+
+        if fields is None:
+            return None
+
+        return cls(frozenset(fields), **{key: frozenset(value) if key == 'keep' else value for key, value in kwargs.items()})
+
+
+    def _pick(self, item: t.Dict[str, t.Any]) -> t.Dict[str, t.Any]:
+        return {key: value for key, value in item.items() if key in self.fields}
+
+
+    def apply(self, json: t.Any) -> t.Any:
+        """
+            Projects already decoded JSON data.
+        """
+
+        if self.many:
+            return [self._pick(item) for item in json]
+
+        projected = {key: value for key, value in json.items() if key in self.fields or key in self.keep}
+
+        if self.items_key is not None and json.get(self.items_key, None) is not None:
+            projected[self.items_key] = [self._pick(item) for item in json[self.items_key]]
+
+        return projected
+
+
+    def decoding_type(self) -> t.Optional[t.Any]:
+        """
+            A type for `msgspec` which decodes only the projected keys from raw JSON - all other values are skipped
+            by the parser without being materialized. `None` if `msgspec` is not installed.
+        """
+
+        if msgspec is None:
+            return None
+
+        return _decoding_type(self)
+
+
+
+@lru_cache(maxsize=256)
+def _decoding_type(projection: Projection) -> t.Any:
+    fields = sorted(projection.fields)
+    item_type = t.TypedDict(f"Projection[{','.join(fields)}]", {key: t.Any for key in fields}, total=False)
+
+    if projection.many:
+        return t.List[item_type]
+
+    keys: t.Dict[str, t.Any] = {key: t.Any for key in sorted(projection.fields | projection.keep | {'error'})}
+
+    if projection.items_key is not None:
+        keys[projection.items_key] = t.Optional[t.List[item_type]]
+
+    return t.TypedDict(f"Projection[{','.join(keys)}]", keys, total=False)
@@ -0,0 +1,195 @@
+import typing as t
+
+import time
+import asyncio
+import threading
+
+from dataclasses import dataclass
+
+
+
+class TokenBucket:
+    """
+        A token bucket refilled with `rate` tokens per second, holding at most `burst` tokens.
+
+        Tokens are reserved rather than waited for: `TokenBucket.reserve` always takes a token (the bucket may go into debt)
+        and returns how long the caller has to wait until that token is due. Concurrent callers are thereby queued in order,
+        which smooths bursts instead of rejecting them.
+    """
+
+    def __init__(self, rate: float, burst: float=1.0) -> None:
+        """
+            ### Parameters:
+            - `rate` - Tokens (requests) per second
+            - `burst` - The most tokens that can be saved up - how many requests may be sent at once after a quiet period
+        """
+
+        if rate <= 0:
+            raise ValueError("The rate of a TokenBucket must be positive")
+
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+
+    def reserve(self) -> float:
+        """
+            Takes a token and returns the number of seconds to wait before using it (`0.0` if one is available right away).
+        """
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._tokens + (now - self._updated) * self.rate, self.burst) - 1.0
+            self._updated = now
+
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+
+
+@dataclass
+class RateLimitStats:
+    """
+        Queueing statistics of a `RateLimiter` for a single instance or endpoint group.
+    """
+
+    requests: int = 0
+    """The number of requests that passed the limiter"""
+
+    delayed: int = 0
+    """How many of them had to wait"""
+
+    total_delay: float = 0.0
+    """The total time (in seconds) requests spent waiting"""
+
+    max_delay: float = 0.0
+    """The longest time (in seconds) a request had to wait"""
+
+
+    @property
+    def mean_delay(self) -> float:
+        """
+            The average time (in seconds) requests spent waiting
+        """
+
+        return self.total_delay / self.requests if self.requests else 0.0
+
+
+
+class RateLimiter:
+    """
+        Limits the rate of requests sent to each instance, and optionally to groups of endpoints of each instance.
+
+        ```python
+        # At most 5 requests per second (bursts of 10) to each instance, of which at most 1 per second may be for comments:
+        limiter = RateLimiter(rate=5, burst=10, groups={'/comments/': (1, 1), '/nextpage/comments/': (1, 1)})
+        client = PipedClient(rate_limiter=limiter)
+        ```
+
+        Requests exceeding the rate are delayed, not rejected. How long they waited is tracked in `RateLimiter.stats`.
+    """
+
+    def __init__(self, rate: t.Optional[float]=None, burst: float=1.0, groups: t.Optional[t.Dict[str, t.Tuple[float, float]]]=None) -> None:
+        """
+            ### Parameters:
+            - `rate` - Requests per second to each instance. If this is `None`, only `groups` are limited.
+            - `burst` - How many requests may be sent to an instance at once, after a quiet period
+            - `groups` - `(rate, burst)` limits of endpoint groups, by URI prefix (e. g.: `'/streams/'`). The longest matching prefix is used.
+                Each group is limited separately for each instance, in addition to `rate`.
+        """
+
+        self.rate = rate
+        self.burst = burst
+        self.groups = dict(groups or {})
+
+        self._buckets: t.Dict[t.Tuple[str, t.Optional[str]], TokenBucket] = {}
+        self._stats: t.Dict[t.Tuple[str, t.Optional[str]], RateLimitStats] = {}
+        self._lock = threading.Lock()
+
+
+    def group_for(self, uri: str) -> t.Optional[str]:
+        """
+            Returns the endpoint group (URI prefix) `uri` belongs to, or `None` if it doesn't belong to any.
+        """
+
+        matches = [prefix for prefix in self.groups if uri.startswith(prefix)]
+        return max(matches, key=len) if matches else None
+
+
+    def _bucket(self, key: t.Tuple[str, t.Optional[str]], rate: float, burst: float) -> TokenBucket:
+        bucket = self._buckets.get(key, None)
+
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(rate, burst)
+            self._stats[key] = RateLimitStats()
+
+        return bucket
+
+
+    def reserve(self, base_api_url: str, uri: str) -> float:
+        """
+            Reserves a request to `uri` of an instance and returns the number of seconds to wait before sending it.
+        """
+
+        group = self.group_for(uri)
+        keys = []
+
+        with self._lock:
+            if self.rate is not None:
+                keys.append((base_api_url, None))
+                self._bucket(keys[-1], self.rate, self.burst)
+
+            if group is not None:
+                keys.append((base_api_url, group))
+                self._bucket(keys[-1], *self.groups[group])
+
+        delay = max([self._buckets[key].reserve() for key in keys], default=0.0)
+
+        with self._lock:
+            for key in keys:
+                stats = self._stats[key]
+                stats.requests += 1
+                stats.total_delay += delay
+                stats.max_delay = max(stats.max_delay, delay)
+
+                if delay > 0:
+                    stats.delayed += 1
+
+        return delay
+
+
+    def acquire(self, base_api_url: str, uri: str) -> float:
+        """
+            Blocks until a request to `uri` of an instance may be sent. Returns how long it waited (in seconds).
+        """
+
+        delay = self.reserve(base_api_url, uri)
+
+        if delay > 0:
+            time.sleep(delay)
+
+        return delay
+
+
+    async def aacquire(self, base_api_url: str, uri: str) -> float:
+        """
+            Async version of `RateLimiter.acquire`.
+        """
+
+        delay = self.reserve(base_api_url, uri)
+
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        return delay
+
+
+    def stats(self) -> t.Dict[t.Tuple[str, t.Optional[str]], RateLimitStats]:
+        """
+            Returns a snapshot of the queueing statistics, by `(instance, group)`. The group is `None` for the limit of the whole instance.
+        """
+
+        with self._lock:
+            return {key: RateLimitStats(**vars(stats)) for key, stats in self._stats.items()}
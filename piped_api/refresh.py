@@ -0,0 +1,435 @@
+"""
+    Background refreshes of cached responses, used by the clients together with `piped_api.cache.ResponseCache.stale_ttls`.
+
+    Stale responses are returned right away and handed to a `Refresher`, which fetches them again in a few worker threads.
+    The refresher can also track which keys are requested most (`HotKeys`) and refresh those shortly before they expire,
+    so that popular responses (e. g.: trending videos of a region or a popular channel) are never served stale at all:
+
+    ```python
+    client = PipedClient(cache=ResponseCache(stale_ttls=DEFAULT_STALE_TTLS), refresher=Refresher(hot_keys=100))
+    ```
+"""
+
+import typing as t
+
+import time
+import heapq
+import queue
+import asyncio
+import threading
+
+from dataclasses import dataclass
+
+from .instrumentation import detach
+
+
+_T = t.TypeVar('_T')
+
+Refresh = t.Callable[[], t.Any]
+"""Fetches a response again and caches it"""
+
+ExpiresAt = t.Callable[[], t.Optional[float]]
+"""Returns when the cached response expires (UNIX timestamp), or `None` if it isn't cached"""
+
+
+
+class HotKeys(t.Generic[_T]):
+    """
+        Tracks how often keys are requested. Counts decay exponentially, so keys that stop being requested cool down.
+
+        Each key can carry a value (its latest one is kept). Only about the `capacity` hottest keys are tracked.
+    """
+
+    def __init__(self, capacity: int=1024, half_life: float=300.0) -> None:
+        """
+            ### Parameters:
+            - `capacity` - How many keys to track. Once it is exceeded by a tenth, the coldest keys are forgotten (all at once, so that
+                each request costs about `O(log capacity)`, instead of a scan of all keys once the tracker is full).
+            - `half_life` - Seconds after which the count of a key halves if it is not requested anymore
+        """
+
+        self.capacity = capacity
+        self.half_life = half_life
+
+        self._keys: t.Dict[str, t.Tuple[float, float, t.Optional[_T]]] = {}
+        self._lock = threading.Lock()
+
+
+    def _decayed(self, score: float, updated: float, now: float) -> float:
+        return score * 0.5 ** ((now - updated) / self.half_life)
+
+
+    def record(self, key: str, value: t.Optional[_T]=None) -> None:
+        """
+            Counts a request of `key`.
+        """
+
+        now = time.monotonic()
+
+        with self._lock:
+            score, updated, _ = self._keys.get(key, (0.0, now, None))
+            self._keys[key] = (self._decayed(score, updated, now) + 1.0, now, value)
+
+            if len(self._keys) > self.capacity + max(self.capacity // 10, 1):
+                coldest = heapq.nsmallest(len(self._keys) - self.capacity, self._keys, key=lambda other: self._decayed(*self._keys[other][:2], now))
+
+                for other in coldest:
+                    del self._keys[other]
+
+
+    def score(self, key: str) -> float:
+        """
+            The decayed request count of `key` (`0.0` if it isn't tracked)
+        """
+
+        with self._lock:
+            score, updated, _ = self._keys.get(key, (0.0, 0.0, None))
+
+            return self._decayed(score, updated, time.monotonic())
+
+
+    def hottest(self, count: int) -> t.List[t.Tuple[str, float, t.Optional[_T]]]:
+        """
+            Returns `(key, score, value)` of the `count` most requested keys, hottest first.
+        """
+
+        now = time.monotonic()
+
+        with self._lock:
+            scored = [(key, self._decayed(score, updated, now), value) for key, (score, updated, value) in self._keys.items()]
+
+        return heapq.nlargest(count, scored, key=lambda item: item[1])
+
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+
+@dataclass
+class RefreshStats:
+    """
+        Counters of a `Refresher`.
+    """
+
+    refreshed: int = 0
+    """Successful refreshes"""
+
+    ahead: int = 0
+    """Refreshes of hot keys before they expired (included in `refreshed` and `failed`)"""
+
+    failed: int = 0
+    """Refreshes that raised an error - the stale response is served until one succeeds or it expires for good"""
+
+    dropped: int = 0
+    """Refreshes that were not queued, because `max_pending` were already waiting"""
+
+
+
+@dataclass
+class _Tracked:
+    refresh: t.Callable[[], t.Any]
+    expires_at: ExpiresAt
+    ttl: float
+
+
+
+class _BaseRefresher:
+    def __init__(self, workers: int=2, hot_keys: int=0, refresh_ahead: float=0.2, interval: float=5.0, max_pending: int=1024, tracker: t.Optional[HotKeys[_Tracked]]=None) -> None:
+        """
+            ### Parameters:
+            - `workers` - How many refreshes run at once
+            - `hot_keys` - How many of the most requested keys to refresh before they expire. If this is `0`, keys are only refreshed once stale.
+            - `refresh_ahead` - Which fraction of its time-to-live before expiring a hot key is refreshed (e. g.: `0.2` is 12 minutes before for 1 hour)
+            - `interval` - Seconds between checks for hot keys that are about to expire
+            - `max_pending` - How many refreshes may wait for a worker. Further ones are dropped (see `RefreshStats.dropped`).
+            - `tracker` - The `HotKeys` to track requests with. Defaults to one with default settings.
+        """
+
+        self.workers = workers
+        self.hot_keys = hot_keys
+        self.refresh_ahead = refresh_ahead
+        self.interval = interval
+        self.max_pending = max_pending
+        self.tracker: HotKeys[_Tracked] = tracker if tracker is not None else HotKeys()
+        self.stats = RefreshStats()
+
+        self._pending: t.Set[str] = set()
+        self._lock = threading.Lock()
+
+
+    def _reserve(self, key: str) -> bool:
+        with self._lock:
+            if key in self._pending:
+                return False
+
+            if len(self._pending) >= self.max_pending:
+                self.stats.dropped += 1
+                return False
+
+            self._pending.add(key)
+            return True
+
+
+    def _done(self, key: str, failed: bool, ahead: bool) -> None:
+        with self._lock:
+            self._pending.discard(key)
+
+            self.stats.refreshed += not failed
+            self.stats.failed += failed
+            self.stats.ahead += ahead
+
+
+    def _due(self) -> t.List[t.Tuple[str, _Tracked]]:
+        """
+            Returns the hot keys that expire within `refresh_ahead` of their time-to-live.
+        """
+
+        now = time.time()
+        due = []
+
+        for key, _, tracked in self.tracker.hottest(self.hot_keys):
+            expires_at = tracked.expires_at()
+
+            if expires_at is not None and expires_at - now <= tracked.ttl * self.refresh_ahead:
+                due.append((key, tracked))
+
+        return due
+
+
+
+class Refresher(_BaseRefresher):
+    """
+        Refreshes cached responses for `piped_api.client.PipedClient` in background threads.
+
+        Each key is refreshed once at a time. Threads are only started when they are needed and don't keep the interpreter running.
+    """
+
+    _queue: 't.Optional[queue.Queue[t.Optional[t.Tuple[str, Refresh, bool]]]]' = None
+    _threads: t.List[threading.Thread] = []
+
+
+    def _ensure_started(self) -> 'queue.Queue[t.Optional[t.Tuple[str, Refresh, bool]]]':
+        jobs = self._queue
+
+        if jobs is not None:
+            return jobs
+
+        with self._lock:
+            if self._queue is not None:
+                return self._queue
+
+            jobs: 'queue.Queue[t.Optional[t.Tuple[str, Refresh, bool]]]' = queue.Queue()
+            self._stopped = threading.Event()
+            threads = [threading.Thread(target=self._work, args=(jobs,), name="piped-api-refresh", daemon=True) for _ in range(self.workers)]
+
+            if self.hot_keys > 0:
+                threads.append(threading.Thread(target=self._scan, args=(self._stopped,), name="piped-api-refresh-ahead", daemon=True))
+
+            for thread in threads:
+                thread.start()
+
+            self._queue = jobs
+            self._threads = threads
+            return jobs
+
+
+    def submit(self, key: str, refresh: Refresh, ahead: bool=False) -> bool:
+        """
+            Queues `refresh` of `key`, unless it is queued (or running) already. Returns whether it was queued.
+        """
+
+        if not self._reserve(key):
+            return False
+
+        self._ensure_started().put((key, refresh, ahead))
+
+        return True
+
+
+    def track(self, key: str, refresh: Refresh, expires_at: ExpiresAt, ttl: float) -> None:
+        """
+            Counts a request of `key`, so that it is refreshed ahead of expiring if it is one of the `hot_keys`.
+        """
+
+        if self.hot_keys > 0:
+            self.tracker.record(key, _Tracked(refresh, expires_at, ttl))
+            self._ensure_started()
+
+
+    def refresh_due(self) -> int:
+        """
+            Queues refreshes of hot keys that are about to expire (done every `interval` seconds in the background) and returns how many were queued.
+        """
+
+        return sum(self.submit(key, tracked.refresh, ahead=True) for key, tracked in self._due())
+
+
+    def _work(self, jobs: 'queue.Queue[t.Optional[t.Tuple[str, Refresh, bool]]]') -> None:
+        while True:
+            job = jobs.get()
+
+            if job is None:
+                return
+
+            key, refresh, ahead = job
+
+            try:
+                refresh()
+
+            except Exception:
+                self._done(key, True, ahead)
+
+            else:
+                self._done(key, False, ahead)
+
+
+    def _scan(self, stopped: threading.Event) -> None:
+        while not stopped.wait(self.interval):
+            self.refresh_due()
+
+
+    def join(self, timeout: t.Optional[float]=None) -> bool:
+        """
+            Waits until no refreshes are pending (or until `timeout` seconds pass) and returns whether they all finished.
+        """
+
+        deadline = time.monotonic() + timeout if timeout is not None else None
+
+        while self._pending:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+
+            time.sleep(0.01)
+
+        return True
+
+
+    def close(self, timeout: t.Optional[float]=None) -> None:
+        """
+            Stops the background threads, waiting until the queued refreshes are finished (or until `timeout` seconds pass).
+        """
+
+        with self._lock:
+            if self._queue is None:
+                return
+
+            jobs, self._queue = self._queue, None
+            threads, self._threads = self._threads, []
+            self._stopped.set()
+
+        for _ in range(self.workers):
+            jobs.put(None)
+
+        deadline = time.monotonic() + timeout if timeout is not None else None
+
+        for thread in threads:
+            # A refresh may close its own client:
+            if thread is not threading.current_thread():
+                thread.join(max(deadline - time.monotonic(), 0.0) if deadline is not None else None)
+
+
+
+class AsyncRefresher(_BaseRefresher):
+    """
+        Refreshes cached responses for `piped_api.async_client.AsyncPipedClient` in background tasks of the running event loop.
+    """
+
+    def __init__(self, workers: int=2, hot_keys: int=0, refresh_ahead: float=0.2, interval: float=5.0, max_pending: int=1024, tracker: t.Optional[HotKeys[_Tracked]]=None) -> None:
+        """
+            See `Refresher`.
+        """
+
+        super().__init__(workers, hot_keys, refresh_ahead, interval, max_pending, tracker)
+
+        self._tasks: t.Set['asyncio.Task[t.Any]'] = set()
+        self._scanner: t.Optional['asyncio.Task[None]'] = None
+        self._semaphore: t.Optional[asyncio.Semaphore] = None
+
+
+    def submit(self, key: str, refresh: t.Callable[[], t.Awaitable[t.Any]], ahead: bool=False) -> bool:
+        """
+            Schedules `refresh` of `key`, unless it is scheduled (or running) already. Returns whether it was scheduled.
+        """
+
+        if not self._reserve(key):
+            return False
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.workers)
+
+
+        async def run() -> None:
+            # Tasks inherit the context of the call that scheduled them, which shouldn't be charged for the refresh:
+            detach()
+
+            async with self._semaphore:
+                try:
+                    await refresh()
+
+                except Exception:
+                    self._done(key, True, ahead)
+
+                else:
+                    self._done(key, False, ahead)
+
+
+        task = asyncio.ensure_future(run())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+        return True
+
+
+    def track(self, key: str, refresh: t.Callable[[], t.Awaitable[t.Any]], expires_at: ExpiresAt, ttl: float) -> None:
+        """
+            Counts a request of `key`, so that it is refreshed ahead of expiring if it is one of the `hot_keys`.
+        """
+
+        if self.hot_keys <= 0:
+            return
+
+        self.tracker.record(key, _Tracked(refresh, expires_at, ttl))
+
+        if self._scanner is None:
+            self._scanner = asyncio.ensure_future(self._scan())
+
+
+    def refresh_due(self) -> int:
+        """
+            Schedules refreshes of hot keys that are about to expire (done every `interval` seconds in the background) and returns how many were scheduled.
+        """
+
+        return sum(self.submit(key, tracked.refresh, ahead=True) for key, tracked in self._due())
+
+
+    async def _scan(self) -> None:
+        detach()
+
+        while True:
+            await asyncio.sleep(self.interval)
+
+            # Looking up when the hot keys expire may block (e. g.: with an `SQLiteCache`), so it is done in a thread:
+            for key, tracked in await asyncio.to_thread(self._due):
+                self.submit(key, tracked.refresh, ahead=True)
+
+
+    async def join(self) -> None:
+        """
+            Waits until no refreshes are pending.
+        """
+
+        while self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+    async def aclose(self) -> None:
+        """
+            Stops refreshing hot keys and waits for pending refreshes to finish.
+        """
+
+        if self._scanner is not None:
+            self._scanner.cancel()
+            self._scanner = None
+
+        await self.join()
@@ -0,0 +1,170 @@
+import typing as t
+
+import math
+import random
+import threading
+
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from .instances import TRANSIENT_STATUS_CODES
+
+
+
+def parse_retry_after(value: t.Optional[str]) -> t.Optional[float]:
+    """
+        Parses the value of a `Retry-After` header (either seconds or an HTTP date) into seconds from now.
+        Returns `None` if the header is missing or invalid.
+    """
+
+    if not value:
+        return None
+
+    try:
+        seconds = float(value)
+
+    except ValueError:
+        pass
+
+    else:
+        # `float` also parses "nan" and "inf", which can't be waited for:
+        return max(seconds, 0.0) if math.isfinite(seconds) else None
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+
+    except (TypeError, ValueError):
+        return None
+
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+
+class RetryBudget:
+    """
+        Limits retries to a fraction of all requests, so that retries can't multiply the load on an instance that is already failing.
+
+        Each request deposits `ratio` tokens and each retry withdraws one, with at most `reserve` tokens saved up.
+        Share one budget between clients to limit their retries together.
+    """
+
+    def __init__(self, ratio: float=0.2, reserve: float=10.0) -> None:
+        """
+            ### Parameters:
+            - `ratio` - How many retries each request earns (e. g.: `0.2` allows one retry per five requests)
+            - `reserve` - The number of tokens the budget starts with, and the most it can save up
+        """
+
+        self.ratio = ratio
+        self.reserve = reserve
+        self.tokens = reserve
+
+        self.exhausted = 0
+        """How many retries were denied, because the budget ran out"""
+
+        self._lock = threading.Lock()
+
+
+    def deposit(self) -> None:
+        """
+            Records a request.
+        """
+
+        with self._lock:
+            self.tokens = min(self.tokens + self.ratio, self.reserve)
+
+
+    def withdraw(self) -> bool:
+        """
+            Takes a token for a retry. Returns `False` if there is none left.
+        """
+
+        with self._lock:
+            if self.tokens < 1.0:
+                self.exhausted += 1
+                return False
+
+            self.tokens -= 1.0
+            return True
+
+
+
+class RetryPolicy:
+    """
+        Decides whether (and after how long) a failed request should be retried.
+
+        Connection errors, timeouts and responses with one of `statuses` are retried, with exponential backoff and full jitter
+        (a random delay between `0` and `backoff * 2 ** (attempt - 1)` seconds). A `Retry-After` header sent by the instance is
+        honoured instead, unless it asks to wait longer than `max_backoff`.
+    """
+
+    def __init__(self, max_attempts: int=3, backoff: float=0.5, max_backoff: float=30.0, statuses: t.Collection[int]=TRANSIENT_STATUS_CODES, budget: t.Optional[RetryBudget]=None) -> None:
+        """
+            ### Parameters:
+            - `max_attempts` - The maximum number of attempts per request, including the first one
+            - `backoff` - The maximum delay (in seconds) before the first retry. This doubles with each following retry.
+            - `max_backoff` - The maximum delay (in seconds) before any retry
+            - `statuses` - HTTP status codes to retry
+            - `budget` - The `RetryBudget` to take retries from. If this is `None`, a new budget is created.
+        """
+
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.statuses = frozenset(statuses)
+        self.budget = budget if budget is not None else RetryBudget()
+
+
+    def record_request(self) -> None:
+        """
+            Records a new (first attempt of a) request, see `RetryBudget.deposit`.
+        """
+
+        self.budget.deposit()
+
+
+    def allow_failover(self, attempt: int) -> bool:
+        """
+            Whether a request that failed on one instance of a `piped_api.instances.InstancePool` may be sent to another one right away.
+            Fail-overs count as attempts and take from the budget like retries do.
+
+            ### Parameters:
+            - `attempt` - The number of the attempt that failed, starting at `1`
+        """
+
+        return attempt < self.max_attempts and self.budget.withdraw()
+
+
+    def delay(self, attempt: int, status_code: t.Optional[int]=None, retry_after: t.Optional[str]=None) -> t.Optional[float]:
+        """
+            Returns for how long to wait before retrying a failed request, or `None` if it should not be retried.
+
+            ### Parameters:
+            - `attempt` - The number of the attempt that failed, starting at `1`
+            - `status_code` - The status code of the response, or `None` if the attempt failed with a connection error or timeout
+            - `retry_after` - The value of the `Retry-After` header of the response
+        """
+
+        if attempt >= self.max_attempts or (status_code is not None and status_code not in self.statuses):
+            return None
+
+        delay = parse_retry_after(retry_after)
+
+        if delay is None:
+            delay = random.uniform(0, min(self.backoff * 2 ** (attempt - 1), self.max_backoff))
+
+        elif delay > self.max_backoff:
+            return None
+
+        if not self.budget.withdraw():
+            return None
+
+        return delay
+
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
+"""The retry policy of clients by default - its budget is shared by all of them"""
@@ -0,0 +1,178 @@
+"""
+    Typed structs for Piped API responses, decoded (and validated) in a single pass with [msgspec](https://jcristharif.com/msgspec/).
+
+    This is an alternative to the models in `piped_api.models`: instead of wrapping the raw JSON `dict` and converting values
+    on each property access, a response is decoded straight from bytes into these structs, with all values already converted.
+    Fields that are not declared on a struct are skipped while decoding, and responses that don't match the schema
+    raise `ValidationError` right away.
+
+    To decode only the fields you need, declare your own struct:
+
+    ```python
+    class VideoViews(Struct, rename='camel'):
+        title: str
+        views: int
+
+    video = client.get_video_struct(video_id, struct=VideoViews)
+    ```
+
+    Requires the `typed` extra (`pip install piped-api[typed]`).
+"""
+
+import typing as t
+
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+try:
+    import msgspec
+
+except ImportError:
+    raise ImportError("piped_api.schema requires `msgspec` - install it with `pip install piped-api[typed]`") from None
+
+from msgspec import Struct, ValidationError, field
+
+
+_S = t.TypeVar('_S', bound=Struct)
+
+
+
+class Seconds(timedelta):
+    """
+        A `datetime.timedelta`, decoded from a number of seconds
+    """
+
+
+
+class MillisecondTimestamp(datetime):
+    """
+        A (naive, local) `datetime.datetime`, decoded from milliseconds since epoch
+    """
+
+
+
+def _decode_hook(type: t.Type[t.Any], obj: t.Any) -> t.Any:
+    if type is Seconds:
+        return Seconds(seconds=obj)
+
+    if type is MillisecondTimestamp:
+        return MillisecondTimestamp.fromtimestamp(obj / 1000)
+
+    raise NotImplementedError(f"Unsupported type: {type!r}")
+
+
+
+class Video(Struct, rename='camel', gc=False):
+    """
+        Typed counterpart of `piped_api.models.videos.Video`
+    """
+
+    class Stream(Struct, rename='camel', gc=False):
+        """
+            Typed counterpart of `piped_api.models.videos.Video.Stream`
+        """
+
+        url: str
+        format: str
+        quality: str
+        mime_type: str
+        codec: t.Optional[str]
+        video_only: bool
+        bitrate: int
+        init_start: int
+        init_end: int
+        index_start: int
+        index_end: int
+        width: int
+        height: int
+        fps: int
+
+
+    class RelatedStream(Struct, rename='camel', gc=False):
+        """
+            Typed counterpart of `piped_api.models.videos.Video.RelatedStream`
+        """
+
+        url: str
+        title: str
+        thumbnail: str
+        uploader_name: str
+        uploader_url: str
+        uploader_avatar: t.Optional[str]
+        uploaded_date: t.Optional[str]
+        short_description: t.Optional[str]
+        duration: Seconds
+        views: int
+        uploaded: MillisecondTimestamp
+        uploader_verified: bool
+
+
+    class Subtitle(Struct, rename='camel', gc=False):
+        """
+            Typed counterpart of `piped_api.models.videos.Video.Subtitle`
+        """
+
+        url: str
+        mime_type: str
+        name: str
+        code: str
+        auto_generated: bool
+
+
+    class Chapter(Struct, rename='camel', gc=False):
+        """
+            Typed counterpart of `piped_api.models.videos.Video.Chapter`
+        """
+
+        title: str
+        image: str
+        start: Seconds
+
+
+    title: str
+    description: str
+    upload_date: date
+    uploader: str
+    uploader_url: str
+    uploader_avatar: str
+    thumbnail_url: str
+    hls: t.Optional[str]
+    dash: t.Optional[str]
+    lbry_id: t.Optional[str]
+    uploader_verified: bool
+    duration: Seconds
+    views: int
+    likes: int
+    dislikes: int
+    audio_streams: t.List['Video.Stream']
+    video_streams: t.List['Video.Stream']
+    related_videos: t.List['Video.RelatedStream'] = field(name='relatedStreams')
+    subtitles: t.List['Video.Subtitle'] = field(default_factory=list)
+    livestream: bool = False
+    proxy_url: t.Optional[str] = None
+    chapters: t.List['Video.Chapter'] = field(default_factory=list)
+
+
+
+@lru_cache(maxsize=None)
+def _decoder(struct: t.Type[_S]) -> 'msgspec.json.Decoder[_S]':
+    return msgspec.json.Decoder(struct, dec_hook=_decode_hook)
+
+
+
+def decode(content: bytes, struct: t.Type[_S]) -> _S:
+    """
+        Decodes a raw JSON response body into `struct`.
+
+        ### Parameters:
+        - `content` - The raw response body
+        - `struct` - The struct to decode into (e. g.: `Video`, or a custom one with fewer fields)
+    """
+
+    return _decoder(struct).decode(content)
+
+
+
+# Supress unused-import warnings:
+if t.TYPE_CHECKING:
+    _ = [ValidationError]
@@ -0,0 +1,104 @@
+import typing as t
+
+import asyncio
+import threading
+
+
+_T = t.TypeVar('_T')
+
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: t.Any = None
+        self.error: t.Optional[BaseException] = None
+
+
+
+class SingleFlight:
+    """
+        Collapses concurrent identical calls (from multiple threads) into one.
+
+        While a call for some key is in flight, every other call for the same key waits for it and receives
+        the same result (or exception) instead of doing the work again.
+    """
+
+    def __init__(self) -> None:
+        self.collapsed = 0
+        """The number of calls that were served by another in-flight call"""
+
+        self._calls: t.Dict[t.Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+
+    def do(self, key: t.Hashable, function: t.Callable[[], _T]) -> _T:
+        """
+            Calls `function`, unless a call with the same `key` is already in flight - then waits for its result instead.
+        """
+
+        with self._lock:
+            call = self._calls.get(key, None)
+
+            if call is not None:
+                self.collapsed += 1
+                leader = False
+
+            else:
+                call = self._calls[key] = _Call()
+                leader = True
+
+
+        if leader:
+            try:
+                call.result = function()
+
+            except BaseException as error:
+                call.error = error
+
+            finally:
+                with self._lock:
+                    del self._calls[key]
+
+                call.done.set()
+
+        else:
+            call.done.wait()
+
+
+        if call.error is not None:
+            raise call.error
+
+        return call.result
+
+
+
+class AsyncSingleFlight:
+    """
+        Collapses concurrent identical calls (from the same event loop) into one. See `SingleFlight`.
+    """
+
+    def __init__(self) -> None:
+        self.collapsed = 0
+        """The number of calls that were served by another in-flight call"""
+
+        self._tasks: t.Dict[t.Hashable, 'asyncio.Task[t.Any]'] = {}
+
+
+    async def do(self, key: t.Hashable, function: t.Callable[[], t.Awaitable[_T]]) -> _T:
+        """
+            Awaits `function()`, unless a call with the same `key` is already in flight - then waits for its result instead.
+
+            Cancelling one of the waiting callers doesn't cancel the shared call.
+        """
+
+        task = self._tasks.get(key, None)
+
+        if task is not None:
+            self.collapsed += 1
+
+        else:
+            task = self._tasks[key] = asyncio.ensure_future(function())
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+
+        return await asyncio.shield(task)
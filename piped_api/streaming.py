@@ -0,0 +1,216 @@
+import re
+import typing as t
+
+from .decoders import Decoder
+from .models import BasePipedModel
+
+
+_M = t.TypeVar('_M', bound=BasePipedModel)
+
+_STRUCTURE = re.compile(rb'["{}\[\]]')
+_STRING_END = re.compile(rb'["\\]')
+
+_QUOTE, _BACKSLASH, _OPEN_OBJECT, _OPEN_ARRAY, _CLOSE_OBJECT = b'"\\{[}'
+
+
+
+class ArraySplitter:
+    """
+        Incrementally extracts the elements of one array from a JSON object, as raw bytes, while the object is still being received.
+
+        Only the array `key` of the top-level object is split (its elements must be objects). Everything else (the "envelope",
+        e. g.: `nextpage`) is collected and can be decoded once all data was fed, with the array left empty.
+        Memory usage is bounded by the size of the envelope plus one element.
+    """
+
+    def __init__(self, key: str) -> None:
+        """
+            ### Parameters:
+            - `key` - The key of the array to split (e. g.: `'comments'`)
+        """
+
+        self.key = key.encode()
+
+        self._buffer = b''
+        self._envelope = b''
+        self._position = 0
+        self._mark = 0
+        self._depth = 0
+        self._in_string = False
+        self._string_start = 0
+        self._last_key: t.Optional[bytes] = None
+        self._in_array = False
+        self._array_done = False
+        self._item_start: t.Optional[int] = None
+
+
+    def feed(self, chunk: bytes) -> t.List[bytes]:
+        """
+            Feeds the next chunk of data and returns the raw elements that were completed by it.
+        """
+
+        buffer = self._buffer = self._buffer + chunk
+        position = self._position
+        items: t.List[bytes] = []
+
+        while True:
+            if self._in_string:
+                match = _STRING_END.search(buffer, position)
+
+                if match is None:
+                    position = len(buffer)
+                    break
+
+                if buffer[match.start()] == _BACKSLASH:
+                    if match.end() >= len(buffer):
+                        position = match.start()
+                        break
+
+                    position = match.end() + 1
+                    continue
+
+                self._in_string = False
+                position = match.end()
+
+                if self._depth == 1:
+                    self._last_key = buffer[self._string_start:match.start()]
+
+                continue
+
+
+            match = _STRUCTURE.search(buffer, position)
+
+            if match is None:
+                position = len(buffer)
+                break
+
+            char, position = buffer[match.start()], match.end()
+
+            if char == _QUOTE:
+                self._in_string = True
+                self._string_start = position
+
+            elif char == _OPEN_OBJECT or char == _OPEN_ARRAY:
+                self._depth += 1
+
+                if self._in_array and self._depth == 3:
+                    self._item_start = match.start()
+
+                elif self._depth == 2 and char == _OPEN_ARRAY and not self._array_done and self._last_key == self.key:
+                    self._in_array = True
+                    self._envelope += buffer[self._mark:position]
+                    self._mark = position
+
+            else:
+                self._depth -= 1
+
+                if self._in_array and self._depth == 2 and char == _CLOSE_OBJECT:
+                    items.append(buffer[self._item_start:position])
+                    self._item_start = None
+
+                elif self._in_array and self._depth == 1:
+                    self._in_array, self._array_done = False, True
+                    self._mark = match.start()
+
+
+        # Inside of the array, only the element being received is kept:
+        if self._in_array:
+            cut = self._item_start if self._item_start is not None else position
+            buffer, position = buffer[cut:], position - cut
+            self._string_start -= cut
+            self._mark = 0
+
+            if self._item_start is not None:
+                self._item_start = 0
+
+        self._buffer, self._position = buffer, position
+
+        return items
+
+
+    def envelope(self) -> bytes:
+        """
+            Returns the raw object without the elements of the array. Call this after all data was fed.
+        """
+
+        return self._envelope + self._buffer[self._mark:]
+
+
+
+class StreamedPage(t.Generic[_M]):
+    """
+        A page of items (e. g.: `Comments.Comment`s) which are parsed and yielded while the response is still being downloaded.
+
+        Iterate over it to get the items. Once the iteration finishes, the rest of the page (everything except the items, e. g.: `nextpage`)
+        is available as `StreamedPage.rest`.
+    """
+
+    def __init__(self, chunks: t.Iterable[bytes], items_key: str, item_model: t.Type[_M], rest_model: t.Type[BasePipedModel], decode: Decoder, check: t.Callable[[t.Any], None]) -> None:
+        """
+            ### Parameters:
+            - `chunks` - The response body, in chunks
+            - `items_key` - The key of the items array in the response
+            - `item_model` - The model to load each item into
+            - `rest_model` - The model to load the rest of the page into
+            - `decode` - The JSON decoder to decode each item (and the rest of the page) with
+            - `check` - Called with the decoded rest of the page before it is loaded into `rest_model`, to raise API errors
+        """
+
+        self._chunks = chunks
+        self._splitter = ArraySplitter(items_key)
+        self._item_model, self._rest_model = item_model, rest_model
+        self._decode, self._check = decode, check
+        self._rest: t.Optional[BasePipedModel] = None
+
+
+    def _finish(self) -> None:
+        rest = self._decode(self._splitter.envelope())
+        self._check(rest)
+        self._rest = self._rest_model(rest)
+
+
+    def __iter__(self) -> t.Iterator[_M]:
+        for chunk in self._chunks:
+            for item in self._splitter.feed(chunk):
+                yield self._item_model(self._decode(item))
+
+        self._finish()
+
+
+    @property
+    def rest(self) -> BasePipedModel:
+        """
+            The rest of the page, with an empty list of items. Only available after the iteration finished.
+        """
+
+        if self._rest is None:
+            raise RuntimeError("The rest of the page is available only after iterating over all of its items")
+
+        return self._rest
+
+
+    @property
+    def nextpage(self) -> t.Optional[str]:
+        """
+            Shortcut for the `nextpage` of `StreamedPage.rest`
+        """
+
+        return self.rest.data['nextpage']
+
+
+
+class AsyncStreamedPage(StreamedPage[_M]):
+    """
+        Async version of `StreamedPage` - iterate over it with `async for`.
+    """
+
+    def __iter__(self) -> t.Iterator[_M]:
+        raise TypeError("Use `async for` to iterate over an AsyncStreamedPage")
+
+
+    async def __aiter__(self) -> t.AsyncIterator[_M]:
+        async for chunk in self._chunks:
+            for item in self._splitter.feed(chunk):
+                yield self._item_model(self._decode(item))
+
+        self._finish()
@@ -0,0 +1,396 @@
+"""
+    A local stand-in for a Piped instance, to test and benchmark code using this package offline and deterministically.
+
+    `MockPipedServer` serves payloads from route handlers or from a directory of fixtures, which can be recorded from a real
+    instance with `record_fixtures` (or `python -m piped_api.testing record`). Latency, errors and payload size are configurable:
+
+    ```python
+    with MockPipedServer(fixtures='fixtures/', latency=(0.05, 0.2), error_rate=0.01) as server:
+        client = PipedClient(server.url)
+    ```
+"""
+
+import typing as t
+
+import json
+import time
+import sys
+import random
+import hashlib
+import argparse
+import threading
+
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, urlencode, quote
+
+from requests import Session
+
+from .client import _raise_for_error
+
+
+Handler = t.Callable[[str, t.Dict[str, str]], t.Any]
+"""Receives the path and the query parameters of a request and returns the JSON payload to serve,
+or a `(status, payload)` / `(status, payload, headers)` tuple. `bytes` payloads are served as they are."""
+
+_SCALED_KEYS = ('relatedStreams', 'comments')
+
+
+
+def fixture_path(directory: t.Union[str, Path], path: str, query: t.Optional[t.Dict[str, str]]=None) -> Path:
+    """
+        Returns the file a response for `path` (with `query` parameters) is stored in, inside a fixtures `directory`.
+
+        For example, `/streams/dQw4w9WgXcQ` is stored in `streams/dQw4w9WgXcQ.json` and `/trending?region=US` in `trending/@region=US.json`.
+        Overly long names (e. g.: of `nextpage` requests) are hashed.
+    """
+
+    parts = [quote(part, safe='') for part in path.strip("/").split("/")]
+
+    if len(parts) == 1:
+        parts.append('')
+
+    name = parts[-1]
+
+    if query:
+        name += '@' + urlencode(sorted(query.items()))
+
+    if len(name) > 100:
+        name = hashlib.sha1(name.encode()).hexdigest()
+
+    return Path(directory, *parts[:-1], f"{name}.json")
+
+
+
+def _scale(payload: t.Any, factor: int) -> t.Any:
+    """
+        Repeats the items of list payloads (e. g.: comments or related videos) `factor` times.
+    """
+
+    if factor == 1:
+        return payload
+
+    if isinstance(payload, list):
+        return payload * factor
+
+    if isinstance(payload, dict):
+        return {key: value * factor if key in _SCALED_KEYS and isinstance(value, list) else value for key, value in payload.items()}
+
+    return payload
+
+
+
+class MockPipedServer:
+    """
+        A local HTTP server standing in for a Piped instance.
+
+        Each request is answered by the first matching route of `routes`, or else from `fixtures`. If there is no fixture recorded
+        for the exact request, a fixture of the same endpoint is picked instead (always the same one for the same path),
+        so any video or channel ID can be requested.
+    """
+
+    def __init__(self, routes: t.Optional[t.Dict[str, Handler]]=None, fixtures: t.Optional[t.Union[str, Path]]=None, latency: t.Union[float, t.Tuple[float, float]]=0.0, error_rate: float=0.0, error_status: int=503, payload_scale: int=1, chunk_size: t.Optional[int]=None, chunk_delay: float=0.0, seed: int=0, port: int=0) -> None:
+        """
+            ### Parameters:
+            - `routes` - Maps path prefixes (e. g.: `'/streams/'`) to `Handler`s
+            - `fixtures` - The directory of recorded responses, see `fixture_path` and `record_fixtures`
+            - `latency` - Seconds to wait before answering each request, or a `(min, max)` range to pick from at random
+            - `error_rate` - The fraction of requests (`0.0` - `1.0`) to answer with `error_status` instead
+            - `error_status` - The status code of injected errors
+            - `payload_scale` - How many times to repeat the items of list payloads (comments, related videos, trending videos...), to make them larger
+            - `chunk_size` - If set, response bodies are sent in chunks of that size, `chunk_delay` seconds apart
+            - `chunk_delay` - Seconds between chunks
+            - `seed` - Seed of the random latencies and errors
+            - `port` - The port to listen on. If this is `0`, a free port is picked.
+        """
+
+        self.routes = dict(routes or {})
+        self.fixtures = Path(fixtures) if fixtures is not None else None
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.payload_scale = payload_scale
+        self.chunk_size, self.chunk_delay = chunk_size, chunk_delay
+
+        self.hits: t.Dict[str, int] = {}
+        """The number of requests received, by path"""
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._loaded: t.Dict[Path, t.Any] = {}
+
+        server = self
+
+        class _RequestHandler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def do_GET(self) -> None:
+                split = urlsplit(self.path)
+                query = {key: values[0] for key, values in parse_qs(split.query).items()}
+
+                with server._lock:
+                    server.hits[split.path] = server.hits.get(split.path, 0) + 1
+                    delay = server.latency if isinstance(server.latency, (int, float)) else server._random.uniform(*server.latency)
+                    failed = server.error_rate > 0 and server._random.random() < server.error_rate
+
+                if delay:
+                    time.sleep(delay)
+
+                if failed:
+                    status, payload, headers = server.error_status, {'error': f'Injected error ({server.error_status})'}, {}
+
+                else:
+                    status, payload, headers = server.respond(split.path, query)
+
+                if isinstance(payload, bytes):
+                    body, content_type = payload, 'text/html'
+
+                else:
+                    body, content_type = json.dumps(payload).encode(), 'application/json'
+
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+
+                for name, value in headers.items():
+                    self.send_header(name, value)
+
+                self.end_headers()
+
+                if server.chunk_size is None:
+                    self.wfile.write(body)
+                    return
+
+                for start in range(0, len(body), server.chunk_size):
+                    self.wfile.write(body[start:start + server.chunk_size])
+                    self.wfile.flush()
+                    time.sleep(server.chunk_delay)
+
+
+            def log_message(self, *_: t.Any) -> None:
+                pass
+
+
+        class _Server(ThreadingHTTPServer):
+            daemon_threads = True
+            request_queue_size = 512
+
+
+            def handle_error(self, request: t.Any, client_address: t.Any) -> None:
+                # Clients hanging up early (e. g.: after timing out) are expected, don't print their tracebacks:
+                if isinstance(sys.exc_info()[1], ConnectionError):
+                    return
+
+                super().handle_error(request, client_address)
+
+
+        self._server = _Server(('127.0.0.1', port), _RequestHandler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+
+    def _find_fixture(self, path: str, query: t.Dict[str, str]) -> t.Optional[Path]:
+        exact = fixture_path(self.fixtures, path, query)
+
+        if exact.is_file():
+            return exact
+
+        candidates = sorted(exact.parent.glob('*.json')) if exact.parent.is_dir() else []
+
+        if not candidates:
+            return None
+
+        return candidates[int(hashlib.sha1(path.encode()).hexdigest(), 16) % len(candidates)]
+
+
+    def respond(self, path: str, query: t.Dict[str, str]) -> t.Tuple[int, t.Any, t.Dict[str, str]]:
+        """
+            Returns the `(status, payload, headers)` to answer a request with (without injected latency and errors).
+        """
+
+        for prefix, handler in self.routes.items():
+            if path.startswith(prefix):
+                payload = handler(path, query)
+
+                if isinstance(payload, tuple):
+                    return (payload + ({},))[:3]
+
+                return 200, _scale(payload, self.payload_scale), {}
+
+        fixture = self._find_fixture(path, query) if self.fixtures is not None else None
+
+        if fixture is not None:
+            if fixture not in self._loaded:
+                self._loaded[fixture] = json.loads(fixture.read_bytes())
+
+            return 200, _scale(self._loaded[fixture], self.payload_scale), {}
+
+        return 404, {'error': f'No route for {path}'}, {}
+
+
+    @property
+    def url(self) -> str:
+        """
+            The base API URL of the server, to pass to `piped_api.client.PipedClient`
+        """
+
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+    def start(self) -> 'MockPipedServer':
+        """
+            Starts serving in a background (daemon) thread.
+        """
+
+        self._thread.start()
+        return self
+
+
+    def serve_forever(self) -> None:
+        """
+            Serves in the current thread, until interrupted.
+        """
+
+        try:
+            self._server.serve_forever()
+
+        except KeyboardInterrupt:
+            self._server.server_close()
+
+
+    def stop(self) -> None:
+        """
+            Stops serving and closes the socket.
+        """
+
+        self._server.shutdown()
+        self._server.server_close()
+
+
+    def __enter__(self) -> 'MockPipedServer':
+        return self.start()
+
+
+    def __exit__(self, *_: t.Any) -> None:
+        self.stop()
+
+
+
+def record_fixtures(base_api_url: str, directory: t.Union[str, Path], video_ids: t.Iterable[str]=(), channel_ids: t.Iterable[str]=(), channel_names: t.Iterable[str]=(), regions: t.Iterable[str]=(), queries: t.Iterable[str]=(), pages: int=2, session: t.Optional[Session]=None) -> t.List[Path]:
+    """
+        Records responses of a real instance into a fixtures `directory` for `MockPipedServer`. Returns the written files.
+        Raises `requests.HTTPError` (or `piped_api.client.APIError` for errors sent with a status of 200) on the first unsuccessful response -
+        the fixtures recorded until then are kept.
+
+        ### Parameters:
+        - `base_api_url` - The base URL of the instance's API to record from
+        - `directory` - The directory to write the fixtures to
+        - `video_ids` - Videos to record the streams and comments of
+        - `channel_ids` - Channels to record by their ID
+        - `channel_names` - Channels to record by their name
+        - `regions` - Country codes to record trending videos of
+        - `queries` - Search queries to record suggestions for
+        - `pages` - How many pages of comments and channel videos to record (following `nextpage`)
+        - `session` - The `requests.Session` to record with. If this is `None`, a new one is used.
+    """
+
+    base_api_url = base_api_url.strip("/")
+    session = session if session is not None else Session()
+    written: t.List[Path] = []
+
+    def record(path: str, query: t.Optional[t.Dict[str, str]]=None) -> t.Any:
+        response = session.get(f"{base_api_url}{path}", params=query, timeout=30)
+
+        # Don't record errors (or anything that isn't JSON) as fixtures - Piped also sends some errors with a status of 200:
+        response.raise_for_status()
+        data = response.json()
+        _raise_for_error(data, path)
+
+        target = fixture_path(directory, path, query)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(response.content)
+        written.append(target)
+
+        return data
+
+
+    def record_pages(path: str, nextpage_path: str) -> None:
+        page = record(path)
+
+        for _ in range(pages - 1):
+            if not isinstance(page, dict) or page.get('nextpage', None) is None:
+                break
+
+            page = record(nextpage_path, {'nextpage': page['nextpage']})
+
+
+    for video_id in video_ids:
+        record(f"/streams/{video_id}")
+        record_pages(f"/comments/{video_id}", f"/nextpage/comments/{video_id}")
+
+    for channel_id in channel_ids:
+        record_pages(f"/channel/{channel_id}", f"/nextpage/channel/{channel_id}")
+
+    for channel_name in channel_names:
+        record(f"/c/{channel_name}")
+
+    for region in regions:
+        record("/trending", {'region': region.upper()})
+
+    for search_query in queries:
+        record("/suggestions", {'query': search_query})
+
+    return written
+
+
+
+def main(arguments: t.Optional[t.List[str]]=None) -> None:
+    """
+        `python -m piped_api.testing record|serve ...`
+    """
+
+    parser = argparse.ArgumentParser(prog='python -m piped_api.testing', description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record = commands.add_parser('record', help='Record fixtures from a real instance')
+    record.add_argument('directory')
+    record.add_argument('--instance', default='https://pipedapi.kavin.rocks')
+    record.add_argument('--video', action='append', default=[], help='A video ID to record (repeatable)')
+    record.add_argument('--channel', action='append', default=[], help='A channel ID to record (repeatable)')
+    record.add_argument('--channel-name', action='append', default=[], help='A channel name to record (repeatable)')
+    record.add_argument('--region', action='append', default=[], help='A country code to record trending videos of (repeatable)')
+    record.add_argument('--query', action='append', default=[], help='A search query to record suggestions for (repeatable)')
+    record.add_argument('--pages', type=int, default=2)
+
+    serve = commands.add_parser('serve', help='Serve recorded fixtures')
+    serve.add_argument('directory')
+    serve.add_argument('--port', type=int, default=8080)
+    serve.add_argument('--latency', type=float, nargs='+', default=[0.0], help='Seconds, or a min and max')
+    serve.add_argument('--error-rate', type=float, default=0.0)
+    serve.add_argument('--payload-scale', type=int, default=1)
+
+    arguments = parser.parse_args(arguments)
+
+    if arguments.command == 'record':
+        written = record_fixtures(
+            arguments.instance, arguments.directory, arguments.video, arguments.channel, arguments.channel_name,
+            arguments.region, arguments.query, arguments.pages
+        )
+
+        print(f"Recorded {len(written)} fixtures into {arguments.directory}")
+        return
+
+    latency = arguments.latency[0] if len(arguments.latency) == 1 else tuple(arguments.latency[:2])
+    server = MockPipedServer(
+        fixtures=arguments.directory, latency=latency, error_rate=arguments.error_rate,
+        payload_scale=arguments.payload_scale, port=arguments.port
+    )
+
+    print(f"Serving {arguments.directory} on {server.url}")
+    server.serve_forever()
+
+
+
+if __name__ == '__main__':
+    main()
@@ -47,16 +47,22 @@ setuptools.setup(
 
     url = 'https://github.com/CWKevo/python-piped-api-client',
 
+    python_requires='>=3.9',
     install_requires=['requests'],
+    extras_require={
+        'async': ['httpx'],
+        'http2': ['httpx[http2]'],
+        'fast': ['orjson'],
+        'typed': ['msgspec'],
+        'otel': ['opentelemetry-api'],
+    },
 
     classifiers=[
         f'Development Status :: {__status__}',
         'Intended Audience :: Developers',
         'License :: OSI Approved :: MIT License',
-        'Programming Language :: Python :: 3.6',
-        'Programming Language :: Python :: 3.7',
-        'Programming Language :: Python :: 3.8',
         'Programming Language :: Python :: 3.9',
         'Programming Language :: Python :: 3.10',
+        'Programming Language :: Python :: 3.11',
     ],
 )
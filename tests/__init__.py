@@ -1,4 +1,13 @@
+import os
+
 from piped_api import PipedClient
+from piped_api.testing import MockPipedServer
+
 
+# Set `PIPED_API_FIXTURES` to a directory recorded with `python -m piped_api.testing record` to run the tests offline:
+if os.environ.get('PIPED_API_FIXTURES', None):
+    MOCK_SERVER = MockPipedServer(fixtures=os.environ['PIPED_API_FIXTURES']).start()
+    CLIENT = PipedClient(MOCK_SERVER.url)
 
-CLIENT = PipedClient()
+else:
+    CLIENT = PipedClient(os.environ.get('PIPED_API_URL', 'https://pipedapi.kavin.rocks'))
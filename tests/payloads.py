@@ -0,0 +1,128 @@
+import time
+import typing as t
+
+
+def related_stream(video_id: str, uploaded: int=1640995200000) -> t.Dict[str, t.Any]:
+    return {
+        'url': f'/watch?v={video_id}',
+        'title': f'Video {video_id}',
+        'thumbnail': f'https://i.ytimg.com/vi/{video_id}/hqdefault.jpg',
+        'uploaderName': 'Uploader',
+        'uploaderUrl': '/channel/UC0000000000000000000000',
+        'uploaderAvatar': 'https://yt3.ggpht.com/avatar',
+        'uploadedDate': '1 day ago',
+        'shortDescription': None,
+        'duration': 212,
+        'views': 1000,
+        'uploaded': uploaded,
+        'uploaderVerified': False,
+    }
+
+
+
+def stream(itag: int, video_only: bool=False, expire: t.Optional[int]=None) -> t.Dict[str, t.Any]:
+    expire = expire if expire is not None else int(time.time()) + 6 * 60 * 60
+
+    return {
+        'url': f'https://rr1---sn-example.googlevideo.com/videoplayback?itag={itag}&expire={expire}',
+        'format': 'MPEG_4',
+        'quality': '720p',
+        'mimeType': 'video/mp4',
+        'codec': 'avc1.4d401f',
+        'videoOnly': video_only,
+        'bitrate': 1500000,
+        'initStart': 0,
+        'initEnd': 740,
+        'indexStart': 741,
+        'indexEnd': 1200,
+        'width': 1280,
+        'height': 720,
+        'fps': 30,
+    }
+
+
+
+def video(video_id: str) -> t.Dict[str, t.Any]:
+    return {
+        'title': f'Video {video_id}',
+        'description': 'A description',
+        'uploadDate': '2021-12-31',
+        'uploader': 'Uploader',
+        'uploaderUrl': '/channel/UC0000000000000000000000',
+        'uploaderAvatar': 'https://yt3.ggpht.com/avatar',
+        'thumbnailUrl': f'https://i.ytimg.com/vi/{video_id}/maxresdefault.jpg',
+        'hls': None,
+        'dash': None,
+        'lbryId': None,
+        'uploaderVerified': False,
+        'duration': 212,
+        'views': 1000,
+        'likes': 10,
+        'dislikes': -1,
+        'audioStreams': [stream(140)],
+        'videoStreams': [stream(22), stream(136, video_only=True)],
+        'relatedStreams': [related_stream(f'{video_id}-r{index}') for index in range(3)],
+        'subtitles': [],
+        'livestream': False,
+        'proxyUrl': 'https://pipedproxy.kavin.rocks',
+        'chapters': [],
+    }
+
+
+
+def comment(comment_id: str, replies_page: t.Optional[str]=None) -> t.Dict[str, t.Any]:
+    return {
+        'author': 'Commenter',
+        'commentId': comment_id,
+        'commentText': f'Comment {comment_id}',
+        'commentedTime': '1 day ago',
+        'commentorUrl': '/channel/UC1111111111111111111111',
+        'repliesPage': replies_page,
+        'hearted': False,
+        'likeCount': 1,
+        'pinned': False,
+        'thumbnail': 'https://yt3.ggpht.com/commentor',
+        'verified': False,
+    }
+
+
+
+def comments_page(comment_ids: t.List[str], nextpage: t.Optional[str]=None) -> t.Dict[str, t.Any]:
+    return {
+        'comments': [comment(comment_id) for comment_id in comment_ids],
+        'nextpage': nextpage,
+        'disabled': False,
+    }
+
+
+
+def channel(channel_id: str, video_ids: t.List[str], nextpage: t.Optional[str]=None) -> t.Dict[str, t.Any]:
+    return {
+        'id': channel_id,
+        'name': f'Channel {channel_id}',
+        'avatarUrl': 'https://yt3.ggpht.com/avatar',
+        'bannerUrl': 'https://yt3.ggpht.com/banner',
+        'description': 'A channel',
+        'subscriberCount': 1000,
+        'verified': False,
+        'nextpage': nextpage,
+        'relatedStreams': [related_stream(video_id) for video_id in video_ids],
+    }
+
+
+
+def default_routes() -> t.Dict[str, t.Callable[[str, t.Dict[str, str]], t.Any]]:
+    """
+        Routes for `piped_api.testing.MockPipedServer` covering every endpoint of the client.
+    """
+
+    return {
+        '/streams/': lambda path, query: video(path.rsplit('/', 1)[-1]),
+        '/comments/': lambda path, query: comments_page(['c1', 'c2'], nextpage='page-2'),
+        '/nextpage/comments/': lambda path, query: comments_page(['c3'], nextpage=None),
+        '/trending': lambda path, query: [related_stream(f"{query['region']}-{index}") for index in range(5)],
+        '/channel/': lambda path, query: channel(path.rsplit('/', 1)[-1], ['v1', 'v2'], nextpage='page-2'),
+        '/nextpage/channel/': lambda path, query: {'nextpage': None, 'relatedStreams': [related_stream('v3')]},
+        '/c/': lambda path, query: channel('UC' + path.rsplit('/', 1)[-1], ['v1']),
+        '/suggestions': lambda path, query: [f"{query['query']} {index}" for index in range(3)],
+    }
@@ -0,0 +1,64 @@
+import asyncio
+
+from piped_api import AsyncPipedClient
+from piped_api.models.channels import Channel, NextPageChannel
+
+from piped_api.testing import MockPipedServer
+from tests.payloads import default_routes
+
+
+def test_async_endpoints() -> None:
+    """
+        Calls every endpoint of the async client against a local stub instance.
+    """
+
+    async def run(base_url: str) -> None:
+        async with AsyncPipedClient(base_url) as client:
+            video = await client.get_video('dQw4w9WgXcQ')
+            assert video.title == 'Video dQw4w9WgXcQ'
+            assert len(video.related_videos) == 3
+
+            comments = await client.get_comments('dQw4w9WgXcQ')
+            assert [comment.comment_id for comment in comments.get_comments()] == ['c1', 'c2']
+
+            next_comments = await client.get_comments('dQw4w9WgXcQ', nextpage=comments.nextpage)
+            assert next_comments.nextpage is None
+
+            trending = await client.get_trending('sk')
+            assert trending[0].title == 'Video SK-0'
+
+            channel = await client.get_channel_by_id('UCabc')
+            assert isinstance(channel, Channel) and channel.id == 'UCabc'
+
+            next_channel = await client.get_channel_by_id('UCabc', nextpage=channel.nextpage)
+            assert isinstance(next_channel, NextPageChannel)
+
+            assert (await client.get_channel_by_name('abc')).id == 'UCabc'
+            assert await client.get_search_suggestions('Susan') == ['Susan 0', 'Susan 1', 'Susan 2']
+
+
+    with MockPipedServer(default_routes()) as server:
+        asyncio.run(run(server.url))
+
+
+
+def test_async_many_in_flight(count: int=200) -> None:
+    """
+        Keeps a few hundred requests in flight from a single event loop.
+    """
+
+    async def run(base_url: str) -> None:
+        async with AsyncPipedClient(base_url) as client:
+            videos = await asyncio.gather(*(client.get_video(f'video{index}') for index in range(count)))
+
+        assert [video.title for video in videos] == [f'Video video{index}' for index in range(count)]
+
+
+    with MockPipedServer(default_routes()) as server:
+        asyncio.run(run(server.url))
+
+
+
+if __name__ == '__main__':
+    test_async_endpoints()
+    test_async_many_in_flight()
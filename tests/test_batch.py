@@ -0,0 +1,57 @@
+import asyncio
+
+from piped_api import PipedClient, AsyncPipedClient
+from piped_api.client import APIError
+from piped_api.models.videos import Video
+
+from piped_api.testing import MockPipedServer
+from tests.payloads import default_routes, video
+
+
+def _routes():
+    routes = default_routes()
+    routes['/streams/'] = lambda path, query: {'error': 'Video unavailable'} if path.endswith('broken') else video(path.rsplit('/', 1)[-1])
+
+    return routes
+
+
+
+def test_get_videos() -> None:
+    """
+        Fetches a batch of videos with a thread pool, keeping per-ID errors and skipping duplicates.
+    """
+
+    with MockPipedServer(_routes()) as server:
+        client = PipedClient(server.url)
+        results = dict(client.get_videos(['a', 'b', 'broken', 'a', 'c'], max_concurrency=3))
+
+        assert sorted(results) == ['a', 'b', 'broken', 'c']
+        assert isinstance(results['a'], Video) and results['a'].title == 'Video a'
+        assert isinstance(results['broken'], APIError)
+        assert server.hits['/streams/a'] == 1
+
+
+
+def test_async_get_videos() -> None:
+    """
+        Same as `test_get_videos`, but with the async client.
+    """
+
+    async def run(base_url: str) -> dict:
+        async with AsyncPipedClient(base_url) as client:
+            return {video_id: result async for video_id, result in client.get_videos(['a', 'b', 'broken', 'a', 'c'], max_concurrency=2)}
+
+
+    with MockPipedServer(_routes()) as server:
+        results = asyncio.run(run(server.url))
+
+        assert sorted(results) == ['a', 'b', 'broken', 'c']
+        assert isinstance(results['c'], Video)
+        assert isinstance(results['broken'], APIError)
+        assert server.hits['/streams/a'] == 1
+
+
+
+if __name__ == '__main__':
+    test_get_videos()
+    test_async_get_videos()
@@ -0,0 +1,296 @@
+import time
+import json
+import asyncio
+import threading
+import multiprocessing
+
+from pathlib import Path
+
+from piped_api import PipedClient, AsyncPipedClient
+from piped_api.cache import ResponseCache, MemoryCache, DiskCache, SQLiteCache
+
+from piped_api.testing import MockPipedServer
+from tests.payloads import default_routes, video, stream
+
+
+def test_cached_trending() -> None:
+    """
+        Repeated identical requests are served from the cache, while different parameters are not.
+    """
+
+    with MockPipedServer(default_routes()) as server:
+        cache = ResponseCache()
+        client = PipedClient(server.url, cache=cache)
+
+        for _ in range(3):
+            assert client.get_trending('US')[0].title == 'Video US-0'
+
+        client.get_trending('SK')
+        client.get_search_suggestions('Susan')
+
+        assert server.hits['/trending'] == 2
+        assert cache.stats.hits == 2 and cache.stats.misses == 3
+        print(f"Hit ratio: {cache.stats.hit_ratio:.0%}")
+
+
+
+def test_per_endpoint_ttls() -> None:
+    """
+        The longest matching URI prefix decides the TTL, and `None` disables caching for an endpoint.
+    """
+
+    cache = ResponseCache(ttls={'/suggestions': None, '/nextpage/comments/': 1})
+
+    assert cache.ttl_for('/streams/dQw4w9WgXcQ') == 3 * 60 * 60
+    assert cache.ttl_for('/nextpage/comments/dQw4w9WgXcQ') == 1
+    assert cache.ttl_for('/suggestions') is None
+    assert cache.ttl_for('/unknown') is None
+
+    cache.set('key', {'a': 1}, ttl=0.01)
+    assert cache.get('key') == {'a': 1}
+
+    time.sleep(0.02)
+    assert cache.get('key') is None
+
+
+
+def test_lru_eviction() -> None:
+    """
+        The memory backend evicts the least recently used entry once it is full.
+    """
+
+    backend = MemoryCache(max_entries=2)
+    backend.set('a', 1, time.time() + 60)
+    backend.set('b', 2, time.time() + 60)
+    backend.get('a')
+    backend.set('c', 3, time.time() + 60)
+
+    assert backend.get('b') is None
+    assert backend.get('a')[1] == 1 and backend.get('c')[1] == 3
+
+
+
+def test_disk_cache(tmp_path: Path) -> None:
+    """
+        The disk backend keeps responses across client (and backend) instances.
+    """
+
+    with MockPipedServer(default_routes()) as server:
+        PipedClient(server.url, cache=ResponseCache(DiskCache(tmp_path))).get_video('dQw4w9WgXcQ')
+
+        cache = ResponseCache(DiskCache(tmp_path))
+        video = PipedClient(server.url, cache=cache).get_video('dQw4w9WgXcQ')
+
+        assert video.title == 'Video dQw4w9WgXcQ'
+        assert server.hits['/streams/dQw4w9WgXcQ'] == 1
+        assert cache.stats.hits == 1
+
+
+
+def test_sqlite_cache(tmp_path: Path) -> None:
+    """
+        The SQLite backend keeps compressed entries in a single file, evicting the ones expiring first once it is full.
+    """
+
+    payload = {'relatedStreams': [{'title': f'Video {index}', 'uploaderName': 'Uploader'} for index in range(100)]}
+    backend = SQLiteCache(tmp_path / 'cache.db', max_entries=2)
+    backend.set('a', payload, time.time() - 10)
+    backend.set('b', payload, time.time() + 60)
+
+    assert SQLiteCache(tmp_path / 'cache.db').get('a')[1] == payload
+
+    stored = backend._connection().execute("SELECT length(payload) FROM entries WHERE key = 'a'").fetchone()[0]
+    print(f"{len(json.dumps(payload))} bytes stored in {stored}")
+    assert stored * 5 < len(json.dumps(payload))
+
+    backend.set('c', payload, time.time() + 120)
+    assert backend.get('a') is None and len(backend) == 2
+
+    backend.max_entries = None
+    backend.set('d', payload, time.time() - 10)
+    assert backend.purge() == 1 and len(backend) == 2
+
+    # Larger caches evict a tenth of their entries at once:
+    backend = SQLiteCache(tmp_path / 'bounded.db', max_entries=20)
+
+    for index in range(50):
+        backend.set(str(index), index, time.time() + index)
+
+    assert 18 <= len(backend) <= 20 and backend.get('49') is not None
+
+
+
+def _write_entries(path: str, worker: int) -> None:
+    backend = SQLiteCache(path)
+
+    for index in range(50):
+        backend.set(f'{worker}-{index}', {'worker': worker, 'index': index}, time.time() + 60)
+
+
+
+def test_sqlite_multiple_processes(tmp_path: Path) -> None:
+    """
+        Several processes can write to the same database at once.
+    """
+
+    processes = [multiprocessing.Process(target=_write_entries, args=(str(tmp_path / 'cache.db'), worker)) for worker in range(4)]
+
+    for process in processes:
+        process.start()
+
+    for process in processes:
+        process.join()
+
+    assert [process.exitcode for process in processes] == [0] * 4
+    assert len(SQLiteCache(tmp_path / 'cache.db')) == 200
+
+
+
+def test_stale_while_revalidate(tmp_path: Path) -> None:
+    """
+        After a restart, expired responses are served instantly and refreshed in the background.
+    """
+
+    with MockPipedServer(default_routes(), latency=0.2) as server:
+        PipedClient(server.url, cache=ResponseCache(SQLiteCache(tmp_path / 'cache.db'), ttls={'/streams/': 0.01})).get_video('dQw4w9WgXcQ')
+        time.sleep(0.02)
+
+        cache = ResponseCache(SQLiteCache(tmp_path / 'cache.db'), ttls={'/streams/': 60}, stale_ttls={'/streams/': 60 * 60})
+        client = PipedClient(server.url, cache=cache)
+
+        start = time.perf_counter()
+        video = client.get_video('dQw4w9WgXcQ')
+        elapsed = time.perf_counter() - start
+        print(f"Stale response served in {elapsed * 1000:.1f}ms")
+
+        assert video.title == 'Video dQw4w9WgXcQ' and elapsed < 0.1
+        assert cache.stats.stale == 1
+
+        # Further calls are served stale while the refresh is in flight, without refreshing again:
+        client.get_video('dQw4w9WgXcQ')
+        time.sleep(0.5)
+
+        assert server.hits['/streams/dQw4w9WgXcQ'] == 2
+        assert cache.lookup(ResponseCache.make_key(server.url, '/streams/dQw4w9WgXcQ'))[1]
+
+        # Without a stale TTL, expired responses are fetched again:
+        assert cache.stale_ttl_for('/trending') == 0.0
+
+
+
+def test_async_stale_while_revalidate() -> None:
+    """
+        The async client refreshes stale responses in a background task.
+    """
+
+    cache = ResponseCache(ttls={'/trending': 0.01}, stale_ttls={'/trending': 60})
+
+    async def main(url: str) -> None:
+        async with AsyncPipedClient(url, cache=cache) as client:
+            await client.get_trending('US')
+            await asyncio.sleep(0.02)
+            await client.get_trending('US')
+
+
+    with MockPipedServer(default_routes()) as server:
+        asyncio.run(main(server.url))
+
+        assert server.hits['/trending'] == 2
+        assert cache.stats.stale == 1
+
+
+
+def test_async_sqlite_cache(tmp_path: Path) -> None:
+    """
+        The async client uses blocking backends from a thread, not from the event loop.
+    """
+
+    class RecordingCache(SQLiteCache):
+        def get(self, key: str):
+            threads.add(threading.get_ident())
+            return super().get(key)
+
+
+    threads = set()
+    cache = ResponseCache(RecordingCache(tmp_path / 'cache.db'))
+
+    async def main(url: str) -> None:
+        async with AsyncPipedClient(url, cache=cache) as client:
+            await client.get_trending('US')
+            await client.get_trending('US')
+
+
+    with MockPipedServer(default_routes()) as server:
+        asyncio.run(main(server.url))
+
+        assert server.hits['/trending'] == 1 and cache.stats.hits == 1
+        assert threads and threading.get_ident() not in threads
+
+
+
+def test_streams_ttl_from_url_expiry() -> None:
+    """
+        Videos are cached for their TTL, but at most until shortly before their first stream URL expires, and not at all if it has expired already.
+    """
+
+    cache = ResponseCache(stream_expiry_margin=10 * 60)
+    expire = int(time.time()) + 2 * 60 * 60
+    expired = {**video('dQw4w9WgXcQ'), 'videoStreams': [stream(22, expire=1641081600)]}
+
+    expiring = {**video('dQw4w9WgXcQ'), 'videoStreams': [stream(22, expire=expire)]}
+
+    assert 6590 < cache.ttl_for_response('/streams/dQw4w9WgXcQ', expiring, 24 * 60 * 60) <= 6600
+    assert cache.ttl_for_response('/streams/dQw4w9WgXcQ', expiring, 60) == 60
+    assert cache.ttl_for_response('/streams/dQw4w9WgXcQ', expired, 60) is None
+    assert cache.ttl_for_response('/streams/dQw4w9WgXcQ', {'title': 'No streams'}, 60) == 60
+    assert cache.ttl_for_response('/trending', [], 60) == 60
+
+    with MockPipedServer({'/streams/': lambda path, query: expired}) as server:
+        client = PipedClient(server.url, cache=cache)
+        client.get_video('dQw4w9WgXcQ')
+        client.get_video('dQw4w9WgXcQ')
+
+        assert server.hits['/streams/dQw4w9WgXcQ'] == 2
+
+
+
+def test_stale_streams_expire_with_their_urls() -> None:
+    """
+        Stale videos are not served once their stream URLs are about to expire, and are dropped if their refresh can't be cached either.
+    """
+
+    cache = ResponseCache(stale_ttls={'/streams/': 24 * 60 * 60}, stream_expiry_margin=10 * 60)
+    now = int(time.time())
+
+    def cached_video(video_id: str, expire: int) -> str:
+        key = ResponseCache.make_key('https://piped.test', f'/streams/{video_id}')
+        cache.backend.set(key, {**video(video_id), 'videoStreams': [stream(22, expire=expire)]}, now - 60 * 60)
+
+        return key
+
+
+    alive, dying = cached_video('alive', now + 60 * 60), cached_video('dying', now + 5 * 60)
+
+    assert cache.lookup(alive, 24 * 60 * 60)[1] is False
+    assert cache.lookup(dying, 24 * 60 * 60) is None
+    assert cache.lookup(cached_video('dead', now - 108 * 60), 24 * 60 * 60) is None
+
+    with MockPipedServer({'/streams/': lambda path, query: {**video('dying'), 'videoStreams': [stream(22, expire=now + 5 * 60)]}}) as server:
+        key = ResponseCache.make_key(server.url, '/streams/dying')
+        cache.backend.set(key, {**video('dying'), 'videoStreams': [stream(22, expire=now + 60 * 60)]}, now - 60)
+
+        client = PipedClient(server.url, cache=cache)
+        client.get_video('dying')
+        client.refresher.join(timeout=5)
+
+        assert server.hits['/streams/dying'] == 1 and cache.expires_at(key) is None
+
+
+
+if __name__ == '__main__':
+    test_cached_trending()
+    test_per_endpoint_ttls()
+    test_lru_eviction()
+    test_async_stale_while_revalidate()
+    test_streams_ttl_from_url_expiry()
+    test_stale_streams_expire_with_their_urls()
@@ -0,0 +1,98 @@
+import time
+import asyncio
+import logging
+import pytest
+
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import requests
+
+from piped_api import PipedClient, AsyncPipedClient
+
+from piped_api.testing import MockPipedServer
+from tests.payloads import default_routes, video
+
+
+def _slow_routes(delay: float):
+    routes = default_routes()
+
+    def slow_video(path, query):
+        time.sleep(delay)
+        return video(path.rsplit('/', 1)[-1])
+
+    routes['/streams/'] = slow_video
+
+    return routes
+
+
+
+def test_sessions_are_per_client() -> None:
+    """
+        Each client gets its own session (closed with the client), sized by `max_connections_per_host`. Passed sessions are left alone.
+    """
+
+    first, second = PipedClient(), PipedClient(max_connections_per_host=64)
+
+    assert first.session is not second.session
+    assert second.session.get_adapter('https://pipedapi.kavin.rocks')._pool_maxsize == 64
+
+    session = requests.Session()
+
+    with PipedClient(session=session) as client:
+        assert client.session is session
+
+    assert session.adapters
+
+
+    with MockPipedServer(default_routes()) as server:
+        with PipedClient(server.url) as client:
+            client.get_video('closed')
+            pool = client.session.get_adapter(server.url).poolmanager
+
+            assert len(pool.pools) == 1
+
+        assert len(pool.pools) == 0
+
+
+
+def test_pool_fits_threads(caplog: pytest.LogCaptureFixture, threads: int=32) -> None:
+    """
+        With as many pooled connections as threads, no connection is thrown away under concurrent use.
+    """
+
+    with MockPipedServer(_slow_routes(0.01)) as server, caplog.at_level(logging.WARNING, logger='urllib3'):
+        client = PipedClient(server.url, coalesce_requests=False, max_connections_per_host=threads)
+
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            videos = list(executor.map(lambda index: client.get_video(f'video{index}'), range(threads * 4)))
+
+        assert len(videos) == threads * 4
+        assert not [record for record in caplog.records if 'Connection pool is full' in record.getMessage()]
+
+
+
+def test_timeouts() -> None:
+    """
+        Requests time out after the configured timeout.
+    """
+
+    async def main(url: str) -> None:
+        async with AsyncPipedClient(url, timeout=(1.0, 0.1), retry=None) as client:
+            with pytest.raises(httpx.ReadTimeout):
+                await client.get_video('slow')
+
+
+    with MockPipedServer(_slow_routes(0.5)) as server:
+        with pytest.raises(requests.Timeout):
+            PipedClient(server.url, timeout=(1.0, 0.1), retry=None).get_video('slow')
+
+        assert PipedClient(server.url, timeout=None).get_video('slow').title == 'Video slow'
+
+        asyncio.run(main(server.url))
+
+
+
+if __name__ == '__main__':
+    test_sessions_are_per_client()
+    test_timeouts()
@@ -0,0 +1,69 @@
+import json
+import pytest
+
+from pathlib import Path
+
+from piped_api import PipedClient
+from piped_api.decoders import DECODERS, get_decoder, stdlib_decoder
+
+from piped_api.testing import MockPipedServer
+from tests.payloads import default_routes
+
+
+FIXTURES_PATH = Path(__file__).parent / Path('fixtures')
+
+
+def test_decoders_agree() -> None:
+    """
+        Every available decoder decodes the recorded fixtures into the same data.
+    """
+
+    for fixture in FIXTURES_PATH.glob('*.json'):
+        content = fixture.read_bytes()
+        expected = json.loads(content)
+
+        for name, decode in DECODERS.items():
+            assert decode(content) == expected, f"{name} decoded {fixture.name} differently"
+
+        for decode in DECODERS.values():
+            with pytest.raises(ValueError):
+                decode(b'<html>502 Bad Gateway</html>')
+
+
+
+def test_get_decoder() -> None:
+    """
+        Decoders are resolved by name, `'auto'` or passed through if callable.
+    """
+
+    assert get_decoder('json') is stdlib_decoder
+    assert get_decoder('auto') in DECODERS.values()
+    assert get_decoder(len) is len
+
+    with pytest.raises(ValueError):
+        get_decoder('simdjson')
+
+
+
+def test_client_decoder() -> None:
+    """
+        The client decodes responses with the configured decoder.
+    """
+
+    decoded = []
+
+    def decoder(content: bytes):
+        decoded.append(len(content))
+        return stdlib_decoder(content)
+
+
+    with MockPipedServer(default_routes()) as server:
+        assert PipedClient(server.url, decoder=decoder).get_video('dQw4w9WgXcQ').title == 'Video dQw4w9WgXcQ'
+        assert len(decoded) == 1
+
+
+
+if __name__ == '__main__':
+    test_decoders_agree()
+    test_get_decoder()
+    test_client_decoder()
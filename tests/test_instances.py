@@ -0,0 +1,110 @@
+import time
+import socket
+import asyncio
+
+from piped_api import PipedClient, AsyncPipedClient
+from piped_api.instances import InstancePool
+from piped_api.retry import RetryPolicy, RetryBudget
+
+from piped_api.testing import MockPipedServer
+from tests.payloads import default_routes
+
+
+def _unreachable_url() -> str:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+
+def _retry_policy() -> RetryPolicy:
+    # Fail-overs take from the retry budget - don't share one with other tests:
+    return RetryPolicy(budget=RetryBudget(reserve=50))
+
+
+def _failing_routes():
+    return {'/': lambda path, query: (502, {'error': 'Bad Gateway'})}
+
+
+
+def test_failover() -> None:
+    """
+        Requests failing on one instance (connection errors, 502s) are retried on another one, and failing instances get ejected.
+    """
+
+    with MockPipedServer(default_routes()) as healthy, MockPipedServer(_failing_routes()) as failing:
+        down = _unreachable_url()
+        pool = InstancePool([healthy.url, failing.url, down], eject_after=2)
+        client = PipedClient(instances=pool, retry=_retry_policy())
+
+        for index in range(20):
+            assert client.get_video(f'video{index}').title == f'Video video{index}'
+
+        stats = pool.stats()
+        print({url: (stat.successes, stat.failures, stat.ejections) for url, stat in stats.items()})
+
+        assert stats[healthy.url].successes == 20
+        assert stats[failing.url].ejections >= 1 and stats[down].ejections >= 1
+        assert not stats[failing.url].healthy and not stats[down].healthy
+        assert all(stat.in_flight == 0 for stat in stats.values())
+
+
+
+def test_routing() -> None:
+    """
+        Once latencies are known, most requests go to the faster instance.
+    """
+
+    routes = default_routes()
+    slow_routes = default_routes()
+    slow_video = slow_routes['/streams/']
+
+    def delayed(path, query):
+        time.sleep(0.05)
+        return slow_video(path, query)
+
+    slow_routes['/streams/'] = delayed
+
+    with MockPipedServer(routes) as fast, MockPipedServer(slow_routes) as slow:
+        pool = InstancePool([fast.url, slow.url])
+        client = PipedClient(instances=pool, coalesce_requests=False)
+
+        for index in range(30):
+            client.get_video(f'video{index}')
+
+        stats = pool.stats()
+        print({url: (stat.successes, stat.latency) for url, stat in stats.items()})
+
+        assert stats[fast.url].successes > stats[slow.url].successes
+
+
+
+def test_async_failover() -> None:
+    """
+        The async client fails over the same way.
+    """
+
+    async def main(healthy: MockPipedServer, failing: MockPipedServer) -> InstancePool:
+        pool = InstancePool([healthy.url, failing.url, _unreachable_url()])
+
+        async with AsyncPipedClient(instances=pool, retry=_retry_policy()) as client:
+            videos = await asyncio.gather(*(client.get_video(f'video{index}') for index in range(10)))
+            assert [video.title for video in videos] == [f'Video video{index}' for index in range(10)]
+
+            comments = [comment async for comment in client.stream_comments('video0')]
+            assert comments
+
+        return pool
+
+
+    with MockPipedServer(default_routes()) as healthy, MockPipedServer(_failing_routes()) as failing:
+        stats = asyncio.run(main(healthy, failing)).stats()
+
+        assert stats[healthy.url].successes == 11
+        assert all(stat.in_flight == 0 for stat in stats.values())
+
+
+
+if __name__ == '__main__':
+    test_failover()
+    test_routing()
+    test_async_failover()
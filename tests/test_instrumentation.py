@@ -0,0 +1,175 @@
+import asyncio
+import typing as t
+
+import pytest
+
+from piped_api import PipedClient, AsyncPipedClient
+from piped_api.client import APIError
+from piped_api.cache import ResponseCache
+from piped_api.retry import RetryPolicy
+from piped_api.instrumentation import Hooks, RequestInfo, MetricsCollector, OpenTelemetryHooks
+
+from piped_api.testing import MockPipedServer
+from tests.payloads import default_routes
+
+
+class RecordingHooks(Hooks):
+    """
+        Records the order in which hooks are called.
+    """
+
+    def __init__(self) -> None:
+        self.events: t.List[t.Tuple[str, RequestInfo]] = []
+
+
+    def on_request_start(self, info: RequestInfo) -> None:
+        self.events.append(('start', info))
+
+
+    def on_response(self, info: RequestInfo) -> None:
+        self.events.append(('response', info))
+
+
+    def on_error(self, info: RequestInfo, error: BaseException) -> None:
+        self.events.append(('error', info))
+
+
+
+def test_hooks() -> None:
+    """
+        Each call starts and then either succeeds or fails, with its phases, size and status attached.
+    """
+
+    hooks = RecordingHooks()
+
+    with MockPipedServer(default_routes()) as server:
+        client = PipedClient(server.url, hooks=[hooks])
+        client.get_video('dQw4w9WgXcQ')
+
+    assert [event for event, _ in hooks.events] == ['start', 'response']
+
+    info = hooks.events[-1][1]
+    print(info)
+
+    assert info.endpoint == '/streams/' and info.status_code == 200 and info.attempts == 1
+    assert info.response_bytes > 0 and not info.cache_hit
+    assert {'ttfb', 'download', 'decode', 'model'} <= set(info.timings)
+    assert info.duration >= sum(info.timings.values()) * 0.99
+
+
+
+def test_metrics() -> None:
+    """
+        The collector counts calls, errors and cache hits per endpoint and exports them for Prometheus.
+    """
+
+    metrics = MetricsCollector()
+    routes = {**default_routes(), '/channel/': lambda path, query: (404, {'error': 'Channel not found'})}
+
+    with MockPipedServer(routes) as server:
+        client = PipedClient(server.url, cache=ResponseCache(), retry=None, hooks=[metrics])
+
+        for _ in range(3):
+            client.get_trending('US')
+
+        with pytest.raises(APIError):
+            client.get_channel_by_id('UCmissing')
+
+    trending, channel = metrics.endpoints['/trending'], metrics.endpoints['/channel/']
+    text = metrics.to_prometheus()
+    print(text)
+
+    assert (trending.requests, trending.errors, trending.cache_hits) == (3, 0, 2)
+    assert trending.latency.count == 3 and trending.phases['ttfb'].count == 1
+    assert (channel.requests, channel.errors) == (1, 1)
+
+    assert 'piped_api_requests_total{endpoint="/trending"} 3' in text
+    assert 'piped_api_cache_hits_total{endpoint="/trending"} 2' in text
+    assert 'piped_api_request_duration_seconds_bucket{endpoint="/trending",le="+Inf"} 3' in text
+    assert 'piped_api_phase_duration_seconds_count{endpoint="/trending",phase="decode"} 1' in text
+
+
+
+def test_retries_are_timed() -> None:
+    """
+        Retried requests count as attempts of the same call, and the time spent backing off is a phase of its own.
+    """
+
+    hooks = RecordingHooks()
+
+    with MockPipedServer(default_routes(), error_rate=1.0) as server:
+        client = PipedClient(server.url, retry=RetryPolicy(max_attempts=3, backoff=0.01), hooks=[hooks])
+
+        with pytest.raises(APIError):
+            client.get_search_suggestions('piped')
+
+    info = hooks.events[-1][1]
+
+    assert hooks.events[-1][0] == 'error'
+    assert info.attempts == 3 and info.status_code == 503 and 'backoff' in info.timings
+
+
+
+def test_opentelemetry() -> None:
+    """
+        Calls are exported as OpenTelemetry spans, with an error status for failed ones.
+    """
+
+    sdk_trace = pytest.importorskip('opentelemetry.sdk.trace')
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+    from opentelemetry.trace import StatusCode
+
+    exporter = InMemorySpanExporter()
+    provider = sdk_trace.TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+
+    routes = {**default_routes(), '/trending': lambda path, query: (500, {'error': 'Boom'})}
+
+    with MockPipedServer(routes) as server:
+        client = PipedClient(server.url, retry=None, hooks=[OpenTelemetryHooks(provider.get_tracer('tests'))])
+        client.get_video('dQw4w9WgXcQ')
+
+        with pytest.raises(APIError):
+            client.get_trending('US')
+
+    video, trending = exporter.get_finished_spans()
+    print(video.attributes)
+
+    assert video.name == 'GET /streams/' and video.attributes['http.response.status_code'] == 200
+    assert video.attributes['piped.phase.decode_ms'] > 0
+    assert trending.status.status_code == StatusCode.ERROR and trending.events[0].name == 'exception'
+
+
+
+def test_async_phases() -> None:
+    """
+        The async client also reports the time spent connecting, and coalesced calls are reported separately.
+    """
+
+    hooks = RecordingHooks()
+
+    async def main(url: str) -> None:
+        async with AsyncPipedClient(url, hooks=[hooks]) as client:
+            await client.get_video('dQw4w9WgXcQ')
+            await asyncio.gather(*(client.get_search_suggestions('piped') for _ in range(3)))
+
+
+    with MockPipedServer(default_routes(), latency=0.05) as server:
+        asyncio.run(main(server.url))
+
+    responses = [info for event, info in hooks.events if event == 'response']
+    print(responses[0])
+
+    assert len(responses) == 4
+    assert responses[0].timings['connect'] > 0 and responses[0].timings['ttfb'] >= 0.05
+    assert sum(info.attempts for info in responses[1:]) == 1
+
+
+
+if __name__ == '__main__':
+    test_hooks()
+    test_metrics()
+    test_retries_are_timed()
+    test_opentelemetry()
+    test_async_phases()
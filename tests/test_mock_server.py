@@ -0,0 +1,141 @@
+import io
+import time
+import pytest
+import tempfile
+
+from pathlib import Path
+from contextlib import redirect_stdout
+
+from requests import HTTPError
+
+from piped_api import PipedClient
+from piped_api.client import APIError
+from piped_api.testing import MockPipedServer, fixture_path, record_fixtures, main
+
+from tests.payloads import default_routes
+
+
+def test_fixture_path() -> None:
+    """
+        Fixtures are stored by endpoint, with query parameters in the file name and overly long names hashed.
+    """
+
+    assert fixture_path('fixtures', '/streams/dQw4w9WgXcQ') == Path('fixtures/streams/dQw4w9WgXcQ.json')
+    assert fixture_path('fixtures', '/trending', {'region': 'US'}) == Path('fixtures/trending/@region=US.json')
+    assert len(fixture_path('fixtures', '/nextpage/comments/id', {'nextpage': 'x' * 500}).name) == 45
+
+
+
+def test_record_and_replay(tmp_path: Path) -> None:
+    """
+        Responses recorded from an instance are replayed by a `MockPipedServer`, which falls back to a recorded response of the same endpoint.
+    """
+
+    with MockPipedServer(default_routes()) as live:
+        written = record_fixtures(live.url, tmp_path, video_ids=['dQw4w9WgXcQ'], channel_ids=['UC1'], channel_names=['name'], regions=['us'], queries=['piped'])
+        expected = PipedClient(live.url).get_video('dQw4w9WgXcQ').data
+
+        assert len(written) == 8
+
+    with MockPipedServer(fixtures=tmp_path) as server:
+        client = PipedClient(server.url)
+
+        assert client.get_video('dQw4w9WgXcQ').data == expected
+        assert [comment.comment_id for comment in client.iter_comments('dQw4w9WgXcQ')] == ['c1', 'c2', 'c3']
+        assert [video.title for video in client.iter_channel_videos('UC1')] == ['Video v1', 'Video v2', 'Video v3']
+        assert client.get_channel_by_name('name').id == 'UCname'
+        assert client.get_search_suggestions('piped') == ['piped 0', 'piped 1', 'piped 2']
+
+        # Not recorded:
+        assert client.get_video('other').title == 'Video dQw4w9WgXcQ'
+        assert client.get_search_suggestions('other') == ['piped 0', 'piped 1', 'piped 2']
+
+    with MockPipedServer(fixtures=tmp_path / 'empty') as server:
+        with pytest.raises(APIError) as error:
+            PipedClient(server.url).get_video('dQw4w9WgXcQ')
+
+        assert error.value.status_code == 404
+
+
+
+def test_errors_are_not_recorded(tmp_path: Path) -> None:
+    """
+        Recording stops at the first unsuccessful response (or error sent with a status of 200), without writing it as a fixture.
+    """
+
+    routes = {**default_routes(), '/comments/': lambda path, query: (500, {'error': 'Boom'})}
+
+    with MockPipedServer(routes) as live:
+        with pytest.raises(HTTPError):
+            record_fixtures(live.url, tmp_path, video_ids=['dQw4w9WgXcQ'])
+
+    assert [path.relative_to(tmp_path).as_posix() for path in tmp_path.rglob('*.json')] == ['streams/dQw4w9WgXcQ.json']
+
+    routes['/comments/'] = lambda path, query: {'error': 'Comments are disabled'}
+
+    with MockPipedServer(routes) as live:
+        with pytest.raises(APIError):
+            record_fixtures(live.url, tmp_path / 'ok', video_ids=['dQw4w9WgXcQ'])
+
+    assert [path.relative_to(tmp_path / 'ok').as_posix() for path in (tmp_path / 'ok').rglob('*.json')] == ['streams/dQw4w9WgXcQ.json']
+
+
+
+def test_latency_errors_and_scale() -> None:
+    """
+        Latency, errors and payload size can be configured.
+    """
+
+    with MockPipedServer(default_routes(), latency=0.1) as server:
+        start = time.perf_counter()
+        PipedClient(server.url).get_search_suggestions('piped')
+
+        assert time.perf_counter() - start >= 0.1
+
+
+    with MockPipedServer(default_routes(), error_rate=0.5, seed=1) as server:
+        client = PipedClient(server.url, retry=None)
+        failures = 0
+
+        for index in range(40):
+            try:
+                client.get_video(f'video{index}')
+
+            except APIError as error:
+                assert error.status_code == 503
+                failures += 1
+
+        assert 10 <= failures <= 30
+
+
+    with MockPipedServer(default_routes(), payload_scale=10) as server:
+        client = PipedClient(server.url)
+
+        assert len(client.get_trending('US')) == 50
+        assert len(client.get_video('scaled').related_videos) == 30
+
+
+
+def test_cli(tmp_path: Path) -> None:
+    """
+        Fixtures can be recorded from the command line.
+    """
+
+    output = io.StringIO()
+
+    with MockPipedServer(default_routes()) as live, redirect_stdout(output):
+        main(['record', str(tmp_path), '--instance', live.url, '--video', 'abc', '--region', 'SK', '--pages', '1'])
+
+    assert 'Recorded 3 fixtures' in output.getvalue()
+    assert sorted(path.relative_to(tmp_path).as_posix() for path in tmp_path.rglob('*.json')) == ['comments/abc.json', 'streams/abc.json', 'trending/@region=SK.json']
+
+
+
+if __name__ == '__main__':
+    test_fixture_path()
+
+    for test in (test_record_and_replay, test_errors_are_not_recorded, test_cli):
+        with tempfile.TemporaryDirectory() as directory:
+            test(Path(directory))
+
+    test_latency_errors_and_scale()
@@ -0,0 +1,133 @@
+import json
+import time
+import threading
+import tracemalloc
+
+from datetime import datetime
+
+from piped_api.models import CompactRecord
+from piped_api.models.videos import Video
+from piped_api.models.comments import Comments
+
+from tests.payloads import video, comments_page, related_stream, stream
+
+
+def _retained_bytes(build) -> int:
+    tracemalloc.start()
+
+    try:
+        kept = build()
+        size, _ = tracemalloc.get_traced_memory()
+
+    finally:
+        tracemalloc.stop()
+
+    del kept
+    return size
+
+
+
+def test_compact_records() -> None:
+    """
+        Compact records hold the decoded values of every property, including nested models.
+    """
+
+    full = Video(video('dQw4w9WgXcQ'))
+    compact = full.compact()
+
+    assert isinstance(compact, CompactRecord) and not hasattr(compact, '__dict__')
+    assert compact.title == full.title and compact.upload_date == full.upload_date and compact.duration == full.duration
+    assert compact.related_videos[0].uploaded == full.related_videos[0].uploaded
+    assert compact.audio_streams[0].url == full.get_streams('audio')[0].url
+    assert compact.thumbnail_url is None
+
+    comments = Comments(comments_page(['a', 'b'])).compact()
+    assert [comment.comment_id for comment in comments.comments] == ['a', 'b']
+    assert comments == Comments(comments_page(['a', 'b'])).compact()
+
+
+
+def test_compact_memory(count: int=20_000) -> None:
+    """
+        Compact `RelatedStream`s take less memory than the dict-backed models (string values are the same objects in both).
+    """
+
+    raw = json.dumps([related_stream(f'v{index}', uploaded=1640995200000 + index) for index in range(count)])
+
+    models = _retained_bytes(lambda: [Video.RelatedStream(data) for data in json.loads(raw)])
+    compacts = _retained_bytes(lambda: [Video.RelatedStream(data).compact() for data in json.loads(raw)])
+
+    print(f"Per object: {models / count:.0f} B (model) vs. {compacts / count:.0f} B (compact)")
+    assert compacts < models * 0.75
+
+
+
+
+def test_memoized_properties() -> None:
+    """
+        Derived values are computed once per instance and recomputed after `data` is replaced.
+    """
+
+    model = Video(video('dQw4w9WgXcQ'))
+
+    assert model.related_videos is model.related_videos
+    assert model.get_streams('video') is model.get_streams('video')
+    assert model.get_streams('audio') is not model.get_streams('video')
+    assert model.upload_date is model.upload_date
+
+    model.data = {**model.data, 'uploadDate': '2009-10-25', 'relatedStreams': []}
+
+    assert model.upload_date.year == 2009
+    assert model.related_videos == []
+
+
+
+def test_memoized_concurrently() -> None:
+    """
+        Values memoized by threads accessing a fresh model at once are all kept.
+    """
+
+    model = Video(video('dQw4w9WgXcQ'))
+    barrier = threading.Barrier(8)
+
+    def compute(key: int) -> None:
+        barrier.wait()
+        model._memoize(key, lambda self: time.sleep(0.01) or key)
+
+
+    threads = [threading.Thread(target=compute, args=(key,)) for key in range(8)]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    assert model._memo[1] == {key: key for key in range(8)}
+
+
+
+def test_stream_expiry() -> None:
+    """
+        The expiry of signed stream URLs is parsed from their `expire` parameter, and a video expires with its first stream.
+    """
+
+    expire = int(time.time()) + 60 * 60
+    data = {**video('dQw4w9WgXcQ'), 'audioStreams': [stream(140, expire=expire)], 'hls': f'https://manifest.googlevideo.com/api/manifest/hls_variant/expire/{expire - 60}/id/1'}
+    model = Video(data)
+
+    assert model.get_streams('audio')[0].expires_at == datetime.fromtimestamp(expire)
+    assert not model.get_streams('audio')[0].expired
+    assert model.streams_expire_at == datetime.fromtimestamp(expire - 60)
+
+    assert Video.Stream(stream(18, expire=1641081600)).expired
+    assert Video.Stream({**stream(18), 'url': 'https://example.com/video.mp4'}).expires_at is None
+
+
+
+if __name__ == '__main__':
+    test_compact_records()
+    test_compact_memory()
+    test_memoized_properties()
+    test_memoized_concurrently()
+    test_stream_expiry()
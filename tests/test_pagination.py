@@ -0,0 +1,247 @@
+import time
+import asyncio
+
+from datetime import datetime, timedelta, timezone
+
+from piped_api import PipedClient, AsyncPipedClient
+
+from piped_api.testing import MockPipedServer
+from tests.payloads import default_routes, comments_page, channel, related_stream
+
+
+def _comment_routes(pages: int=5, delay: float=0.0):
+    def page(path, query):
+        time.sleep(delay)
+        number = int(query.get('nextpage', 1))
+
+        return comments_page([f'p{number}c{index}' for index in range(20)], nextpage=str(number + 1) if number < pages else None)
+
+    routes = default_routes()
+    routes['/comments/'] = page
+    routes['/nextpage/comments/'] = page
+
+    return routes
+
+
+
+def test_iter_comments() -> None:
+    """
+        Iterates over all pages of comments, or stops after `max_pages`.
+    """
+
+    with MockPipedServer(_comment_routes()) as server:
+        client = PipedClient(server.url)
+
+        comment_ids = [comment.comment_id for comment in client.iter_comments('dQw4w9WgXcQ')]
+        assert len(comment_ids) == 100 and comment_ids[0] == 'p1c0' and comment_ids[-1] == 'p5c19'
+
+        assert len(list(client.iter_comments('dQw4w9WgXcQ', max_pages=2, prefetch=0))) == 40
+        assert len(list(client.get_comments('dQw4w9WgXcQ'))) == 20
+
+
+
+def test_iter_comments_prefetch(delay: float=0.1) -> None:
+    """
+        The next page downloads while the current one is being processed.
+    """
+
+    with MockPipedServer(_comment_routes(pages=4, delay=delay)) as server:
+        client = PipedClient(server.url)
+
+        def crawl(prefetch: int) -> float:
+            start = time.perf_counter()
+
+            for comment in client.iter_comments('dQw4w9WgXcQ', prefetch=prefetch):
+                if comment.comment_id.endswith('c0'):
+                    time.sleep(delay)
+
+            return time.perf_counter() - start
+
+
+        sequential, prefetched = crawl(0), crawl(1)
+        print(f"Sequential: {sequential:.2f}s, prefetched: {prefetched:.2f}s")
+
+        assert prefetched < sequential - delay
+
+
+
+def test_iter_comments_stops_early() -> None:
+    """
+        Breaking out of the iteration doesn't download the remaining pages.
+    """
+
+    with MockPipedServer(_comment_routes(pages=50)) as server:
+        for comment in PipedClient(server.url).iter_comments('dQw4w9WgXcQ', prefetch=1):
+            if comment.comment_id == 'p2c0':
+                break
+
+        time.sleep(0.3)
+        assert sum(server.hits.values()) <= 3
+
+
+
+def test_async_iter_comments() -> None:
+    """
+        Same as `test_iter_comments`, but with the async client.
+    """
+
+    async def run(base_url: str) -> list:
+        async with AsyncPipedClient(base_url) as client:
+            return [comment.comment_id async for comment in client.iter_comments('dQw4w9WgXcQ', max_pages=3)]
+
+
+    with MockPipedServer(_comment_routes()) as server:
+        comment_ids = asyncio.run(run(server.url))
+
+        assert len(comment_ids) == 60 and comment_ids[-1] == 'p3c19'
+
+
+
+def _comment_tree_routes(depth: int=2, replies_pages: int=2):
+    """
+        Every comment has 2 replies per page (over `replies_pages` pages), up to `depth` levels deep.
+    """
+
+    def replies(path, query):
+        parent_id, page = query['nextpage'].split('|')
+        level, page = parent_id.count('.') + 1, int(page)
+
+        comments = comments_page([f'{parent_id}.{page}{index}' for index in range(2)], nextpage=f'{parent_id}|{page + 1}' if page < replies_pages else None)
+
+        for comment in comments['comments']:
+            comment['repliesPage'] = f"{comment['commentId']}|1" if level < depth else None
+
+        return comments
+
+
+    def top_level(path, query):
+        comments = comments_page(['a', 'b'])
+
+        for comment in comments['comments']:
+            comment['repliesPage'] = f"{comment['commentId']}|1"
+
+        return comments
+
+
+    routes = default_routes()
+    routes['/comments/'] = top_level
+    routes['/nextpage/comments/'] = replies
+
+    return routes
+
+
+
+def test_iter_comment_tree() -> None:
+    """
+        Crawls the whole reply tree, following reply pagination, depth and count budgets.
+    """
+
+    with MockPipedServer(_comment_tree_routes()) as server:
+        client = PipedClient(server.url)
+
+        tree = list(client.iter_comment_tree('dQw4w9WgXcQ'))
+        parents = {comment.comment_id: parent_id for parent_id, comment in tree}
+
+        # 2 top-level, 4 replies each, 4 replies to each reply:
+        assert len(tree) == 2 + 2 * 4 + 2 * 4 * 4
+        assert parents['a'] is None and parents['a.10'] == 'a' and parents['a.10.21'] == 'a.10'
+
+        assert len(list(client.iter_comment_tree('dQw4w9WgXcQ', max_depth=1))) == 2 + 2 * 4
+        assert len(list(client.iter_comment_tree('dQw4w9WgXcQ', max_comments=7))) == 7
+
+
+
+def test_async_iter_comment_tree() -> None:
+    """
+        Same as `test_iter_comment_tree`, but with the async client.
+    """
+
+    async def run(base_url: str) -> list:
+        async with AsyncPipedClient(base_url) as client:
+            return [pair async for pair in client.iter_comment_tree('dQw4w9WgXcQ', max_depth=1, max_concurrency=2)]
+
+
+    with MockPipedServer(_comment_tree_routes()) as server:
+        tree = asyncio.run(run(server.url))
+
+        assert len(tree) == 2 + 2 * 4
+        assert {parent_id for parent_id, _ in tree} == {None, 'a', 'b'}
+
+
+
+NOW = datetime(2022, 1, 1)
+
+
+def _channel_routes(pages: int=5, per_page: int=30):
+    """
+        Channel uploads, one per day going back from `NOW`.
+    """
+
+    def uploads(number: int) -> list:
+        return [
+            related_stream(f'v{index}', uploaded=int((NOW - timedelta(days=index)).timestamp() * 1000))
+            for index in range((number - 1) * per_page, number * per_page)
+        ]
+
+
+    routes = default_routes()
+    routes['/channel/'] = lambda path, query: {**channel('UCabc', [], nextpage='2'), 'relatedStreams': uploads(1)}
+    routes['/nextpage/channel/'] = lambda path, query: {
+        'nextpage': str(int(query['nextpage']) + 1) if int(query['nextpage']) < pages else None,
+        'relatedStreams': uploads(int(query['nextpage'])),
+    }
+
+    return routes
+
+
+
+def test_iter_channel_videos() -> None:
+    """
+        Pages through a channel's uploads, stopping at `since`/`limit` without downloading further pages.
+    """
+
+    with MockPipedServer(_channel_routes()) as server:
+        client = PipedClient(server.url)
+
+        assert len(list(client.iter_channel_videos('UCabc'))) == 150
+        assert len(list(client.iter_channel_videos('UCabc', limit=45, prefetch=0))) == 45
+
+        server.hits.clear()
+        recent = list(client.iter_channel_videos('UCabc', since=NOW - timedelta(days=40)))
+
+        assert len(recent) == 41 and recent[-1].url == '/watch?v=v40'
+        assert sum(server.hits.values()) == 2
+
+        # Timezone-aware times are compared in local time:
+        aware = list(client.iter_channel_videos('UCabc', since=(NOW - timedelta(days=40)).astimezone(timezone.utc)))
+
+        assert [video.url for video in aware] == [video.url for video in recent]
+
+
+
+def test_async_iter_channel_videos() -> None:
+    """
+        Same as `test_iter_channel_videos`, but with the async client.
+    """
+
+    async def run(base_url: str) -> list:
+        async with AsyncPipedClient(base_url) as client:
+            return [video async for video in client.iter_channel_videos('UCabc', since=NOW - timedelta(days=40))]
+
+
+    with MockPipedServer(_channel_routes()) as server:
+        assert len(asyncio.run(run(server.url))) == 41
+        assert sum(server.hits.values()) == 2
+
+
+
+
+if __name__ == '__main__':
+    test_iter_comments()
+    test_iter_comments_prefetch()
+    test_iter_comments_stops_early()
+    test_async_iter_comments()
+    test_iter_comment_tree()
+    test_async_iter_comment_tree()
+    test_iter_channel_videos()
+    test_async_iter_channel_videos()
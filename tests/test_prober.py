@@ -0,0 +1,110 @@
+import time
+import socket
+
+from piped_api.cache import ResponseCache
+from piped_api.prober import InstanceProber, probe_instances
+
+from piped_api.testing import MockPipedServer
+from tests.payloads import default_routes
+
+
+def _delayed_routes(delay: float):
+    routes = default_routes()
+    suggestions = routes['/suggestions']
+
+    def delayed(path, query):
+        time.sleep(delay)
+        return suggestions(path, query)
+
+    routes['/suggestions'] = delayed
+
+    return routes
+
+
+def _unreachable_url() -> str:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+
+
+def test_probe_instances() -> None:
+    """
+        Instances are ranked by success rate first, then by latency.
+    """
+
+    with MockPipedServer(_delayed_routes(0.05)) as slow, MockPipedServer(default_routes()) as fast:
+        down = _unreachable_url()
+        results = probe_instances([slow.url, down, fast.url + '/'], samples=4)
+
+        for result in results:
+            print(f"{result.url}: p50={result.p50:.3f}s p95={result.p95:.3f}s success={result.success_rate:.0%}")
+
+        assert [result.url for result in results] == [fast.url, slow.url, down]
+        assert results[1].p50 >= 0.05 and results[1].p95 >= results[1].p50
+        assert results[2].success_rate == 0.0 and results[2].failures == 4
+
+
+
+def test_prober_switches_clients() -> None:
+    """
+        Clients created by the prober follow the fastest instance after each (background) probe.
+    """
+
+    routes = {'a': _delayed_routes(0.0), 'b': _delayed_routes(0.05)}
+
+    with MockPipedServer(routes['a']) as first, MockPipedServer(routes['b']) as second:
+        probed = []
+        prober = InstanceProber([first.url, second.url], interval=0.05, on_probe=probed.append, samples=2)
+        client = prober.client(cache=ResponseCache())
+
+        assert client.base_api_url == first.url
+        assert client.get_search_suggestions('piped') == ['piped 0', 'piped 1', 'piped 2']
+        client.get_trending('US')
+
+        # The first instance slows down:
+        first.routes['/suggestions'] = _delayed_routes(0.1)['/suggestions']
+
+        prober.start()
+        deadline = time.monotonic() + 5
+
+        while client.base_api_url != second.url and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        prober.stop()
+
+        assert client.base_api_url == second.url
+        assert len(probed) >= 2
+
+        # Cached responses survive the switch:
+        client.get_trending('US')
+        assert second.hits.get('/trending', 0) == 0
+
+
+
+def test_failed_probes_are_recorded() -> None:
+    """
+        Background probes keep running when one fails, and the failures are counted.
+    """
+
+    def fail(results) -> None:
+        raise RuntimeError("Boom")
+
+
+    with MockPipedServer(default_routes()) as server:
+        prober = InstanceProber([server.url], interval=0.02, on_probe=fail, samples=1)
+        prober.start()
+        time.sleep(0.3)
+        prober.stop()
+
+    print(prober.failed_probes, prober.last_error)
+
+    assert prober.failed_probes >= 2
+    assert str(prober.last_error) == "Boom"
+
+
+
+if __name__ == '__main__':
+    test_probe_instances()
+    test_prober_switches_clients()
+    test_failed_probes_are_recorded()
@@ -0,0 +1,87 @@
+import asyncio
+import pytest
+
+from piped_api import PipedClient, AsyncPipedClient
+from piped_api.cache import ResponseCache
+from piped_api.client import APIError
+from piped_api.projection import Projection
+
+from piped_api.testing import MockPipedServer
+from tests.payloads import default_routes
+
+
+FIELDS = ['title', 'views', 'uploaded']
+
+
+def test_projected_getters() -> None:
+    """
+        Only the requested keys are kept, both when decoding selectively and when projecting cached responses.
+    """
+
+    with MockPipedServer(default_routes()) as server:
+        for client in [PipedClient(server.url), PipedClient(server.url, cache=ResponseCache())]:
+            trending = client.get_trending('US', fields=FIELDS)
+            assert all(set(video.data) == set(FIELDS) for video in trending)
+            assert trending[0].title == 'Video US-0'
+
+            with pytest.raises(KeyError):
+                trending[0].uploader_name
+
+            channel = client.get_channel_by_id('UCabc', fields=FIELDS + ['name'])
+            assert set(channel.data) == {'name', 'nextpage', 'relatedStreams'}
+            assert set(channel.uploaded_videos[0].data) == set(FIELDS)
+
+            comments = client.get_comments('dQw4w9WgXcQ', fields=['commentId'])
+            assert comments.nextpage == 'page-2' and comments.disabled is False
+            assert [comment.data for comment in comments] == [{'commentId': 'c1'}, {'commentId': 'c2'}]
+
+            assert set(client.get_video('dQw4w9WgXcQ', fields=['title']).data) == {'title'}
+
+
+
+def test_projection_apply() -> None:
+    """
+        `Projection.apply` and the selective decoding type produce the same result.
+    """
+
+    import msgspec
+
+    projection = Projection.of(FIELDS, keep={'nextpage'}, items_key='relatedStreams')
+    raw = b'{"nextpage": null, "name": "x", "relatedStreams": [{"title": "a", "views": 1, "uploaded": 2, "url": "/watch?v=a"}]}'
+
+    assert projection.apply(msgspec.json.decode(raw)) == msgspec.json.decode(raw, type=projection.decoding_type())
+    assert Projection.of(None) is None
+
+
+
+def test_projected_errors_and_async() -> None:
+    """
+        Errors are still raised for projected requests, and the async client supports projections too.
+    """
+
+    routes = default_routes()
+    routes['/streams/'] = lambda path, query: {'error': 'Video unavailable'}
+    routes['/trending'] = lambda path, query: {'error': 'Invalid region'}
+
+    async def run(base_url: str) -> list:
+        async with AsyncPipedClient(base_url) as client:
+            return await client.get_channel_by_id('UCabc', fields=FIELDS)
+
+
+    with MockPipedServer(routes) as server:
+        client = PipedClient(server.url)
+
+        with pytest.raises(APIError):
+            client.get_video('dQw4w9WgXcQ', fields=['title'])
+
+        with pytest.raises(APIError):
+            client.get_trending('XX', fields=['title'])
+
+        assert set(asyncio.run(run(server.url)).uploaded_videos[0].data) == set(FIELDS)
+
+
+
+if __name__ == '__main__':
+    test_projected_getters()
+    test_projection_apply()
+    test_projected_errors_and_async()
@@ -0,0 +1,101 @@
+import time
+import asyncio
+
+from piped_api import PipedClient, AsyncPipedClient
+from piped_api.instances import InstancePool
+from piped_api.ratelimit import RateLimiter, TokenBucket
+
+from piped_api.testing import MockPipedServer
+from tests.payloads import default_routes
+
+
+def test_token_bucket() -> None:
+    """
+        A bucket allows a burst right away, then spaces out further reservations by `1 / rate`.
+    """
+
+    bucket = TokenBucket(rate=10, burst=3)
+    delays = [bucket.reserve() for _ in range(5)]
+
+    assert delays[:3] == [0.0, 0.0, 0.0]
+    assert 0.09 <= delays[3] <= 0.1 and 0.19 <= delays[4] <= 0.2
+
+
+
+def test_batch_is_smoothed() -> None:
+    """
+        A batch of requests is spread out over time instead of failing, and the queueing delay is reported.
+    """
+
+    limiter = RateLimiter(rate=50, burst=5, groups={'/streams/': (20, 2)})
+
+    with MockPipedServer(default_routes()) as server:
+        client = PipedClient(server.url, rate_limiter=limiter)
+
+        start = time.perf_counter()
+        results = dict(client.get_videos([f'video{index}' for index in range(12)]))
+        elapsed = time.perf_counter() - start
+
+        client.get_search_suggestions('piped')
+
+        stats = limiter.stats()
+        print(f"{len(results)} videos in {elapsed:.2f}s", stats)
+
+        assert all(not isinstance(result, Exception) for result in results.values())
+        assert elapsed >= (12 - 2) / 20 * 0.9
+
+        assert stats[(server.url, '/streams/')].requests == 12
+        assert stats[(server.url, '/streams/')].delayed >= 9
+        assert stats[(server.url, '/streams/')].max_delay > 0.3
+        assert stats[(server.url, None)].requests == 13
+
+
+
+def test_async_rate_limit() -> None:
+    """
+        The async client is limited the same way.
+    """
+
+    limiter = RateLimiter(rate=20, burst=1)
+
+    async def main(url: str) -> float:
+        async with AsyncPipedClient(url, rate_limiter=limiter) as client:
+            start = time.perf_counter()
+            await asyncio.gather(*(client.get_video(f'video{index}') for index in range(6)))
+
+            return time.perf_counter() - start
+
+
+    with MockPipedServer(default_routes()) as server:
+        assert asyncio.run(main(server.url)) >= 5 / 20 * 0.9
+        assert limiter.stats()[(server.url, None)].mean_delay > 0
+
+
+
+def test_queueing_is_not_instance_latency() -> None:
+    """
+        Time spent waiting for the rate limiter doesn't count as latency (or load) of the instances of a pool.
+    """
+
+    limiter = RateLimiter(rate=20, burst=1)
+
+    with MockPipedServer(default_routes()) as server:
+        pool = InstancePool([server.url])
+        client = PipedClient(instances=pool, rate_limiter=limiter)
+
+        for index in range(5):
+            client.get_video(f'video{index}')
+
+        stats = pool.stats()[server.url]
+        print(stats, limiter.stats())
+
+        assert limiter.stats()[(server.url, None)].max_delay > 0.03
+        assert stats.latency < 0.03 and stats.in_flight == 0
+
+
+
+if __name__ == '__main__':
+    test_token_bucket()
+    test_batch_is_smoothed()
+    test_async_rate_limit()
+    test_queueing_is_not_instance_latency()
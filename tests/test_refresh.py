@@ -0,0 +1,147 @@
+import time
+import asyncio
+
+from piped_api import PipedClient, AsyncPipedClient
+from piped_api.cache import ResponseCache, DEFAULT_STALE_TTLS
+from piped_api.refresh import HotKeys, Refresher, AsyncRefresher
+
+from piped_api.testing import MockPipedServer
+from tests.payloads import default_routes
+
+
+def test_hot_keys() -> None:
+    """
+        The most requested keys are the hottest, counts decay over time and the coldest keys are forgotten beyond `capacity`.
+    """
+
+    hot_keys = HotKeys(capacity=3, half_life=0.1)
+
+    for key, count in (('a', 5), ('b', 3), ('c', 1)):
+        for _ in range(count):
+            hot_keys.record(key, value=key.upper())
+
+    assert [(key, value) for key, _, value in hot_keys.hottest(2)] == [('a', 'A'), ('b', 'B')]
+
+    hot_keys.record('d')
+    assert len(hot_keys) == 4
+
+    hot_keys.record('e')
+    assert len(hot_keys) == 3 and hot_keys.score('c') == hot_keys.score('d') == 0.0
+    assert hot_keys.score('e') > 0.0
+
+    time.sleep(0.1)
+    assert 2.4 < hot_keys.score('a') < 2.6
+
+
+
+def test_stale_responses_are_refreshed_once() -> None:
+    """
+        A stale response is returned instantly and refreshed once, no matter how many calls see it meanwhile.
+    """
+
+    cache = ResponseCache(ttls={'/trending': 0.05}, stale_ttls=DEFAULT_STALE_TTLS)
+
+    with MockPipedServer(default_routes(), latency=0.2) as server:
+        with PipedClient(server.url, cache=cache) as client:
+            client.get_trending('US')
+            time.sleep(0.06)
+
+            start = time.perf_counter()
+
+            for _ in range(10):
+                assert client.get_trending('US')[0].title == 'Video US-0'
+
+            assert time.perf_counter() - start < 0.1
+
+            client.refresher.join(timeout=5)
+
+        print(client.refresher.stats)
+
+        assert server.hits['/trending'] == 2
+        assert client.refresher.stats.refreshed == 1
+        assert cache.stats.stale == 10
+
+
+
+def test_close_finishes_refreshes() -> None:
+    """
+        Closing the client waits for pending refreshes, before the session they use is closed.
+    """
+
+    cache = ResponseCache(ttls={'/trending': 0.05}, stale_ttls=DEFAULT_STALE_TTLS)
+
+    with MockPipedServer(default_routes(), latency=0.2) as server:
+        with PipedClient(server.url, cache=cache) as client:
+            client.get_trending('US')
+            time.sleep(0.06)
+            client.get_trending('US')
+
+        assert (client.refresher.stats.refreshed, client.refresher.stats.failed) == (1, 0)
+        assert server.hits['/trending'] == 2
+
+
+
+def test_hot_keys_are_refreshed_ahead() -> None:
+    """
+        The most requested keys are refreshed shortly before they expire, so they are never served stale.
+    """
+
+    cache = ResponseCache(ttls={'/channel/': 0.5}, stale_ttls=DEFAULT_STALE_TTLS)
+    refresher = Refresher(hot_keys=1, refresh_ahead=0.5, interval=0.05)
+
+    with MockPipedServer(default_routes()) as server:
+        client = PipedClient(server.url, cache=cache, refresher=refresher)
+
+        for _ in range(3):
+            client.get_channel_by_id('UChot')
+
+        client.get_channel_by_id('UCcold')
+
+        time.sleep(1.0)
+        refresher.close()
+        refresher.join(timeout=5)
+
+        print(refresher.stats)
+
+        assert server.hits['/channel/UChot'] >= 3
+        assert server.hits['/channel/UCcold'] == 1
+        assert refresher.stats.ahead == server.hits['/channel/UChot'] - 1
+
+        # Endpoints without a stale TTL are not tracked:
+        client.get_comments('dQw4w9WgXcQ')
+        assert len(refresher.tracker) == 2
+
+
+
+def test_async_refresh_ahead() -> None:
+    """
+        The async client refreshes hot keys in background tasks.
+    """
+
+    cache = ResponseCache(ttls={'/streams/': 0.3}, stale_ttls=DEFAULT_STALE_TTLS)
+    refresher = AsyncRefresher(hot_keys=1, refresh_ahead=0.5, interval=0.05)
+
+    async def main(url: str) -> None:
+        async with AsyncPipedClient(url, cache=cache, refresher=refresher) as client:
+            await client.get_video('dQw4w9WgXcQ')
+            await asyncio.sleep(0.5)
+
+            assert cache.lookup(ResponseCache.make_key(url, '/streams/dQw4w9WgXcQ'))[1]
+
+        await refresher.aclose()
+
+
+    with MockPipedServer(default_routes()) as server:
+        asyncio.run(main(server.url))
+
+        assert server.hits['/streams/dQw4w9WgXcQ'] >= 2
+        assert refresher.stats.ahead >= 1 and refresher.stats.failed == 0
+
+
+
+if __name__ == '__main__':
+    test_hot_keys()
+    test_stale_responses_are_refreshed_once()
+    test_close_finishes_refreshes()
+    test_hot_keys_are_refreshed_ahead()
+    test_async_refresh_ahead()
@@ -0,0 +1,171 @@
+import time
+import asyncio
+import pytest
+
+from email.utils import formatdate
+
+from piped_api import PipedClient, AsyncPipedClient
+from piped_api.client import APIError
+from piped_api.instances import InstancePool
+from piped_api.retry import RetryPolicy, RetryBudget, parse_retry_after
+
+from piped_api.testing import MockPipedServer
+from tests.payloads import default_routes, video
+
+
+def _flaky_routes(failures: int, response=(503, {'error': 'Service Unavailable'})):
+    """
+        Routes whose `/streams/` endpoint fails `failures` times for each video, then succeeds.
+    """
+
+    routes = default_routes()
+    attempts = {}
+
+    def flaky_video(path, query):
+        video_id = path.rsplit('/', 1)[-1]
+        attempts[video_id] = attempts.get(video_id, 0) + 1
+
+        return response if attempts[video_id] <= failures else video(video_id)
+
+    routes['/streams/'] = flaky_video
+
+    return routes
+
+
+
+def test_parse_retry_after() -> None:
+    """
+        `Retry-After` can be a number of seconds or an HTTP date.
+    """
+
+    assert parse_retry_after('3') == 3.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('soon') is None
+    assert parse_retry_after('nan') is None and parse_retry_after('inf') is None
+    assert 8 <= parse_retry_after(formatdate(time.time() + 10, usegmt=True)) <= 10
+
+
+
+def test_retries() -> None:
+    """
+        Transient failures are retried with backoff, honouring `Retry-After`.
+    """
+
+    with MockPipedServer(_flaky_routes(2)) as server:
+        client = PipedClient(server.url, retry=RetryPolicy(backoff=0.01))
+
+        assert client.get_video('flaky').title == 'Video flaky'
+        assert server.hits['/streams/flaky'] == 3
+
+
+    with MockPipedServer(_flaky_routes(1, (429, {'error': 'Too Many Requests'}, {'Retry-After': '0.3'}))) as server:
+        client = PipedClient(server.url, retry=RetryPolicy(backoff=0.01))
+
+        start = time.perf_counter()
+        assert client.get_video('limited').title == 'Video limited'
+        assert time.perf_counter() - start >= 0.3
+
+
+
+def test_errors() -> None:
+    """
+        Exhausted and non-transient failures raise `APIError` with the status code, URI and attempts - also for non-JSON bodies.
+    """
+
+    with MockPipedServer(_flaky_routes(10, (502, b'<html><body>502 Bad Gateway</body></html>'))) as server:
+        client = PipedClient(server.url, retry=RetryPolicy(max_attempts=3, backoff=0.01))
+
+        with pytest.raises(APIError) as error:
+            client.get_video('down')
+
+        print(error.value)
+        assert (error.value.status_code, error.value.uri, error.value.attempts) == (502, '/streams/down', 3)
+        assert '502 Bad Gateway' in str(error.value)
+
+
+    with MockPipedServer(_flaky_routes(10, (500, {'error': 'Video unavailable'}))) as server:
+        client = PipedClient(server.url, retry=RetryPolicy(backoff=0.01))
+
+        with pytest.raises(APIError) as error:
+            client.get_video('private')
+
+        assert (error.value.status_code, error.value.attempts) == (500, 1)
+        assert str(error.value) == 'Error: Video unavailable'
+
+
+
+def test_retry_budget() -> None:
+    """
+        Once the retry budget is spent, failures are not retried anymore.
+    """
+
+    budget = RetryBudget(ratio=0.0, reserve=2)
+
+    with MockPipedServer(_flaky_routes(10)) as server:
+        client = PipedClient(server.url, retry=RetryPolicy(max_attempts=5, backoff=0.01, budget=budget))
+
+        attempts = []
+
+        for index in range(3):
+            with pytest.raises(APIError) as error:
+                client.get_video(f'video{index}')
+
+            attempts.append(error.value.attempts)
+
+        assert attempts == [3, 1, 1]
+        assert budget.exhausted == 3
+
+
+
+def test_failover_is_retrying() -> None:
+    """
+        Fail-overs between the instances of a pool count as attempts and take from the retry budget.
+    """
+
+    budget = RetryBudget(ratio=0.0, reserve=10)
+
+    with MockPipedServer(_flaky_routes(10)) as first, MockPipedServer(_flaky_routes(10)) as second:
+        client = PipedClient(instances=InstancePool([first.url, second.url]), retry=RetryPolicy(max_attempts=3, backoff=0.01, budget=budget))
+
+        with pytest.raises(APIError) as error:
+            client.get_video('down')
+
+        sent = first.hits.get('/streams/down', 0) + second.hits.get('/streams/down', 0)
+
+        assert error.value.attempts == sent == 3
+        assert budget.tokens == 8
+
+
+
+def test_async_retries() -> None:
+    """
+        The async client retries the same way.
+    """
+
+    async def main(url: str) -> None:
+        async with AsyncPipedClient(url, retry=RetryPolicy(backoff=0.01)) as client:
+            assert (await client.get_video('flaky')).title == 'Video flaky'
+
+            with pytest.raises(APIError) as error:
+                await client.get_video('broken')
+
+            assert (error.value.status_code, error.value.attempts) == (503, 3)
+
+
+    routes = _flaky_routes(2)
+    flaky_video = routes['/streams/']
+    routes['/streams/'] = lambda path, query: (503, b'') if path.endswith('broken') else flaky_video(path, query)
+
+    with MockPipedServer(routes) as server:
+        asyncio.run(main(server.url))
+        assert server.hits['/streams/flaky'] == 3
+
+
+
+if __name__ == '__main__':
+    test_parse_retry_after()
+    test_retries()
+    test_errors()
+    test_retry_budget()
+    test_failover_is_retrying()
+    test_async_retries()
@@ -0,0 +1,86 @@
+import json
+import asyncio
+import pytest
+
+from pathlib import Path
+from datetime import date, timedelta
+
+from piped_api import PipedClient, AsyncPipedClient
+from piped_api.client import APIError
+from piped_api.models.videos import Video
+from piped_api.schema import Struct, ValidationError, decode
+from piped_api import schema
+
+from piped_api.testing import MockPipedServer
+from tests.payloads import default_routes, video
+
+
+STREAMS_FIXTURE = Path(__file__).parent / Path('fixtures/streams.json')
+
+
+class VideoViews(Struct, rename='camel'):
+    title: str
+    views: int
+
+
+
+def test_decode_video() -> None:
+    """
+        A `/streams` response decodes into the same values the models return.
+    """
+
+    content = STREAMS_FIXTURE.read_bytes()
+    struct, model = decode(content, schema.Video), Video(json.loads(content))
+
+    assert struct.title == model.title and struct.upload_date == model.upload_date == date(2021, 12, 31)
+    assert struct.duration == model.duration == timedelta(seconds=212)
+    assert [related.uploaded for related in struct.related_videos] == [related.uploaded for related in model.related_videos]
+    assert [stream.url for stream in struct.audio_streams] == [stream.url for stream in model.get_streams('audio')]
+    assert struct.subtitles[0].code == model.subtitles[0].code
+
+    assert decode(content, VideoViews) == VideoViews(title=model.title, views=model.views)
+
+
+
+def test_schema_drift() -> None:
+    """
+        Responses that don't match the schema fail at decode time.
+    """
+
+    with pytest.raises(ValidationError):
+        decode(b'{"title": "Video", "views": "a lot"}', VideoViews)
+
+    with pytest.raises(ValidationError):
+        decode(b'{"title": "Video"}', VideoViews)
+
+
+
+def test_client_video_struct() -> None:
+    """
+        Both clients can return typed structs, and still raise `APIError` for error responses.
+    """
+
+    routes = default_routes()
+    routes['/streams/'] = lambda path, query: {'error': 'Video unavailable'} if path.endswith('broken') else video(path.rsplit('/', 1)[-1])
+
+    async def run(base_url: str) -> schema.Video:
+        async with AsyncPipedClient(base_url) as client:
+            return await client.get_video_struct('dQw4w9WgXcQ')
+
+
+    with MockPipedServer(routes) as server:
+        client = PipedClient(server.url)
+
+        assert client.get_video_struct('dQw4w9WgXcQ').related_videos[0].duration == timedelta(seconds=212)
+        assert client.get_video_struct('dQw4w9WgXcQ', struct=VideoViews).views == 1000
+        assert asyncio.run(run(server.url)).title == 'Video dQw4w9WgXcQ'
+
+        with pytest.raises(APIError):
+            client.get_video_struct('broken')
+
+
+
+if __name__ == '__main__':
+    test_decode_video()
+    test_schema_drift()
+    test_client_video_struct()
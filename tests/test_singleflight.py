@@ -0,0 +1,65 @@
+import time
+import asyncio
+
+from concurrent.futures import ThreadPoolExecutor
+
+from piped_api import PipedClient, AsyncPipedClient
+
+from piped_api.testing import MockPipedServer
+from tests.payloads import default_routes, video
+
+
+def _slow_routes():
+    routes = default_routes()
+
+    def slow_video(path, query):
+        time.sleep(0.2)
+        return video(path.rsplit('/', 1)[-1])
+
+    routes['/streams/'] = slow_video
+
+    return routes
+
+
+
+def test_threaded_coalescing(workers: int=50) -> None:
+    """
+        Many threads asking for the same video at once share a single request and payload.
+    """
+
+    with MockPipedServer(_slow_routes()) as server:
+        client = PipedClient(server.url)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            videos = list(executor.map(lambda _: client.get_video('popular'), range(workers)))
+
+        assert server.hits['/streams/popular'] == 1
+        assert client.single_flight.collapsed == workers - 1
+        assert all(video.data is videos[0].data for video in videos)
+
+
+
+def test_async_coalescing(callers: int=50) -> None:
+    """
+        Same as `test_threaded_coalescing`, but with the async client.
+    """
+
+    async def run(base_url: str) -> AsyncPipedClient:
+        async with AsyncPipedClient(base_url) as client:
+            videos = await asyncio.gather(*(client.get_video('popular') for _ in range(callers)), client.get_video('other'))
+
+        assert videos[-1].title == 'Video other'
+        return client
+
+
+    with MockPipedServer(_slow_routes()) as server:
+        client = asyncio.run(run(server.url))
+
+        assert server.hits['/streams/popular'] == 1
+        assert client.single_flight.collapsed == callers - 1
+
+
+
+if __name__ == '__main__':
+    test_threaded_coalescing()
+    test_async_coalescing()
@@ -0,0 +1,107 @@
+import json
+import time
+import random
+import asyncio
+import pytest
+
+from pathlib import Path
+
+from piped_api import PipedClient, AsyncPipedClient
+from piped_api.client import APIError
+from piped_api.streaming import ArraySplitter
+
+from piped_api.testing import MockPipedServer
+from tests.payloads import default_routes, comments_page
+
+
+COMMENTS_FIXTURE = Path(__file__).parent / Path('fixtures/comments.json')
+
+
+def test_array_splitter(trials: int=50) -> None:
+    """
+        Elements are split correctly regardless of where chunk boundaries fall, including escaped quotes and brackets in strings.
+    """
+
+    page = json.loads(COMMENTS_FIXTURE.read_bytes())
+    page['comments'][0]['commentText'] = 'Tricky "quotes", \\ backslashes, {braces} and [brackets]'
+    raw = json.dumps(page, indent=1).encode()
+
+    for _ in range(trials):
+        splitter, items, position = ArraySplitter('comments'), [], 0
+
+        while position < len(raw):
+            size = random.randint(1, 64)
+            items += splitter.feed(raw[position:position + size])
+            position += size
+
+        assert [json.loads(item) for item in items] == page['comments']
+        assert json.loads(splitter.envelope()) == {**page, 'comments': []}
+
+
+
+def _big_comments_routes(count: int=400):
+    routes = default_routes()
+    routes['/comments/'] = lambda path, query: comments_page([f'c{index}' for index in range(count)], nextpage='page-2')
+    routes['/nextpage/comments/'] = lambda path, query: {'error': 'Invalid nextpage'}
+
+    return routes
+
+
+
+def test_stream_comments() -> None:
+    """
+        The first comment is yielded long before the whole page is downloaded, and `nextpage` is available afterwards.
+    """
+
+    with MockPipedServer(_big_comments_routes(), chunk_size=8 * 1024, chunk_delay=0.05) as server:
+        client = PipedClient(server.url)
+
+        start = time.perf_counter()
+        page = client.stream_comments('dQw4w9WgXcQ', chunk_size=1024)
+
+        with pytest.raises(RuntimeError):
+            page.nextpage
+
+        for index, comment in enumerate(page):
+            if index == 0:
+                first_item = time.perf_counter() - start
+
+        total = time.perf_counter() - start
+        print(f"First comment after {first_item:.2f}s, whole page after {total:.2f}s")
+
+        assert index == 399 and comment.comment_id == 'c399'
+        assert page.nextpage == 'page-2' and page.rest.get_comments() == []
+        assert first_item < total / 2
+
+        with pytest.raises(APIError):
+            list(client.stream_comments('dQw4w9WgXcQ', nextpage=page.nextpage))
+
+
+
+def test_stream_channel_videos() -> None:
+    """
+        Both clients stream the uploaded videos of a channel.
+    """
+
+    async def run(base_url: str) -> list:
+        async with AsyncPipedClient(base_url) as client:
+            page = client.stream_channel_videos('UCabc')
+            videos = [video.url async for video in page]
+
+            return videos + [page.rest.name]
+
+
+    with MockPipedServer(default_routes()) as server:
+        page = PipedClient(server.url).stream_channel_videos('UCabc')
+
+        assert [video.url for video in page] == ['/watch?v=v1', '/watch?v=v2']
+        assert page.rest.name == 'Channel UCabc' and page.nextpage == 'page-2'
+
+        assert asyncio.run(run(server.url)) == ['/watch?v=v1', '/watch?v=v2', 'Channel UCabc']
+
+
+
+if __name__ == '__main__':
+    test_array_splitter()
+    test_stream_comments()
+    test_stream_channel_videos()
@@ -0,0 +1,137 @@
+import time
+import random
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+from piped_api import PipedClient
+from piped_api.cache import ResponseCache
+
+from piped_api.testing import MockPipedServer
+from tests.payloads import default_routes, comments_page, channel, related_stream
+
+
+def _echo_routes():
+    """
+        Routes whose payloads identify the request they answer, so that mixed up responses can be detected.
+    """
+
+    routes = default_routes()
+
+    routes['/comments/'] = lambda path, query: comments_page([f"{path.rsplit('/', 1)[-1]}-c1"], nextpage=f"{path.rsplit('/', 1)[-1]}-page-2")
+    routes['/nextpage/comments/'] = lambda path, query: comments_page([f"{query['nextpage']}-c2"])
+    routes['/nextpage/channel/'] = lambda path, query: {'nextpage': None, 'relatedStreams': [related_stream(query['nextpage'])]}
+    routes['/channel/'] = lambda path, query: channel(path.rsplit('/', 1)[-1], [f"{path.rsplit('/', 1)[-1]}-v1"], nextpage=f"{path.rsplit('/', 1)[-1]}-page-2")
+
+    return routes
+
+
+
+def _check_endpoint(client: PipedClient, endpoint: str, key: str) -> None:
+    """
+        Calls `endpoint` for `key` and asserts that the response belongs to this call.
+    """
+
+    if endpoint == 'video':
+        assert client.get_video(key).title == f'Video {key}'
+
+    elif endpoint == 'comments':
+        comments = client.get_comments(key)
+        assert [comment.comment_id for comment in comments.get_comments()] == [f'{key}-c1']
+        assert comments.nextpage == f'{key}-page-2'
+
+        next_comments = client.get_comments(key, nextpage=comments.nextpage)
+        assert [comment.comment_id for comment in next_comments.get_comments()] == [f'{key}-page-2-c2']
+
+    elif endpoint == 'trending':
+        assert [video.title for video in client.get_trending(key)] == [f'Video {key.upper()}-{index}' for index in range(5)]
+
+    elif endpoint == 'channel':
+        page = client.get_channel_by_id(key)
+        assert page.id == key and page.nextpage == f'{key}-page-2'
+        assert [video.title for video in client.get_channel_by_id(key, nextpage=page.nextpage).uploaded_videos] == [f'Video {key}-page-2']
+
+    elif endpoint == 'channel_name':
+        assert client.get_channel_by_name(key).id == f'UC{key}'
+
+    elif endpoint == 'suggestions':
+        assert client.get_search_suggestions(key) == [f'{key} {index}' for index in range(3)]
+
+    elif endpoint == 'comments_stream':
+        page = client.stream_comments(key)
+        assert [comment.comment_id for comment in page] == [f'{key}-c1']
+        assert page.nextpage == f'{key}-page-2'
+
+
+
+ENDPOINTS = ['video', 'comments', 'trending', 'channel', 'channel_name', 'suggestions', 'comments_stream']
+
+
+def _hammer(client: PipedClient, threads: int, calls: int, keys: int) -> float:
+    """
+        Calls random endpoints for random keys from `threads` threads at once, `calls` times in total. Returns the throughput (calls per second).
+    """
+
+    rng = random.Random(calls)
+    jobs = [(rng.choice(ENDPOINTS), f'key{rng.randrange(keys)}') for _ in range(calls)]
+    done = []
+    lock = threading.Lock()
+
+    def run(job):
+        _check_endpoint(client, *job)
+
+        with lock:
+            done.append(job)
+
+
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for future in [executor.submit(run, job) for job in jobs]:
+            future.result()
+
+    elapsed = time.perf_counter() - start
+
+    assert sorted(done) == sorted(jobs), "Some calls did not complete"
+
+    return calls / elapsed
+
+
+
+def test_stress(threads: int=32, calls: int=1500) -> None:
+    """
+        One client shared by many threads answers every call with its own response - with and without caching and coalescing.
+    """
+
+    with MockPipedServer(_echo_routes()) as server:
+        configurations = {
+            'plain': PipedClient(server.url, coalesce_requests=False, max_connections_per_host=threads),
+            'coalesced': PipedClient(server.url, max_connections_per_host=threads),
+            'cached': PipedClient(server.url, cache=ResponseCache(), max_connections_per_host=threads),
+        }
+
+        for name, client in configurations.items():
+            with client:
+                throughput = _hammer(client, threads, calls, keys=20)
+                print(f"{name}: {throughput:.0f} calls/s with {threads} threads")
+
+
+
+def test_params_are_not_shared() -> None:
+    """
+        Query parameters passed by the caller are merged with those of the endpoint, without being modified.
+    """
+
+    with MockPipedServer(_echo_routes()) as server:
+        client = PipedClient(server.url)
+        params = {'hl': 'en'}
+
+        assert client.get_search_suggestions('piped', params=params) == ['piped 0', 'piped 1', 'piped 2']
+        assert client.get_trending('sk', params=params)[0].title == 'Video SK-0'
+        assert params == {'hl': 'en'}
+
+
+
+if __name__ == '__main__':
+    test_stress()
+    test_params_are_not_shared()